@@ -7,6 +7,7 @@ import streamlit as st
 import json
 import os
 import re
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -38,11 +39,23 @@ from prompts.task_prompts import (
     PROMPT_COACH_CONVERSATION,
     PROMPT_LINKEDIN_POST,
     PROMPT_ADAPTER_CV_TEMPLATE,
-    PROMPT_MODIFIER_CV_COMPLET
+    PROMPT_MODIFIER_CV_COMPLET,
+    PROMPT_RESUME_CONVERSATION
 )
-from utils.llm_client import LLMClient
+from prompts.cv_schemas import CV_ADAPTATION_TOOL, CV_MODIFICATION_TOOL
+from utils.llm_client import LLMClient, split_cacheable_prompt
+from utils.async_llm_client import AsyncLLMClient
+from utils.llm_cache import get_llm_cache
 from utils.pdf_parser import extract_text_from_pdf
-from utils.supabase_client import get_supabase_client
+from utils.express_engine import run_express_jobs
+from utils.chat_context import build_coach_context, update_synopsis
+from utils.doc_retrieval import DocumentIndex
+from utils.storage import STATS_KEYS, get_storage
+from utils.cv_generator import submit_cv_pdf
+
+# Limites d'extraction des PDF uploadés : l'analyse s'arrête une fois atteintes
+OFFRE_PDF_MAX_CHARS = 20000
+CHAT_DOC_MAX_CHARS = 200000
 
 # ============================================================================
 # STYLES CSS PERSONNALISÉS
@@ -499,7 +512,8 @@ def init_session_state():
         'analyse_compatibilite': '',
         'chat_messages': [],
         'historique_candidatures': [],
-        'llm_client': None
+        'llm_client': None,
+        'async_llm_client': None
     }
     
     for key, value in defaults.items():
@@ -509,7 +523,9 @@ def init_session_state():
     # Initialiser le client LLM
     if st.session_state.llm_client is None:
         try:
-            st.session_state.llm_client = LLMClient()
+            st.session_state.llm_client = LLMClient(cache=get_llm_cache())
+            # Client asynchrone : appels simultanés sur le pool de connexions partagé
+            st.session_state.async_llm_client = AsyncLLMClient(cache=get_llm_cache())
         except ValueError as e:
             st.error(f"⚠️ Erreur de configuration : {e}")
             st.stop()
@@ -520,6 +536,31 @@ def get_llm():
     return st.session_state.llm_client
 
 
+def get_async_llm():
+    """Récupère le client LLM asynchrone (appels parallèles de la Génération Express)."""
+    return st.session_state.async_llm_client
+
+
+def use_llm_cache(action: str) -> bool:
+    """
+    Indique si une génération peut reprendre une réponse du cache LLM.
+    
+    Seule la première génération d'une action dans la session passe par le
+    cache : cliquer de nouveau sur « Générer » (ou « Regénérer ») demande une
+    nouvelle rédaction, pas le texte déjà obtenu.
+    
+    Args:
+        action: Nom de l'action (ex: "lettre", "express")
+        
+    Returns:
+        True pour la première génération, False ensuite
+    """
+    key = f"llm_generated_{action}"
+    first = not st.session_state.get(key)
+    st.session_state[key] = True
+    return first
+
+
 # ============================================================================
 # FONCTIONS UTILITAIRES
 # ============================================================================
@@ -527,9 +568,9 @@ def get_llm():
 def save_candidature(titre_poste: str, entreprise: str, data: dict):
     """Sauvegarde une candidature (Supabase + local fallback)."""
     # Essayer Supabase d'abord
-    supabase = get_supabase_client()
-    if supabase.enabled:
-        result = supabase.save_candidature(
+    storage = get_storage()
+    if storage.enabled:
+        result = storage.save_candidature(
             titre_poste=titre_poste,
             entreprise=entreprise,
             offre_texte=data.get('offre'),
@@ -565,12 +606,61 @@ def save_candidature(titre_poste: str, entreprise: str, data: dict):
     return candidature
 
 
+# Taille des pages des listes paginées (Historique, CV sauvegardés, posts LinkedIn)
+HISTORIQUE_PAGE_SIZE = 20
+SAVED_CVS_PAGE_SIZE = 10
+LINKEDIN_POSTS_PAGE_SIZE = 10
+
+
+def get_page_cursor(name: str, reset_key=None):
+    """
+    Curseur de la page affichée d'une liste paginée (voir render_page_controls).
+    
+    Args:
+        name: Nom de la liste
+        reset_key: Valeur d'un filtre de la liste : quand elle change, on
+                   revient à la première page
+        
+    Returns:
+        Curseur à passer à SupabaseClient.get_*_page (None = première page)
+    """
+    if st.session_state.get(f"{name}_page_reset_key") != reset_key:
+        st.session_state[f"{name}_page_reset_key"] = reset_key
+        st.session_state[f"{name}_page_cursors"] = [None]
+    return st.session_state.setdefault(f"{name}_page_cursors", [None])[-1]
+
+
+def render_page_controls(name: str, next_cursor):
+    """
+    Boutons page précédente / suivante d'une liste paginée.
+    
+    La pile des curseurs déjà parcourus est gardée en session : revenir en
+    arrière ne demande pas de recompter les lignes, chaque page est une seule
+    requête par clé (created_at, id).
+    """
+    cursors = st.session_state.setdefault(f"{name}_page_cursors", [None])
+    if len(cursors) == 1 and not next_cursor:
+        return
+    
+    col_prev, col_page, col_next = st.columns([1, 1, 1])
+    with col_prev:
+        if len(cursors) > 1 and st.button("⬅️ Plus récents", key=f"{name}_page_prev", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if next_cursor and st.button("Plus anciens ➡️", key=f"{name}_page_next", use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+
+
 def load_historique():
     """Charge l'historique des candidatures (Supabase + local fallback)."""
     # Essayer Supabase d'abord
-    supabase = get_supabase_client()
-    if supabase.enabled:
-        candidatures = supabase.get_candidatures(limit=50)
+    storage = get_storage()
+    if storage.enabled:
+        candidatures = storage.get_candidatures(limit=50)
         if candidatures:
             # Convertir le format pour compatibilité
             for c in candidatures:
@@ -821,7 +911,7 @@ def render_express():
             key="express_pdf_upload"
         )
         if uploaded_file:
-            offre_text = extract_text_from_pdf(uploaded_file)
+            offre_text = extract_text_from_pdf(uploaded_file, max_chars=OFFRE_PDF_MAX_CHARS)
             st.success("✅ PDF extrait avec succès !")
             with st.expander("Voir le texte extrait"):
                 st.text(offre_text[:2000] + "..." if len(offre_text) > 2000 else offre_text)
@@ -865,78 +955,102 @@ def render_express():
                 'entretien': None
             }
             
-            llm = get_llm()
-            
-            # Progress bar
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # 1. ANALYSE DE COMPATIBILITÉ
-            status_text.markdown("### 🔍 Étape 1/4 : Analyse de compatibilité...")
-            progress_bar.progress(10)
-            
-            with st.spinner("Analyse en cours..."):
-                prompt = PROMPT_ANALYSE_COMPATIBILITE.format(
-                    cv=CV_TEXTE_COMPLET,
-                    offre=offre_text
-                )
-                results['analyse'] = llm.generate(
-                    prompt=prompt,
-                    system_prompt=SYSTEM_PROMPT_ANALYSE,
-                    max_tokens=3000
-                )
-            progress_bar.progress(25)
-            
-            # 2. CV ADAPTÉ
-            status_text.markdown("### 📄 Étape 2/4 : Adaptation du CV...")
+            llm = get_async_llm()
+            use_cache = use_llm_cache("express")
             
-            with st.spinner("Optimisation du CV..."):
-                prompt = PROMPT_OPTIMISER_CV.format(
-                    cv=CV_TEXTE_COMPLET,
-                    offre=offre_text
-                )
-                results['cv'] = llm.generate(
-                    prompt=prompt,
-                    system_prompt=SYSTEM_PROMPT_CV,
-                    max_tokens=7000
-                )
-            progress_bar.progress(50)
-            
-            # 3. LETTRE DE MOTIVATION
-            status_text.markdown("### ✉️ Étape 3/4 : Rédaction de la lettre...")
-            
-            with st.spinner("Rédaction de la lettre..."):
-                contexte_prompt = f"""
+            contexte_prompt = f"""
 Contexte personnel : {contexte_perso if contexte_perso else "Non spécifié"}
 Ton souhaité : {ton_lettre}
 """
-                prompt = PROMPT_LETTRE_MOTIVATION.format(
-                    cv=CV_TEXTE_COMPLET,
-                    offre=offre_text,
-                    contexte_supplementaire=contexte_prompt
-                )
-                results['lettre'] = llm.generate(
-                    prompt=prompt,
-                    system_prompt=SYSTEM_PROMPT_LETTRE,
-                    max_tokens=7500
-                )
-            progress_bar.progress(75)
+            # Les 4 étapes ne dépendent que du CV et de l'offre : on les lance en parallèle
+            jobs = [
+                {
+                    'key': 'analyse',
+                    'prompt': split_cacheable_prompt(PROMPT_ANALYSE_COMPATIBILITE.format(
+                        cv=CV_TEXTE_COMPLET,
+                        offre=offre_text
+                    )),
+                    'system_prompt': SYSTEM_PROMPT_ANALYSE,
+                    'max_tokens': 3000,
+                    'use_cache': use_cache
+                },
+                {
+                    'key': 'cv',
+                    'prompt': split_cacheable_prompt(PROMPT_OPTIMISER_CV.format(
+                        cv=CV_TEXTE_COMPLET,
+                        offre=offre_text
+                    )),
+                    'system_prompt': SYSTEM_PROMPT_CV,
+                    'max_tokens': 7000,
+                    'use_cache': use_cache
+                },
+                {
+                    'key': 'lettre',
+                    'prompt': split_cacheable_prompt(PROMPT_LETTRE_MOTIVATION.format(
+                        cv=CV_TEXTE_COMPLET,
+                        offre=offre_text,
+                        contexte_supplementaire=contexte_prompt
+                    )),
+                    'system_prompt': SYSTEM_PROMPT_LETTRE,
+                    'max_tokens': 7500,
+                    'use_cache': use_cache
+                },
+                {
+                    'key': 'entretien',
+                    'prompt': split_cacheable_prompt(PROMPT_PREPARATION_ENTRETIEN.format(
+                        cv=CV_TEXTE_COMPLET,
+                        offre=offre_text,
+                        type_entretien=type_entretien
+                    )),
+                    'system_prompt': SYSTEM_PROMPT_ENTRETIEN,
+                    'max_tokens': 5000,
+                    'use_cache': use_cache
+                }
+            ]
             
-            # 4. PRÉPARATION ENTRETIEN
-            status_text.markdown("### 🎤 Étape 4/4 : Préparation de l'entretien...")
+            labels = {
+                'analyse': "📊 Analyse de compatibilité",
+                'cv': "📄 CV Optimisé",
+                'lettre': "✉️ Lettre de motivation",
+                'entretien': "🎤 Préparation entretien"
+            }
             
-            with st.spinner("Préparation de l'entretien..."):
-                prompt = PROMPT_PREPARATION_ENTRETIEN.format(
-                    cv=CV_TEXTE_COMPLET,
-                    offre=offre_text,
-                    type_entretien=type_entretien
-                )
-                results['entretien'] = llm.generate(
-                    prompt=prompt,
-                    system_prompt=SYSTEM_PROMPT_ENTRETIEN,
-                    max_tokens=5000
+            # Progress bar
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            status_text.markdown("### ⚡ Génération des 4 documents en parallèle...")
+            
+            # Afficher les onglets tout de suite, remplis au fil de l'eau
+            st.markdown("---")
+            st.markdown("## 📋 Résultats de la génération")
+            
+            tabs = st.tabs(["📊 Analyse", "📄 CV Adapté", "✉️ Lettre", "🎤 Entretien"])
+            tab_by_key = dict(zip(['analyse', 'cv', 'lettre', 'entretien'], tabs))
+            
+            placeholders = {}
+            for key, tab in tab_by_key.items():
+                with tab:
+                    st.markdown(f"### {labels[key]}")
+                    placeholders[key] = st.empty()
+                    placeholders[key].info("⏳ Génération en cours...")
+            
+            done = 0
+            for job_result in run_express_jobs(llm, jobs):
+                key = job_result['key']
+                done += 1
+                
+                if job_result['error'] is None:
+                    results[key] = job_result['result']
+                    placeholders[key].markdown(results[key])
+                else:
+                    results[key] = ""
+                    placeholders[key].error(f"❌ Erreur lors de la génération : {job_result['error']}")
+                
+                progress_bar.progress(int(done / len(jobs) * 100))
+                status_text.markdown(
+                    f"### ⚡ {done}/{len(jobs)} : {labels[key]} prêt(e) "
+                    f"({job_result['duration']:.0f}s)"
                 )
-            progress_bar.progress(100)
             
             # Sauvegarder dans session
             st.session_state.cv_adapte = results['cv']
@@ -946,22 +1060,9 @@ Ton souhaité : {ton_lettre}
             
             status_text.markdown("### ✅ Génération terminée !")
             
-            st.success("🎉 **Tout est prêt !** Tu peux maintenant consulter les résultats ci-dessous.")
+            st.success("🎉 **Tout est prêt !** Tu peux maintenant consulter les résultats ci-dessus.")
             
-            # Afficher les résultats dans des tabs
-            st.markdown("---")
-            st.markdown("## 📋 Résultats de la génération")
-            
-            tabs = st.tabs(["📊 Analyse", "📄 CV Adapté", "✉️ Lettre", "🎤 Entretien"])
-            
-            with tabs[0]:
-                st.markdown("### 📊 Analyse de compatibilité")
-                st.markdown(results['analyse'])
-            
-            with tabs[1]:
-                st.markdown("### 📄 CV Optimisé")
-                st.markdown(results['cv'])
-                
+            with tab_by_key['cv']:
                 # Exports CV
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -984,10 +1085,7 @@ Ton souhaité : {ton_lettre}
                     except Exception as e:
                         st.warning(f"Export DOCX non disponible: {e}")
             
-            with tabs[2]:
-                st.markdown("### ✉️ Lettre de motivation")
-                st.markdown(results['lettre'])
-                
+            with tab_by_key['lettre']:
                 # Exports Lettre
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -1010,10 +1108,7 @@ Ton souhaité : {ton_lettre}
                     except Exception as e:
                         st.warning(f"Export DOCX non disponible: {e}")
             
-            with tabs[3]:
-                st.markdown("### 🎤 Préparation entretien")
-                st.markdown(results['entretien'])
-                
+            with tab_by_key['entretien']:
                 # Exports Préparation
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -1129,7 +1224,7 @@ def render_analyser_offre():
             key="offre_pdf_upload"
         )
         if uploaded_file:
-            offre_text = extract_text_from_pdf(uploaded_file)
+            offre_text = extract_text_from_pdf(uploaded_file, max_chars=OFFRE_PDF_MAX_CHARS)
             st.success("✅ PDF extrait avec succès !")
             with st.expander("Voir le texte extrait"):
                 st.text(offre_text[:2000] + "..." if len(offre_text) > 2000 else offre_text)
@@ -1148,9 +1243,10 @@ def render_analyser_offre():
                 )
                 
                 result = llm.generate(
-                    prompt=prompt,
+                    prompt=split_cacheable_prompt(prompt),
                     system_prompt=SYSTEM_PROMPT_ANALYSE,
-                    max_tokens=6096
+                    max_tokens=6096,
+                    use_cache=use_llm_cache("analyse")
                 )
                 
                 st.session_state.analyse_compatibilite = result
@@ -1228,9 +1324,10 @@ def render_optimiser_cv():
                     prompt += f"\n\nPoints supplémentaires à intégrer :\n{points_specifiques}"
                 
                 result = llm.generate(
-                    prompt=prompt,
+                    prompt=split_cacheable_prompt(prompt),
                     system_prompt=SYSTEM_PROMPT_CV,
-                    max_tokens=6000
+                    max_tokens=6000,
+                    use_cache=use_llm_cache("cv_optimise")
                 )
                 
                 st.session_state.cv_adapte = result
@@ -1310,10 +1407,10 @@ def render_lettre_motivation():
     """, unsafe_allow_html=True)
     
     # Charger les contextes personnalisés depuis Supabase
-    supabase = get_supabase_client()
+    storage = get_storage()
     custom_contextes = {}
-    if supabase.enabled:
-        custom_contextes_list = supabase.get_custom_contextes()
+    if storage.enabled:
+        custom_contextes_list = storage.get_custom_contextes()
         for ctx in custom_contextes_list:
             custom_contextes[ctx['cle']] = {
                 'id': ctx['id'],
@@ -1373,7 +1470,7 @@ def render_lettre_motivation():
                                 selected_contextes.append(key)
                         with ctx_col2:
                             if st.button("🗑️", key=f"del_{key}", help="Supprimer ce contexte"):
-                                if supabase.delete_custom_contexte(ctx['id']):
+                                if storage.delete_custom_contexte(ctx['id']):
                                     st.success("Contexte supprimé !")
                                     st.rerun()
                     else:
@@ -1416,13 +1513,13 @@ def render_lettre_motivation():
         
         if st.button("💾 Sauvegarder ce contexte", type="primary"):
             if new_label and new_texte:
-                if supabase.enabled:
+                if storage.enabled:
                     # Générer une clé unique
                     import re
                     cle = re.sub(r'[^a-z0-9_]', '_', new_label.lower().replace(' ', '_'))[:30]
                     cle = f"custom_{cle}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
                     
-                    result = supabase.save_custom_contexte(
+                    result = storage.save_custom_contexte(
                         cle=cle,
                         label=new_label,
                         categorie=new_categorie,
@@ -1466,7 +1563,8 @@ def render_lettre_motivation():
         )
     
     # Bouton de génération
-    if st.button("✨ Générer la lettre", type="primary", use_container_width=True):
+    regenerer = st.session_state.pop("lettre_regenerer", False)
+    if st.button("✨ Générer la lettre", type="primary", use_container_width=True) or regenerer:
         if offre_text and len(offre_text.strip()) > 50:
             st.session_state.offre_actuelle = offre_text
             
@@ -1511,9 +1609,10 @@ INSTRUCTIONS IMPORTANTES :
                 )
                 
                 result = llm.generate(
-                    prompt=prompt,
+                    prompt=split_cacheable_prompt(prompt),
                     system_prompt=SYSTEM_PROMPT_LETTRE,
-                    max_tokens=8096
+                    max_tokens=8096,
+                    use_cache=use_llm_cache("lettre")
                 )
                 
                 st.session_state.lettre_motivation = result
@@ -1556,8 +1655,13 @@ INSTRUCTIONS IMPORTANTES :
                 except Exception:
                     pass
             with col3:
-                if st.button("🔄 Regénérer", use_container_width=True):
-                    st.rerun()
+                # Bouton affiché dans le bloc de génération : le rerun qu'il déclenche ne
+                # repasse pas par ici, on relance donc la génération via un callback
+                st.button(
+                    "🔄 Regénérer",
+                    use_container_width=True,
+                    on_click=lambda: st.session_state.update(lettre_regenerer=True)
+                )
         else:
             st.warning("⚠️ Merci de coller une offre d'emploi valide (au moins 50 caractères)")
 
@@ -1626,9 +1730,10 @@ def render_preparation_entretien():
                     prompt += f"\n\nPoints spécifiques à préparer :\n{points_preparation}"
                 
                 result = llm.generate(
-                    prompt=prompt,
+                    prompt=split_cacheable_prompt(prompt),
                     system_prompt=SYSTEM_PROMPT_ENTRETIEN,
-                    max_tokens=6000
+                    max_tokens=6000,
+                    use_cache=use_llm_cache("entretien")
                 )
                 
                 st.session_state.preparation_entretien = result
@@ -1653,7 +1758,7 @@ def render_preparation_entretien():
 
 def save_chat_history():
     """Sauvegarde l'historique du chat (Supabase + local fallback)."""
-    supabase = get_supabase_client()
+    storage = get_storage()
     
     # Note: Avec Supabase, on sauvegarde message par message
     # Cette fonction est conservée pour le fallback local
@@ -1664,37 +1769,56 @@ def save_chat_history():
         json.dump({
             'messages': st.session_state.chat_messages,
             'uploaded_docs': st.session_state.get('chat_uploaded_docs', []),
+            'synopsis': st.session_state.get('chat_synopsis', ''),
+            'synopsis_upto': st.session_state.get('chat_synopsis_upto', 0),
             'last_updated': datetime.now().isoformat()
         }, f, ensure_ascii=False, indent=2)
 
 
-def save_chat_message_to_db(role: str, content: str):
-    """Sauvegarde un seul message dans Supabase."""
-    supabase = get_supabase_client()
-    if supabase.enabled:
-        supabase.save_chat_message(role=role, content=content)
+def save_chat_message_to_db(message: dict):
+    """Sauvegarde un seul message dans la base et note sa date d'enregistrement (created_at)."""
+    storage = get_storage()
+    if storage.enabled:
+        row = storage.save_chat_message(role=message["role"], content=message["content"])
+        if row:
+            message["created_at"] = row["created_at"]
+
+
+def save_chat_synopsis_to_db():
+    """
+    Enregistre le synopsis dans la base, avec la date du dernier message résumé.
+    
+    La date (et non la position du message) permet de retrouver les messages
+    couverts quel que soit l'historique rechargé (limite, autre machine).
+    """
+    storage = get_storage()
+    upto = st.session_state.chat_synopsis_upto
+    if storage.enabled and upto > 0:
+        last_summarized = st.session_state.chat_messages[upto - 1]
+        if last_summarized.get("created_at"):
+            storage.save_chat_synopsis(st.session_state.chat_synopsis, last_summarized["created_at"])
 
 
 def save_chat_document_to_db(filename: str, content: str):
     """Sauvegarde un document dans Supabase."""
-    supabase = get_supabase_client()
-    if supabase.enabled:
-        supabase.save_chat_document(filename=filename, content=content)
+    storage = get_storage()
+    if storage.enabled:
+        storage.save_chat_document(filename=filename, content=content)
 
 
 def load_chat_history():
     """Charge l'historique du chat (Supabase + local fallback)."""
-    supabase = get_supabase_client()
+    storage = get_storage()
     
     # Essayer Supabase d'abord
-    if supabase.enabled:
-        messages = supabase.get_chat_messages(limit=100)
-        docs = supabase.get_chat_documents()
+    if storage.enabled:
+        messages = storage.get_chat_messages(limit=100)
+        docs = storage.get_chat_documents()
         
         if messages or docs:
             # Convertir au format attendu
             formatted_messages = [
-                {"role": m["role"], "content": m["content"]}
+                {"role": m["role"], "content": m["content"], "created_at": m["created_at"]}
                 for m in messages
             ]
             formatted_docs = [
@@ -1712,12 +1836,77 @@ def load_chat_history():
     return [], []
 
 
+def load_chat_synopsis(messages: list):
+    """
+    Charge le synopsis des anciens échanges et le nombre de messages chargés qu'il couvre.
+    
+    Args:
+        messages: Historique chargé par load_chat_history
+        
+    Returns:
+        Tuple (synopsis, nombre de messages en tête de l'historique déjà résumés)
+    """
+    storage = get_storage()
+    
+    # Historique venant de la base : le synopsis couvre les messages jusqu'à last_message_at
+    if storage.enabled and any(m.get("created_at") for m in messages):
+        saved = storage.get_chat_synopsis()
+        if not saved:
+            return '', 0
+        last_summarized = datetime.fromisoformat(saved["last_message_at"])
+        upto = sum(
+            1 for m in messages
+            if m.get("created_at") and datetime.fromisoformat(m["created_at"]) <= last_summarized
+        )
+        return saved["synopsis"], upto
+    
+    # Fallback local : le fichier contient l'historique complet, la position suffit
+    chat_file = Path('data/chat/chat_history.json')
+    if chat_file.exists():
+        with open(chat_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            synopsis_upto = data.get('synopsis_upto', 0)
+            # Un synopsis plus long que l'historique chargé ne lui correspond pas
+            if synopsis_upto <= len(messages):
+                return data.get('synopsis', ''), synopsis_upto
+    return '', 0
+
+
+def get_chat_doc_index() -> DocumentIndex:
+    """Index BM25 des documents du chat, reconstruit quand la liste change."""
+    docs = st.session_state.get('chat_uploaded_docs', [])
+    signature = tuple((d['name'], len(d['content'])) for d in docs)
+    if st.session_state.get('chat_doc_index_signature') != signature:
+        st.session_state.chat_doc_index = DocumentIndex(docs)
+        st.session_state.chat_doc_index_signature = signature
+    return st.session_state.chat_doc_index
+
+
 def clear_chat_from_db():
     """Efface le chat de Supabase."""
-    supabase = get_supabase_client()
-    if supabase.enabled:
-        supabase.clear_chat_messages()
-        supabase.clear_chat_documents()
+    storage = get_storage()
+    if storage.enabled:
+        storage.clear_chat_messages()
+        storage.clear_chat_documents()
+
+
+# Attente maximale d'un rendu PDF avant de proposer l'export HTML à la place
+PDF_EXPORT_TIMEOUT = 120
+
+
+@st.fragment(run_every=1)
+def wait_for_pdf(pdf_job: dict):
+    """
+    Attend un rendu PDF sans bloquer le thread du script.
+    
+    Seul ce fragment est réexécuté chaque seconde ; quand le rendu est
+    terminé (ou a dépassé PDF_EXPORT_TIMEOUT), il relance la page, qui
+    affiche alors le bouton de téléchargement.
+    """
+    elapsed = time.time() - pdf_job['submitted_at']
+    if pdf_job['future'].done() or elapsed > PDF_EXPORT_TIMEOUT:
+        st.rerun()
+    st.caption(f"⏳ Préparation du PDF... ({elapsed:.0f} s)")
 
 
 def render_cv_personnalise():
@@ -1784,7 +1973,7 @@ def render_cv_personnalise():
         with tab2:
             uploaded_file = st.file_uploader("Fichier PDF de l'offre", type=['pdf'], key="cv_perso_pdf")
             if uploaded_file:
-                offre_text = extract_text_from_pdf(uploaded_file)
+                offre_text = extract_text_from_pdf(uploaded_file, max_chars=OFFRE_PDF_MAX_CHARS)
                 st.success("✅ PDF extrait avec succès !")
                 with st.expander("Voir le texte extrait"):
                     st.text(offre_text[:1000] + "..." if len(offre_text) > 1000 else offre_text)
@@ -1794,8 +1983,10 @@ def render_cv_personnalise():
             if st.button("🎨 Générer mon CV personnalisé", type="primary", use_container_width=True):
                 if offre_text and len(offre_text.strip()) > 50:
                     st.session_state.cv_offre_text = offre_text
+                    # Aperçu mis à jour au fil de la génération
+                    preview_placeholder = st.empty()
                     with st.spinner("🔄 Analyse de l'offre et personnalisation du CV..."):
-                        generate_initial_cv(offre_text)
+                        generate_initial_cv(offre_text, preview_placeholder=preview_placeholder)
                     st.rerun()
                 else:
                     st.warning("⚠️ L'offre est trop courte. Colle au moins le descriptif du poste.")
@@ -1924,6 +2115,13 @@ def render_cv_personnalise():
                 if 'cv_density' not in st.session_state:
                     st.session_state.cv_density = recommended_density
                 
+                # Après des modifications, la densité mesurée peut avoir changé
+                if recommended_density != st.session_state.cv_density:
+                    if st.button(f"📏 Ajuster à 1 page (densité {recommended_density})", use_container_width=True):
+                        st.session_state.cv_density = recommended_density
+                        st.session_state.cv_html_preview = render_template(cv_data, density=recommended_density)
+                        st.rerun()
+                
                 # Slider de densité
                 density = st.slider(
                     "Densité du CV",
@@ -1976,28 +2174,37 @@ def render_cv_personnalise():
                 )
             
             with dl_col2:
-                # Essayer weasyprint, sinon proposer une alternative
+                # Rendu PDF dans le pool de processus, une seule fois par version du HTML
                 pdf_generated = False
+                pdf_pending = False
                 try:
-                    from weasyprint import HTML
-                    import io
-                    
-                    pdf_buffer = io.BytesIO()
-                    HTML(string=html_for_download).write_pdf(pdf_buffer)
-                    pdf_buffer.seek(0)
+                    pdf_job = st.session_state.get('cv_pdf_job')
+                    if not pdf_job or pdf_job['html'] != html_for_download:
+                        pdf_job = {
+                            'html': html_for_download,
+                            'future': submit_cv_pdf(html_for_download),
+                            'submitted_at': time.time()
+                        }
+                        st.session_state.cv_pdf_job = pdf_job
                     
-                    st.download_button(
-                        "📑 Télécharger PDF",
-                        data=pdf_buffer,
-                        file_name=f"CV_Valerie_v{st.session_state.cv_version}_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    pdf_generated = True
+                    if pdf_job['future'].done():
+                        pdf_bytes = pdf_job['future'].result()
+                        st.download_button(
+                            "📑 Télécharger PDF",
+                            data=pdf_bytes,
+                            file_name=f"CV_Valerie_v{st.session_state.cv_version}_{datetime.now().strftime('%Y%m%d')}.pdf",
+                            mime="application/pdf",
+                            use_container_width=True
+                        )
+                        pdf_generated = True
+                    elif time.time() - pdf_job['submitted_at'] <= PDF_EXPORT_TIMEOUT:
+                        # Le reste de la page s'affiche pendant le rendu
+                        wait_for_pdf(pdf_job)
+                        pdf_pending = True
                 except Exception as e:
                     pass
                 
-                if not pdf_generated:
+                if not pdf_generated and not pdf_pending:
                     st.info("💡 **Pour obtenir un PDF:** Télécharge le HTML, ouvre-le dans ton navigateur, puis Imprimer → Enregistrer en PDF")
             
             st.markdown("---")
@@ -2270,11 +2477,27 @@ def render_cv_personnalise():
                     st.info("Génère d'abord un CV pour pouvoir l'éditer manuellement.")
 
 
-def generate_initial_cv(offre_text: str):
-    """Génère la première version du CV adapté."""
+def build_initial_cv_data(customizations: dict) -> dict:
+    """Applique les personnalisations (éventuellement partielles) au CV de base."""
+    from utils.cv_generator import VALERIE_DATA_BASE, adapt_cv_for_offer
+    
+    cv_data = VALERIE_DATA_BASE.copy()
+    cv_data.update(adapt_cv_for_offer({}, customizations))
+    return cv_data
+
+
+def generate_initial_cv(offre_text: str, preview_placeholder=None):
+    """
+    Génère la première version du CV adapté.
+    
+    Args:
+        offre_text: Texte de l'offre d'emploi
+        preview_placeholder: st.empty() optionnel, mis à jour avec l'aperçu
+            du CV à chaque champ reçu (accroche, qualités, compétences...)
+    """
     try:
-        import json
-        from utils.cv_generator import VALERIE_DATA_BASE, render_template, get_density_recommendation
+        from utils.cv_generator import render_template, get_density_recommendation
+        import streamlit.components.v1 as components
         
         llm = get_llm()
         
@@ -2283,28 +2506,33 @@ def generate_initial_cv(offre_text: str):
             cv=CV_TEXTE_COMPLET
         )
         
-        result = llm.generate(
-            prompt=prompt,
+        # Sortie structurée en streaming : chaque champ validé arrive dès qu'il est complet
+        customizations = {}
+        for field, value in llm.generate_structured_stream(
+            prompt=split_cacheable_prompt(prompt),
+            tool=CV_ADAPTATION_TOOL,
             system_prompt=SYSTEM_PROMPT_CV,
-            max_tokens=8000
-        )
+            max_tokens=8000,
+            use_cache=use_llm_cache("cv_personnalise")
+        ):
+            customizations[field] = value
+            
+            # Re-rendre l'aperçu uniquement pour les champs visibles sur le CV
+            if preview_placeholder is not None and field in ("accroche", "qualites", "competences_prioritaires"):
+                partial_data = build_initial_cv_data(customizations)
+                _, partial_density, _ = get_density_recommendation(partial_data, measure=False)
+                with preview_placeholder.container():
+                    components.html(
+                        render_template(partial_data, density=partial_density),
+                        height=700,
+                        scrolling=True
+                    )
         
-        # Parser le JSON
-        json_match = re.search(r'```json\s*(.*?)\s*```', result, re.DOTALL)
-        json_str = json_match.group(1) if json_match else result
-        customizations = json.loads(json_str)
+        if not customizations:
+            st.warning("⚠️ Aucune personnalisation reçue : le CV de base est affiché.")
         
         # Appliquer les personnalisations
-        cv_data = VALERIE_DATA_BASE.copy()
-        
-        if "accroche" in customizations:
-            cv_data["accroche"] = customizations["accroche"]
-        if "qualites" in customizations:
-            cv_data["qualites"] = customizations["qualites"][:4]
-        if "competences_prioritaires" in customizations:
-            prioritaires = customizations["competences_prioritaires"]
-            autres = [c for c in VALERIE_DATA_BASE["competences"] if c not in prioritaires]
-            cv_data["competences"] = prioritaires[:5] + autres[:5]
+        cv_data = build_initial_cv_data(customizations)
         
         # Calculer la densité recommandée automatiquement
         preset_name, recommended_density, _ = get_density_recommendation(cv_data)
@@ -2358,17 +2586,15 @@ def apply_cv_feedback(feedback: str):
             demande=feedback
         )
         
-        result = llm.generate(
-            prompt=prompt,
+        # Sortie structurée : seules les sections modifiées sont renvoyées
+        new_data = llm.generate_structured(
+            prompt=split_cacheable_prompt(prompt, marker="<cv_donnees_actuelles>"),
+            tool=CV_MODIFICATION_TOOL,
             system_prompt=SYSTEM_PROMPT_CV,
-            max_tokens=8000
+            max_tokens=8000,
+            use_cache=use_llm_cache("cv_feedback")
         )
         
-        # Parser le JSON
-        json_match = re.search(r'```json\s*(.*?)\s*```', result, re.DOTALL)
-        json_str = json_match.group(1) if json_match else result
-        new_data = json.loads(json_str)
-        
         # Appliquer TOUTES les modifications au cv_data
         if "accroche" in new_data:
             cv_data["accroche"] = new_data["accroche"]
@@ -2420,8 +2646,6 @@ def apply_cv_feedback(feedback: str):
         st.session_state.cv_customizations = new_customizations
         st.session_state.cv_current_data = cv_data
         
-    except json.JSONDecodeError as e:
-        st.error("❌ Erreur de parsing. Réessaie avec une demande plus simple.")
     except Exception as e:
         st.error(f"❌ Erreur: {str(e)}")
 
@@ -2509,7 +2733,7 @@ def apply_full_manual_edits(
 def save_cv_to_supabase(titre: str = None, entreprise: str = None, candidature_id: str = None, create_candidature: bool = False):
     """Sauvegarde le CV personnalisé actuel dans Supabase."""
     try:
-        supabase = get_supabase_client()
+        storage = get_storage()
         
         offre_text = st.session_state.get('cv_offre_text', '')
         customizations = st.session_state.get('cv_customizations', {})
@@ -2525,7 +2749,7 @@ def save_cv_to_supabase(titre: str = None, entreprise: str = None, candidature_i
         
         # Créer une nouvelle candidature si demandé
         if create_candidature:
-            candidature_result = supabase.save_candidature(
+            candidature_result = storage.save_candidature(
                 titre_poste=titre,
                 entreprise=entreprise,
                 offre_texte=offre_text,
@@ -2537,7 +2761,7 @@ def save_cv_to_supabase(titre: str = None, entreprise: str = None, candidature_i
                 st.info(f"📋 Nouvelle candidature créée : {titre}")
         
         # Sauvegarder le CV
-        result = supabase.save_cv_personnalise(
+        result = storage.save_cv_personnalise(
             titre_offre=titre,
             entreprise=entreprise,
             offre_texte=offre_text,
@@ -2563,11 +2787,15 @@ def save_cv_to_supabase(titre: str = None, entreprise: str = None, candidature_i
 def render_saved_cvs():
     """Affiche les CV personnalisés sauvegardés."""
     try:
-        supabase = get_supabase_client()
-        cvs = supabase.get_cv_personnalises(limit=10)
+        storage = get_storage()
+        cvs, next_cursor = storage.get_cv_personnalises_page(
+            limit=SAVED_CVS_PAGE_SIZE,
+            cursor=get_page_cursor("saved_cvs")
+        )
         
         if not cvs:
             st.info("Aucun CV sauvegardé pour le moment")
+            render_page_controls("saved_cvs", None)
             return
         
         for cv in cvs:
@@ -2584,16 +2812,19 @@ def render_saved_cvs():
             
             with col2:
                 if st.button("📂 Charger", key=f"load_cv_{cv['id']}", use_container_width=True):
-                    load_saved_cv(cv)
+                    # La liste n'a que les en-têtes : charger le HTML et les personnalisations
+                    load_saved_cv({**cv, **(storage.get_cv_details(cv['id']) or {})})
                     st.rerun()
             
             with col3:
                 if st.button("🗑️", key=f"del_cv_{cv['id']}", use_container_width=True):
-                    supabase.delete_cv_personnalise(cv['id'])
+                    storage.delete_cv_personnalise(cv['id'])
                     st.rerun()
             
             st.markdown("---")
-            
+        
+        render_page_controls("saved_cvs", next_cursor)
+        
     except Exception as e:
         st.error(f"Erreur: {e}")
 
@@ -2737,7 +2968,7 @@ def render_linkedin():
                     )
                     
                     result = client.generate(
-                        prompt=prompt,
+                        prompt=split_cacheable_prompt(prompt, marker="<sujet>"),
                         system_prompt=SYSTEM_PROMPT_LINKEDIN,
                         max_tokens=3000
                     )
@@ -2777,11 +3008,11 @@ def render_linkedin():
                 st.rerun()
         with col3:
             if st.button("💾 Sauvegarder", use_container_width=True):
-                supabase = get_supabase_client()
+                storage = get_storage()
                 
                 # Sauvegarder dans Supabase si disponible
-                if supabase.enabled:
-                    result = supabase.save_linkedin_post(
+                if storage.enabled:
+                    result = storage.save_linkedin_post(
                         sujet=sujet,
                         contenu=st.session_state.linkedin_result,
                         tone=tone
@@ -2803,10 +3034,14 @@ def render_linkedin():
     
     # Historique des posts (depuis Supabase ou session)
     st.markdown("---")
-    supabase = get_supabase_client()
+    storage = get_storage()
     
-    if supabase.enabled:
-        saved_posts = supabase.get_linkedin_posts(limit=10)
+    next_cursor = None
+    if storage.enabled:
+        saved_posts, next_cursor = storage.get_linkedin_posts_page(
+            limit=LINKEDIN_POSTS_PAGE_SIZE,
+            cursor=get_page_cursor("linkedin_posts")
+        )
     else:
         saved_posts = st.session_state.get('linkedin_posts', [])
     
@@ -2822,13 +3057,18 @@ def render_linkedin():
                     st.markdown(post.get('contenu', '')[:300] + "..." if len(post.get('contenu', '')) > 300 else post.get('contenu', ''))
                     
                     # Bouton pour marquer comme publié
-                    if supabase.enabled and not post.get('publie') and post.get('id'):
+                    if storage.enabled and not post.get('publie') and post.get('id'):
                         if st.button(f"✅ Marquer comme publié", key=f"publish_{post.get('id')}"):
-                            if supabase.mark_post_published(post.get('id')):
+                            if storage.mark_post_published(post.get('id')):
                                 st.success("Marqué comme publié !")
                                 st.rerun()
                 
                 st.markdown("---")
+            
+            render_page_controls("linkedin_posts", next_cursor)
+    else:
+        # Page vide (ex: page suivante revenue vide) : garder le retour en arrière
+        render_page_controls("linkedin_posts", None)
 
 
 def render_coach():
@@ -2842,10 +3082,16 @@ def render_coach():
         if loaded_messages:
             st.session_state.chat_messages = loaded_messages
             st.session_state.chat_uploaded_docs = loaded_docs
+            synopsis, synopsis_upto = load_chat_synopsis(loaded_messages)
+            st.session_state.chat_synopsis = synopsis
+            st.session_state.chat_synopsis_upto = synopsis_upto
         st.session_state.chat_initialized = True
     
     if 'chat_uploaded_docs' not in st.session_state:
         st.session_state.chat_uploaded_docs = []
+    if 'chat_synopsis' not in st.session_state:
+        st.session_state.chat_synopsis = ""
+        st.session_state.chat_synopsis_upto = 0
     
     # Layout en 2 colonnes : chat principal + panneau latéral
     col_chat, col_docs = st.columns([3, 1])
@@ -2863,18 +3109,18 @@ def render_coach():
         
         if uploaded_pdf:
             # Extraire le texte du PDF
-            pdf_text = extract_text_from_pdf(uploaded_pdf)
+            pdf_text = extract_text_from_pdf(uploaded_pdf, max_chars=CHAT_DOC_MAX_CHARS)
             if pdf_text and len(pdf_text) > 50:
                 doc_info = {
                     'name': uploaded_pdf.name,
-                    'content': pdf_text[:10000],  # Limiter la taille
+                    'content': pdf_text,  # Texte complet, indexé par morceaux
                     'date': datetime.now().strftime('%H:%M')
                 }
                 # Éviter les doublons
                 if not any(d['name'] == doc_info['name'] for d in st.session_state.chat_uploaded_docs):
                     st.session_state.chat_uploaded_docs.append(doc_info)
                     # Sauvegarder dans Supabase + local
-                    save_chat_document_to_db(uploaded_pdf.name, pdf_text[:10000])
+                    save_chat_document_to_db(uploaded_pdf.name, pdf_text)
                     save_chat_history()
                     st.success(f"✅ {uploaded_pdf.name} ajouté !")
         
@@ -2906,10 +3152,10 @@ def render_coach():
         
         for suggestion in suggestions:
             if st.button(suggestion, key=f"sugg_{suggestion[:10]}", use_container_width=True):
-                st.session_state.chat_messages.append({
-                    "role": "user",
-                    "content": suggestion
-                })
+                message = {"role": "user", "content": suggestion}
+                st.session_state.chat_messages.append(message)
+                save_chat_message_to_db(message)
+                save_chat_history()
                 st.rerun()
     
     with col_chat:
@@ -2943,25 +3189,45 @@ def render_coach():
         if st.session_state.chat_messages and st.session_state.chat_messages[-1]["role"] == "user":
             llm = get_llm()
             
-            # Construire le contexte avec les documents uploadés
-            docs_context = ""
-            if st.session_state.chat_uploaded_docs:
-                docs_context = "\n\n--- DOCUMENTS FOURNIS PAR VALÉRIE ---\n"
-                for doc in st.session_state.chat_uploaded_docs:
-                    docs_context += f"\n📄 {doc['name']}:\n{doc['content'][:5000]}\n"
-                docs_context += "\n--- FIN DES DOCUMENTS ---\n"
-            
-            # Construire l'historique pour le contexte
-            messages = []
-            for msg in st.session_state.chat_messages[-12:]:  # Garder les 12 derniers
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+            # Seuls les passages des documents pertinents pour la question sont envoyés
+            excerpts = get_chat_doc_index().retrieve_excerpts(
+                st.session_state.chat_messages[-1]["content"]
+            )
             
-            # Générer la réponse en streaming
-            system = SYSTEM_PROMPT_COACH + f"\n\nCV de Valérie :\n{CV_TEXTE_COMPLET}" + docs_context
+            # Remplir le budget de tokens : consignes + CV, derniers échanges,
+            # extraits de documents, puis échanges plus anciens
+            context = build_coach_context(
+                st.session_state.chat_messages,
+                SYSTEM_PROMPT_COACH,
+                CV_TEXTE_COMPLET,
+                documents=excerpts,
+                synopsis=st.session_state.chat_synopsis
+            )
+            
+            # Les échanges sortis de la fenêtre sont intégrés au synopsis
+            # (un synopsis plus long peut à son tour faire sortir un échange)
+            while context['first_kept'] > st.session_state.chat_synopsis_upto:
+                upto = st.session_state.chat_synopsis_upto
+                with st.spinner("Je résume nos anciens échanges..."):
+                    st.session_state.chat_synopsis = update_synopsis(
+                        llm,
+                        st.session_state.chat_synopsis,
+                        st.session_state.chat_messages[upto:context['first_kept']],
+                        PROMPT_RESUME_CONVERSATION
+                    )
+                st.session_state.chat_synopsis_upto = context['first_kept']
+                save_chat_synopsis_to_db()
+                context = build_coach_context(
+                    st.session_state.chat_messages,
+                    SYSTEM_PROMPT_COACH,
+                    CV_TEXTE_COMPLET,
+                    documents=excerpts,
+                    synopsis=st.session_state.chat_synopsis
+                )
+            messages = context['messages']
+            system = context['system']
             
+            # Générer la réponse en streaming
             with st.chat_message("assistant", avatar="🤖"):
                 response_placeholder = st.empty()
                 full_response = ""
@@ -2978,12 +3244,10 @@ def render_coach():
                 response_placeholder.markdown(full_response)
             
             # Sauvegarder la réponse
-            st.session_state.chat_messages.append({
-                "role": "assistant",
-                "content": full_response
-            })
-            # Sauvegarder dans Supabase + local
-            save_chat_message_to_db("assistant", full_response)
+            message = {"role": "assistant", "content": full_response}
+            st.session_state.chat_messages.append(message)
+            # Sauvegarder dans la base + local
+            save_chat_message_to_db(message)
             save_chat_history()
             st.rerun()
         
@@ -2994,12 +3258,10 @@ def render_coach():
         user_input = st.chat_input("Pose ta question ici...", key="chat_input_main")
         
         if user_input:
-            st.session_state.chat_messages.append({
-                "role": "user",
-                "content": user_input
-            })
-            # Sauvegarder dans Supabase + local
-            save_chat_message_to_db("user", user_input)
+            message = {"role": "user", "content": user_input}
+            st.session_state.chat_messages.append(message)
+            # Sauvegarder dans la base + local
+            save_chat_message_to_db(message)
             save_chat_history()
             st.rerun()
         
@@ -3010,6 +3272,8 @@ def render_coach():
                 if st.button("🗑️ Effacer le chat", use_container_width=True):
                     st.session_state.chat_messages = []
                     st.session_state.chat_uploaded_docs = []
+                    st.session_state.chat_synopsis = ""
+                    st.session_state.chat_synopsis_upto = 0
                     # Effacer de Supabase + local
                     clear_chat_from_db()
                     save_chat_history()
@@ -3033,6 +3297,32 @@ def render_coach():
                 st.markdown(f"📎 {len(st.session_state.chat_uploaded_docs)} doc(s)")
 
 
+def get_candidature_details(storage, cand: dict):
+    """
+    Textes d'une candidature (CV, lettre, préparation d'entretien).
+    
+    La liste ne charge que les en-têtes : les textes d'une candidature en base
+    ne sont récupérés qu'après un clic sur « Charger le contenu ». Les
+    candidatures des fichiers JSON locaux sont déjà complètes.
+    
+    Returns:
+        Dict des textes, ou None s'ils n'ont pas encore été demandés
+    """
+    cand_id = cand.get("id")
+    if not storage.enabled or not cand_id:
+        return cand
+    if not st.session_state.get(f"cand_details_{cand_id}"):
+        return None
+    return storage.get_candidature_details(cand_id) or {}
+
+
+def render_load_details_button(cand_id, tab: str):
+    """Bouton de chargement des textes d'une candidature (voir get_candidature_details)."""
+    if st.button("📥 Charger le contenu", key=f"load_details_{tab}_{cand_id}"):
+        st.session_state[f"cand_details_{cand_id}"] = True
+        st.rerun()
+
+
 def render_historique():
     """Page d'historique des candidatures avec tracking et dashboard."""
     render_header()
@@ -3057,14 +3347,14 @@ def render_historique():
         **💡 Astuce :** Les CV personnalisés liés à une candidature apparaissent dans l'onglet CV de chaque candidature.
         """)
     
-    supabase = get_supabase_client()
+    storage = get_storage()
     
     # =========================================================================
     # DASHBOARD STATISTIQUES
     # =========================================================================
     
-    if supabase.enabled:
-        stats = supabase.get_candidatures_stats()
+    if storage.enabled:
+        stats = storage.get_candidatures_stats()
         
         st.markdown("### 📊 Dashboard")
         
@@ -3090,7 +3380,7 @@ def render_historique():
                 """, unsafe_allow_html=True)
         
         # Rappels à venir
-        reminders = supabase.get_upcoming_reminders(days=7)
+        reminders = storage.get_upcoming_reminders(days=7)
         if reminders:
             st.markdown("### ⏰ Rappels à venir (7 jours)")
             for reminder in reminders:
@@ -3104,17 +3394,6 @@ def render_historique():
     # LISTE DES CANDIDATURES
     # =========================================================================
     
-    # Charger les candidatures
-    if supabase.enabled:
-        candidatures = supabase.get_candidatures(limit=50)
-    else:
-        candidatures = load_historique()
-    
-    if not candidatures:
-        st.info("📭 Aucune candidature sauvegardée pour le moment.")
-        st.markdown("Utilise les outils de génération (CV, lettre, etc.) puis sauvegarde tes candidatures !")
-        return
-    
     # Filtres
     col1, col2 = st.columns([1, 3])
     with col1:
@@ -3131,11 +3410,47 @@ def render_historique():
             }.get(x, x)
         )
     
-    # Filtrer si nécessaire
-    if filtre_statut != "Tous":
-        candidatures = [c for c in candidatures if c.get("statut") == filtre_statut]
+    # Charger la page de candidatures (filtre appliqué par la base)
+    next_cursor = None
+    if storage.enabled:
+        candidatures, next_cursor = storage.get_candidatures_page(
+            limit=HISTORIQUE_PAGE_SIZE,
+            cursor=get_page_cursor("historique", reset_key=filtre_statut),
+            statut=None if filtre_statut == "Tous" else filtre_statut
+        )
+    else:
+        candidatures = load_historique()
+        if filtre_statut != "Tous":
+            candidatures = [c for c in candidatures if c.get("statut") == filtre_statut]
     
-    st.markdown(f"### 📁 {len(candidatures)} candidature(s)")
+    if not candidatures:
+        if filtre_statut != "Tous":
+            st.info("📭 Aucune candidature avec ce statut.")
+        else:
+            st.info("📭 Aucune candidature sauvegardée pour le moment.")
+            st.markdown("Utilise les outils de génération (CV, lettre, etc.) puis sauvegarde tes candidatures !")
+        # Page vide (ex: dernière ligne d'une page supprimée) : garder le retour en arrière
+        render_page_controls("historique", None)
+        return
+    
+    # Nombre total (toutes pages) d'après les statistiques, pas la taille de la page
+    if storage.enabled:
+        stats_key = "total" if filtre_statut == "Tous" else STATS_KEYS.get(filtre_statut)
+        total = stats.get(stats_key, len(candidatures))
+    else:
+        total = len(candidatures)
+    st.markdown(f"### 📁 {total} candidature(s)")
+    
+    # Données liées de toutes les candidatures affichées : une requête par table
+    # au lieu de deux requêtes par candidature
+    events_by_cand = {}
+    cvs_by_cand = {}
+    templates = []
+    if storage.enabled:
+        cand_ids = [c["id"] for c in candidatures if c.get("id")]
+        events_by_cand = storage.get_events_for_candidatures(cand_ids)
+        cvs_by_cand = storage.get_cvs_for_candidatures(cand_ids)
+        templates = storage.get_email_templates()
     
     for cand in candidatures:
         cand_id = cand.get("id")
@@ -3156,6 +3471,9 @@ def render_historique():
         
         with st.expander(f"**{titre}** - {entreprise} | {badge_text} | {date_creation}"):
             
+            # Textes de la candidature (CV, lettre, entretien) : chargés à la demande
+            details = get_candidature_details(storage, cand)
+            
             # Onglets de la candidature
             tabs = st.tabs(["📊 Suivi", "📄 CV", "✉️ Lettre", "🎤 Entretien", "✉️ Emails"])
             
@@ -3173,9 +3491,9 @@ def render_historique():
                         format_func=lambda x: statut_badges.get(x, (x, ""))[0]
                     )
                     
-                    if new_statut != statut and supabase.enabled:
+                    if new_statut != statut and storage.enabled:
                         if st.button("💾 Mettre à jour", key=f"update_statut_{cand_id}"):
-                            if supabase.update_candidature_statut(cand_id, new_statut):
+                            if storage.update_candidature_statut(cand_id, new_statut):
                                 st.success("✅ Statut mis à jour !")
                                 st.rerun()
                 
@@ -3212,9 +3530,9 @@ def render_historique():
                             rappel_date = st.date_input("Date de rappel", key=f"rappel_date_{cand_id}")
                     
                     if st.button("➕ Ajouter l'événement", key=f"add_event_{cand_id}"):
-                        if supabase.enabled:
+                        if storage.enabled:
                             rappel_iso = rappel_date.isoformat() if rappel and 'rappel_date' in dir() else None
-                            result = supabase.add_candidature_event(
+                            result = storage.add_candidature_event(
                                 candidature_id=cand_id,
                                 type_event=event_type,
                                 description=event_desc if event_desc else None,
@@ -3227,8 +3545,8 @@ def render_historique():
                                 st.error("❌ Erreur lors de l'ajout")
                 
                 # Timeline des événements
-                if supabase.enabled and cand_id:
-                    events = supabase.get_candidature_events(cand_id)
+                if storage.enabled and cand_id:
+                    events = events_by_cand.get(cand_id, [])
                     if events:
                         st.markdown("---")
                         st.markdown("**📅 Historique**")
@@ -3248,42 +3566,40 @@ def render_historique():
             # TAB CV
             with tabs[1]:
                 # Afficher les CV personnalisés liés
-                if supabase.enabled and cand_id:
-                    cvs_lies = supabase.get_cvs_for_candidature(cand_id)
+                cvs_lies = cvs_by_cand.get(cand_id, [])
+                
+                if cvs_lies:
+                    st.markdown("**🎨 CV Personnalisés liés:**")
+                    for cv_lie in cvs_lies:
+                        cv_col1, cv_col2, cv_col3 = st.columns([3, 1, 1])
+                        with cv_col1:
+                            st.markdown(f"📄 {cv_lie.get('titre_offre', 'Sans titre')} (v{cv_lie.get('version', 1)})")
+                        with cv_col2:
+                            cv_date = cv_lie.get('created_at', '')[:10] if cv_lie.get('created_at') else ''
+                            st.caption(cv_date)
+                        with cv_col3:
+                            if st.button("👁️", key=f"view_cv_{cv_lie['id']}_{cand_id}"):
+                                st.session_state[f'show_cv_popup_{cv_lie["id"]}'] = True
                     
-                    if cvs_lies:
-                        st.markdown("**🎨 CV Personnalisés liés:**")
-                        for cv_lie in cvs_lies:
-                            cv_col1, cv_col2, cv_col3 = st.columns([3, 1, 1])
-                            with cv_col1:
-                                st.markdown(f"📄 {cv_lie.get('titre_offre', 'Sans titre')} (v{cv_lie.get('version', 1)})")
-                            with cv_col2:
-                                cv_date = cv_lie.get('created_at', '')[:10] if cv_lie.get('created_at') else ''
-                                st.caption(cv_date)
-                            with cv_col3:
-                                if st.button("👁️", key=f"view_cv_{cv_lie['id']}_{cand_id}"):
-                                    # Charger et afficher le CV
-                                    cv_full = supabase.get_cv_personnalise(cv_lie['id'])
-                                    if cv_full and cv_full.get('html_content'):
-                                        st.session_state[f'show_cv_popup_{cv_lie["id"]}'] = True
-                        
-                        # Afficher le popup du CV si demandé
-                        for cv_lie in cvs_lies:
-                            if st.session_state.get(f'show_cv_popup_{cv_lie["id"]}'):
-                                cv_full = supabase.get_cv_personnalise(cv_lie['id'])
-                                if cv_full and cv_full.get('html_content'):
-                                    import streamlit.components.v1 as components
-                                    components.html(cv_full['html_content'], height=600, scrolling=True)
-                                    if st.button("Fermer", key=f"close_cv_{cv_lie['id']}"):
-                                        st.session_state[f'show_cv_popup_{cv_lie["id"]}'] = False
-                                        st.rerun()
-                        
-                        st.markdown("---")
+                    # Afficher le popup du CV si demandé (HTML chargé une fois, puis gardé en mémoire)
+                    for cv_lie in cvs_lies:
+                        if st.session_state.get(f'show_cv_popup_{cv_lie["id"]}'):
+                            cv_full = storage.get_cv_details(cv_lie['id'])
+                            if cv_full and cv_full.get('html_content'):
+                                import streamlit.components.v1 as components
+                                components.html(cv_full['html_content'], height=600, scrolling=True)
+                                if st.button("Fermer", key=f"close_cv_{cv_lie['id']}"):
+                                    st.session_state[f'show_cv_popup_{cv_lie["id"]}'] = False
+                                    st.rerun()
+                    
+                    st.markdown("---")
                 
                 # Afficher aussi le CV texte classique
-                if cand.get('cv_adapte'):
+                if details is None:
+                    render_load_details_button(cand_id, "cv")
+                elif details.get('cv_adapte'):
                     with st.expander("📝 CV texte (ancien format)", expanded=False):
-                        st.markdown(cand['cv_adapte'])
+                        st.markdown(details['cv_adapte'])
                 elif not cvs_lies:
                     st.info("Pas de CV généré pour cette candidature")
                     if st.button("🎨 Créer un CV personnalisé", key=f"create_cv_{cand_id}"):
@@ -3292,15 +3608,19 @@ def render_historique():
             
             # TAB LETTRE
             with tabs[2]:
-                if cand.get('lettre_motivation'):
-                    st.markdown(cand['lettre_motivation'])
+                if details is None:
+                    render_load_details_button(cand_id, "lettre")
+                elif details.get('lettre_motivation'):
+                    st.markdown(details['lettre_motivation'])
                 else:
                     st.info("Pas de lettre générée pour cette candidature")
             
             # TAB ENTRETIEN
             with tabs[3]:
-                if cand.get('preparation_entretien'):
-                    st.markdown(cand['preparation_entretien'])
+                if details is None:
+                    render_load_details_button(cand_id, "entretien")
+                elif details.get('preparation_entretien'):
+                    st.markdown(details['preparation_entretien'])
                 else:
                     st.info("Pas de préparation d'entretien pour cette candidature")
             
@@ -3308,11 +3628,7 @@ def render_historique():
             with tabs[4]:
                 st.markdown("**📧 Générer un email**")
                 
-                # Charger les templates
-                templates = []
-                if supabase.enabled:
-                    templates = supabase.get_email_templates()
-                
+                # Templates chargés une fois pour toute la page
                 if templates:
                     template_choice = st.selectbox(
                         "Choisir un template",
@@ -3355,6 +3671,8 @@ def render_historique():
                             st.text_area("", value=contenu, height=300, key=f"email_result_{cand_id}")
                 else:
                     st.info("Aucun template disponible. Les templates seront disponibles avec Supabase activé.")
+    
+    render_page_controls("historique", next_cursor)
 
 
 # ============================================================================
@@ -21,9 +21,12 @@ from .task_prompts import (
     PROMPT_COACH_CONVERSATION,
     PROMPT_LINKEDIN_POST,
     PROMPT_ADAPTER_CV_TEMPLATE,
-    PROMPT_MODIFIER_CV_COMPLET
+    PROMPT_MODIFIER_CV_COMPLET,
+    PROMPT_RESUME_CONVERSATION
 )
 
+from .cv_schemas import CV_ADAPTATION_TOOL, CV_MODIFICATION_TOOL
+
 __all__ = [
     'SYSTEM_PROMPT_GENERAL',
     'SYSTEM_PROMPT_CV',
@@ -36,5 +39,8 @@ __all__ = [
     'PROMPT_LETTRE_MOTIVATION',
     'PROMPT_PREPARATION_ENTRETIEN',
     'PROMPT_ANALYSE_COMPATIBILITE',
-    'PROMPT_COACH_CONVERSATION'
+    'PROMPT_COACH_CONVERSATION',
+    'PROMPT_RESUME_CONVERSATION',
+    'CV_ADAPTATION_TOOL',
+    'CV_MODIFICATION_TOOL'
 ]
@@ -0,0 +1,99 @@
+"""
+Schémas des sorties structurées (tool use) pour la personnalisation du CV
+"""
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+_EXPERIENCE = {
+    "type": "object",
+    "properties": {
+        "entreprise": {"type": "string"},
+        "poste": {"type": "string"},
+        "dates": {"type": "string"}
+    },
+    "required": ["entreprise", "poste", "dates"]
+}
+
+_STAGE = {
+    "type": "object",
+    "properties": {
+        "lieu": {"type": "string"},
+        "mission": {"type": "string"},
+        "dates": {"type": "string"}
+    },
+    "required": ["lieu", "mission", "dates"]
+}
+
+_BENEVOLAT = {
+    "type": "object",
+    "properties": {
+        "evenement": {"type": "string"},
+        "role": {"type": "string"}
+    },
+    "required": ["evenement", "role"]
+}
+
+_INTERET = {
+    "type": "object",
+    "properties": {
+        "titre": {"type": "string"},
+        "detail": {"type": "string"}
+    },
+    "required": ["titre"]
+}
+
+_ACCROCHE = {
+    "type": "string",
+    "description": "Accroche personnalisée (2-3 phrases max) avec les mots clés en <span class='accroche-highlight'>...</span>"
+}
+
+
+# Première personnalisation du CV à partir d'une offre
+CV_ADAPTATION_TOOL = {
+    "name": "personnaliser_cv",
+    "description": "Enregistre les personnalisations du CV de Valérie pour l'offre d'emploi.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "accroche": _ACCROCHE,
+            "qualites": {**_STRING_LIST, "maxItems": 4, "description": "4 qualités"},
+            "competences_prioritaires": {
+                **_STRING_LIST,
+                "maxItems": 5,
+                "description": "Les 5 compétences les plus pertinentes pour l'offre, de la plus à la moins pertinente"
+            },
+            "mots_cles_offre": _STRING_LIST,
+            "conseil_personnalisation": {
+                "type": "string",
+                "description": "Conseil court sur ce qu'il faut mettre en avant"
+            }
+        },
+        "required": ["accroche", "qualites", "competences_prioritaires", "mots_cles_offre"]
+    }
+}
+
+
+# Modification du CV complet suite à une demande de l'utilisateur
+CV_MODIFICATION_TOOL = {
+    "name": "modifier_cv",
+    "description": "Enregistre le CV de Valérie après application de la modification demandée.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "accroche": _ACCROCHE,
+            "qualites": {**_STRING_LIST, "maxItems": 4},
+            "competences": _STRING_LIST,
+            "experiences": {"type": "array", "items": _EXPERIENCE},
+            "stages": {"type": "array", "items": _STAGE},
+            "benevolat": {"type": "array", "items": _BENEVOLAT},
+            "interets": {"type": "array", "items": _INTERET},
+            "mots_cles_offre": _STRING_LIST,
+            "modification_appliquee": {
+                "type": "string",
+                "description": "Description précise de ce qui a été modifié"
+            },
+            "sections_modifiees": _STRING_LIST
+        },
+        "required": ["modification_appliquee", "sections_modifiees"]
+    }
+}
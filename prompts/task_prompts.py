@@ -2,11 +2,7 @@
 Prompts de tâches spécifiques pour chaque fonctionnalité
 """
 
-PROMPT_ANALYSE_OFFRE = """Analyse cette offre d'emploi et extrais les informations clés :
-
-<offre_emploi>
-{offre}
-</offre_emploi>
+PROMPT_ANALYSE_OFFRE = """Analyse l'offre d'emploi fournie en fin de message et extrais les informations clés.
 
 Fournis une analyse structurée avec :
 
@@ -30,18 +26,18 @@ Fournis une analyse structurée avec :
    - Critères éliminatoires potentiels
 
 5. **AVANTAGES DU POSTE**
-   - Ce qui rend ce poste attractif"""
+   - Ce qui rend ce poste attractif
 
-PROMPT_OPTIMISER_CV = """Tu vas adapter le CV de Valérie pour cette offre d'emploi spécifique.
+<offre_emploi>
+{offre}
+</offre_emploi>"""
+
+PROMPT_OPTIMISER_CV = """Tu vas adapter le CV de Valérie pour l'offre d'emploi fournie en fin de message.
 
 <cv_actuel>
 {cv}
 </cv_actuel>
 
-<offre_emploi>
-{offre}
-</offre_emploi>
-
 ÉTAPE 1 - ANALYSE (dans ta réflexion) :
 - Identifie les compétences clés demandées
 - Repère les correspondances dans le CV de Valérie
@@ -65,20 +61,18 @@ Fournis un CV restructuré et adapté avec :
 ÉTAPE 3 - RECOMMANDATIONS :
 - Ce qui a été mis en avant et pourquoi
 - Points forts de la candidature
-- Conseils supplémentaires"""
+- Conseils supplémentaires
 
-PROMPT_LETTRE_MOTIVATION = """Rédige une lettre de motivation percutante pour Valérie.
+<offre_emploi>
+{offre}
+</offre_emploi>"""
+
+PROMPT_LETTRE_MOTIVATION = """Rédige une lettre de motivation percutante pour Valérie, pour l'offre d'emploi fournie en fin de message.
 
 <cv>
 {cv}
 </cv>
 
-<offre_emploi>
-{offre}
-</offre_emploi>
-
-{contexte_supplementaire}
-
 CONSIGNES :
 1. Accroche qui capte l'attention (PAS "Suite à votre annonce...")
 2. Paragraphe démontrant la valeur ajoutée (avec exemples concrets du CV)
@@ -95,19 +89,19 @@ FOURNIS :
 
 3. **POINTS DE VIGILANCE** :
    - Ce qu'il ne faut pas dire
-   - Formulations à éviter"""
-
-PROMPT_PREPARATION_ENTRETIEN = """Prépare Valérie pour un entretien d'embauche pour ce poste.
-
-<cv>
-{cv}
-</cv>
+   - Formulations à éviter
 
 <offre_emploi>
 {offre}
 </offre_emploi>
 
-Type d'entretien : {type_entretien}
+{contexte_supplementaire}"""
+
+PROMPT_PREPARATION_ENTRETIEN = """Prépare Valérie pour un entretien d'embauche pour le poste décrit en fin de message.
+
+<cv>
+{cv}
+</cv>
 
 FOURNIS :
 
@@ -148,18 +142,20 @@ Pour chaque question :
 Pour chaque point (âge, reconversion, parcours varié) :
 - Reformulation positive
 - Exemple concret qui neutralise l'objection
-- Phrase de transition vers un point fort"""
+- Phrase de transition vers un point fort
 
-PROMPT_ANALYSE_COMPATIBILITE = """Analyse la compatibilité entre le profil de Valérie et cette offre.
+<offre_emploi>
+{offre}
+</offre_emploi>
+
+Type d'entretien : {type_entretien}"""
+
+PROMPT_ANALYSE_COMPATIBILITE = """Analyse la compatibilité entre le profil de Valérie et l'offre fournie en fin de message.
 
 <cv>
 {cv}
 </cv>
 
-<offre_emploi>
-{offre}
-</offre_emploi>
-
 FOURNIS :
 
 ## 1. MATRICE DE COMPATIBILITÉ
@@ -197,75 +193,51 @@ Si candidature recommandée :
 
 ## 5. PLAN D'ACTION
 
-Actions concrètes pour optimiser cette candidature."""
+Actions concrètes pour optimiser cette candidature.
 
-PROMPT_COACH_CONVERSATION = """Tu es le coach emploi de Valérie. Elle te pose cette question :
+<offre_emploi>
+{offre}
+</offre_emploi>"""
 
-<question>
-{question}
-</question>
+PROMPT_COACH_CONVERSATION = """Tu es le coach emploi de Valérie. Elle te pose la question fournie en fin de message.
 
 Contexte de Valérie :
 {cv}
 
-{contexte_supplementaire}
-
 Réponds de manière :
 - Bienveillante mais directe
 - Orientée action
 - Avec des exemples concrets quand pertinent
-- En tutoyant Valérie"""
+- En tutoyant Valérie
 
-PROMPT_ADAPTER_CV_TEMPLATE = """Analyse cette offre d'emploi et propose des personnalisations COMPLÈTES pour le CV de Valérie.
+{contexte_supplementaire}
 
-<offre_emploi>
-{offre}
-</offre_emploi>
+<question>
+{question}
+</question>"""
+
+PROMPT_ADAPTER_CV_TEMPLATE = """Analyse l'offre d'emploi fournie en fin de message et propose des personnalisations COMPLÈTES pour le CV de Valérie.
 
 CV actuel de Valérie :
 {cv}
 
 Tu dois proposer des adaptations PRÉCISES pour personnaliser son CV à cette offre.
 
-FOURNIS TA RÉPONSE AU FORMAT JSON STRICT :
-
-```json
-{{
-    "accroche": "Nouvelle accroche personnalisée pour cette offre (2-3 phrases max, avec des <span class='accroche-highlight'>mots clés</span> en gras)",
-    "qualites": ["Qualité1", "Qualité2", "Qualité3", "Qualité4"],
-    "competences_prioritaires": [
-        "Compétence la plus pertinente pour cette offre",
-        "Deuxième compétence pertinente",
-        "Troisième compétence",
-        "Quatrième compétence",
-        "Cinquième compétence"
-    ],
-    "mots_cles_offre": ["mot1", "mot2", "mot3"],
-    "conseil_personnalisation": "Conseil court sur ce qu'il faut mettre en avant"
-}}
-```
+Enregistre ta réponse en appelant l'outil `personnaliser_cv`.
 
 RÈGLES :
 1. L'accroche doit reprendre les mots-clés de l'offre tout en restant authentique à Valérie
 2. Les qualités doivent être choisies parmi : Déterminée, Engagée, Résiliente, Fédératrice, Polyvalente, Organisée, Proactive, Empathique
 3. Les compétences prioritaires doivent être reformulées si besoin pour matcher l'offre
 4. Limite-toi à 5 compétences prioritaires maximum
-5. RÉPONDS UNIQUEMENT AVEC LE JSON, rien d'autre"""
-
-
-PROMPT_MODIFIER_CV_COMPLET = """Tu es un expert en adaptation de CV. Le CV de Valérie a été personnalisé et l'utilisateur demande une modification.
-
-<cv_donnees_actuelles>
-{cv_data}
-</cv_donnees_actuelles>
+5. N'écris aucun texte en dehors de l'appel à l'outil
 
 <offre_emploi>
 {offre}
-</offre_emploi>
+</offre_emploi>"""
 
-<demande_modification>
-{demande}
-</demande_modification>
+
+PROMPT_MODIFIER_CV_COMPLET = """Tu es un expert en adaptation de CV. Le CV de Valérie a été personnalisé et l'utilisateur demande une modification (données actuelles et demande en fin de message).
 
 Applique la modification demandée. Tu peux modifier N'IMPORTE QUELLE partie du CV si c'est pertinent :
 - Accroche
@@ -276,56 +248,29 @@ Applique la modification demandée. Tu peux modifier N'IMPORTE QUELLE partie du
 - Bénévolat
 - Centres d'intérêt
 
-RÉPONDS UNIQUEMENT AVEC UN JSON VALIDE contenant les champs modifiés :
-
-```json
-{{
-    "accroche": "Accroche modifiée si nécessaire (avec <span class='accroche-highlight'>mots clés</span> en gras)",
-    "qualites": ["Qualité1", "Qualité2", "Qualité3", "Qualité4"],
-    "competences": [
-        "Compétence 1",
-        "Compétence 2",
-        "etc..."
-    ],
-    "experiences": [
-        {{"entreprise": "Nom", "poste": "Intitulé reformulé", "dates": "Dates"}},
-        ...
-    ],
-    "stages": [
-        {{"lieu": "Nom", "mission": "Mission reformulée", "dates": "Dates"}},
-        ...
-    ],
-    "benevolat": [
-        {{"evenement": "Nom", "role": "Rôle reformulé"}},
-        ...
-    ],
-    "interets": [
-        {{"titre": "Titre", "detail": "Détail"}},
-        ...
-    ],
-    "mots_cles_offre": ["mot1", "mot2"],
-    "modification_appliquee": "Description précise de ce qui a été modifié",
-    "sections_modifiees": ["accroche", "competences", "experiences"]
-}}
-```
+Enregistre le résultat en appelant l'outil `modifier_cv` avec UNIQUEMENT les sections modifiées.
 
 RÈGLES :
 1. Ne modifie QUE ce qui est demandé + ce qui est directement lié
-2. Garde les autres sections identiques (copie-les telles quelles)
-3. Pour les expériences, garde TOUTES les expériences mais reformule si demandé
+2. N'envoie pas les sections inchangées : elles sont conservées telles quelles
+3. Une section modifiée doit être renvoyée COMPLÈTE (ex: TOUTES les expériences, reformulées si demandé)
 4. Sois précis dans "modification_appliquee" pour expliquer les changements
-5. RÉPONDS UNIQUEMENT AVEC LE JSON, rien d'autre"""
+5. N'écris aucun texte en dehors de l'appel à l'outil
 
+<offre_emploi>
+{offre}
+</offre_emploi>
 
-PROMPT_LINKEDIN_POST = """Rédige un post LinkedIn pour Valérie sur le sujet suivant :
+<cv_donnees_actuelles>
+{cv_data}
+</cv_donnees_actuelles>
 
-<sujet>
-{sujet}
-</sujet>
+<demande_modification>
+{demande}
+</demande_modification>"""
 
-<contexte>
-{contexte}
-</contexte>
+
+PROMPT_LINKEDIN_POST = """Rédige un post LinkedIn pour Valérie sur le sujet fourni en fin de message.
 
 Profil de Valérie pour contexte :
 {cv}
@@ -352,5 +297,30 @@ FOURNIS :
 
 3. **SUGGESTIONS D'IMAGES** à accompagner le post
 
-4. **MEILLEUR MOMENT POUR PUBLIER** selon le sujet"""
+4. **MEILLEUR MOMENT POUR PUBLIER** selon le sujet
 
+<sujet>
+{sujet}
+</sujet>
+
+<contexte>
+{contexte}
+</contexte>"""
+
+
+PROMPT_RESUME_CONVERSATION = """Tu tiens à jour le résumé d'une conversation entre Valérie et son coach emploi.
+Les échanges les plus anciens sortent du contexte du coach : intègre-les au résumé existant.
+
+CONSIGNES :
+- Conserve les faits utiles pour la suite : offres évoquées, décisions prises, conseils donnés, questions restées ouvertes
+- Supprime les formules de politesse et les répétitions
+- 15 lignes maximum, en puces, au présent
+- Réponds uniquement avec le résumé mis à jour
+
+<resume_actuel>
+{synopsis}
+</resume_actuel>
+
+<nouveaux_echanges>
+{echanges}
+</nouveaux_echanges>"""
@@ -0,0 +1,293 @@
+"""
+Génération de CV adaptés en lot, sans l'interface Streamlit
+
+Usage :
+    python scripts/batch_cv.py offres/                # un fichier .txt/.md/.pdf par offre
+    python scripts/batch_cv.py offres.jsonl           # une offre par ligne {"id", "titre", "texte"}
+    python scripts/batch_cv.py offres/ --concurrency 8 --pdf-workers 4 --output exports/lot
+
+Pour chaque offre : cv.html, cv.pdf et cv.json dans <sortie>/<id>/, puis un
+rapport (rapport.json) avec les durées et les tokens consommés.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Nombre d'appels LLM simultanés par défaut (le limiteur de débit partagé reste le garde-fou)
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+# Taille maximale du texte lu dans une offre en PDF (comme dans l'application)
+OFFRE_PDF_MAX_CHARS = 20000
+
+OFFER_EXTENSIONS = (".txt", ".md", ".pdf")
+
+
+def slugify(text: str) -> str:
+    """Nom de dossier sûr à partir d'un identifiant d'offre."""
+    slug = re.sub(r"[^\w-]+", "-", text.strip().lower()).strip("-")
+    return slug[:60] or "offre"
+
+
+def load_offers(source: Path) -> List[Dict]:
+    """
+    Charge les offres d'un répertoire ou d'un fichier JSONL.
+    
+    Args:
+        source: Répertoire de fichiers .txt/.md/.pdf, ou fichier .jsonl dont
+                chaque ligne contient "texte" (ou "offre"/"text") et
+                optionnellement "id" et "titre"
+                
+    Returns:
+        Liste de dicts {"id", "titre", "texte"} (identifiants uniques)
+    """
+    offers = []
+    
+    if source.is_dir():
+        from utils.pdf_parser import extract_text_from_pdf_path
+        
+        for path in sorted(source.iterdir()):
+            if path.suffix.lower() not in OFFER_EXTENSIONS:
+                continue
+            if path.suffix.lower() == ".pdf":
+                texte = extract_text_from_pdf_path(str(path), max_chars=OFFRE_PDF_MAX_CHARS)
+            else:
+                texte = path.read_text(encoding="utf-8")
+            offers.append({"id": path.stem, "titre": path.stem, "texte": texte})
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                texte = record.get("texte") or record.get("offre") or record.get("text") or ""
+                offer_id = str(record.get("id") or record.get("titre") or f"offre-{line_number}")
+                offers.append({
+                    "id": offer_id,
+                    "titre": record.get("titre", offer_id),
+                    "texte": texte
+                })
+                
+    # Identifiants uniques, utilisables comme noms de dossier
+    seen = set()
+    for offer in offers:
+        slug = base = slugify(offer["id"])
+        suffix = 2
+        while slug in seen:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        seen.add(slug)
+        offer["id"] = slug
+        
+    return offers
+
+
+def customize_for_offer(offer: Dict, cache) -> Dict:
+    """
+    Appel LLM de personnalisation du CV pour une offre (même prompt que
+    generate_initial_cv dans app.py), puis rendu HTML.
+    
+    Un client LLM par offre : ses compteurs d'usage donnent les tokens de
+    l'offre, tout en partageant le pool de connexions et le limiteur de débit.
+    
+    Returns:
+        Dict {"offer", "customizations", "cv_data", "density", "html",
+              "usage", "llm_seconds", "html_seconds"}
+    """
+    from config.valerie_profile import CV_TEXTE_COMPLET
+    from prompts import PROMPT_ADAPTER_CV_TEMPLATE, SYSTEM_PROMPT_CV
+    from prompts.cv_schemas import CV_ADAPTATION_TOOL
+    from utils.cv_generator import (
+        VALERIE_DATA_BASE,
+        adapt_cv_for_offer,
+        get_density_recommendation,
+        render_template
+    )
+    from utils.llm_client import LLMClient, split_cacheable_prompt
+    
+    llm = LLMClient(cache=cache)
+    prompt = PROMPT_ADAPTER_CV_TEMPLATE.format(offre=offer["texte"], cv=CV_TEXTE_COMPLET)
+    
+    start = time.perf_counter()
+    customizations = llm.generate_structured(
+        prompt=split_cacheable_prompt(prompt),
+        tool=CV_ADAPTATION_TOOL,
+        system_prompt=SYSTEM_PROMPT_CV,
+        max_tokens=8000
+    )
+    llm_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    cv_data = VALERIE_DATA_BASE.copy()
+    cv_data.update(adapt_cv_for_offer({}, customizations))
+    _, density, _ = get_density_recommendation(cv_data)
+    html = render_template(cv_data, density=density)
+    html_seconds = time.perf_counter() - start
+    
+    return {
+        "offer": offer,
+        "customizations": customizations,
+        "cv_data": {key: value for key, value in cv_data.items() if key != "photo_url"},
+        "density": density,
+        "html": html,
+        "usage": llm.usage,
+        "llm_seconds": llm_seconds,
+        "html_seconds": html_seconds
+    }
+
+
+def run_batch(offers: List[Dict], output_dir: Path, concurrency: int, with_pdf: bool = True) -> Dict:
+    """
+    Traite toutes les offres : appels LLM en parallèle (threads, au plus
+    `concurrency` en même temps), rendu PDF dans le pool de processus
+    WeasyPrint dès que le HTML d'une offre est prêt.
+    
+    Args:
+        offers: Offres chargées par load_offers
+        output_dir: Répertoire de sortie
+        concurrency: Nombre maximal d'appels LLM simultanés
+        with_pdf: False pour ne produire que le HTML et le JSON
+        
+    Returns:
+        Rapport : totaux et une entrée par offre (durées, tokens, erreur éventuelle)
+    """
+    from utils.cv_generator import submit_cv_pdf
+    from utils.llm_cache import get_llm_cache
+    from utils.llm_client import new_usage_counters
+    
+    def submit_pdf(html: str):
+        """Soumet le rendu PDF et note l'heure de fin (les PDF sont lus après les appels LLM)."""
+        timing = {"submitted": time.perf_counter()}
+        job = submit_cv_pdf(html)
+        job.add_done_callback(lambda _: timing.setdefault("done", time.perf_counter()))
+        return job, timing
+        
+    cache = get_llm_cache()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    entries = {}
+    pdf_jobs = {}
+    batch_start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(customize_for_offer, offer, cache): offer for offer in offers}
+        
+        for future in as_completed(futures):
+            offer = futures[future]
+            entry = {"id": offer["id"], "titre": offer["titre"]}
+            entries[offer["id"]] = entry
+            
+            try:
+                result = future.result()
+            except Exception as e:
+                entry["erreur"] = str(e)
+                print(f"❌ {offer['id']}: {e}")
+                continue
+                
+            offer_dir = output_dir / offer["id"]
+            offer_dir.mkdir(exist_ok=True)
+            (offer_dir / "cv.html").write_text(result["html"], encoding="utf-8")
+            with open(offer_dir / "cv.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "id": offer["id"],
+                    "titre": offer["titre"],
+                    "densite": result["density"],
+                    "personnalisations": result["customizations"],
+                    "cv": result["cv_data"]
+                }, f, ensure_ascii=False, indent=2)
+                
+            entry.update({
+                "densite": result["density"],
+                "llm_secondes": round(result["llm_seconds"], 3),
+                "html_secondes": round(result["html_seconds"], 3),
+                "tokens": result["usage"]
+            })
+            print(f"✅ {offer['id']}: CV personnalisé ({result['llm_seconds']:.1f} s)")
+            
+            if with_pdf:
+                pdf_jobs[offer["id"]] = submit_pdf(result["html"])
+                
+    # Les PDF ont été rendus pendant que les appels LLM suivants tournaient
+    for offer_id, (job, timing) in pdf_jobs.items():
+        entry = entries[offer_id]
+        try:
+            pdf = job.result(timeout=300)
+        except Exception as e:
+            entry["erreur_pdf"] = str(e)
+            print(f"❌ {offer_id}: PDF non généré ({e})")
+            continue
+        (output_dir / offer_id / "cv.pdf").write_bytes(pdf)
+        entry["pdf_secondes"] = round(timing.get("done", time.perf_counter()) - timing["submitted"], 3)
+        
+    ordered = [entries[offer["id"]] for offer in offers]
+    totals = new_usage_counters()
+    for entry in ordered:
+        for key, value in entry.get("tokens", {}).items():
+            totals[key] += value
+            
+    report = {
+        "date": datetime.now().isoformat(),
+        "offres": len(offers),
+        "reussies": sum(1 for entry in ordered if "erreur" not in entry),
+        "pdf_generes": sum(1 for entry in ordered if "pdf_secondes" in entry),
+        "duree_totale_secondes": round(time.perf_counter() - batch_start, 3),
+        "tokens": totals,
+        "details": ordered
+    }
+    with open(output_dir / "rapport.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un CV adapté pour chaque offre d'emploi")
+    parser.add_argument("source", type=Path, help="Répertoire d'offres (.txt/.md/.pdf) ou fichier .jsonl")
+    parser.add_argument("--output", type=Path, default=None, help="Répertoire de sortie (défaut: exports/lot_<date>)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Appels LLM simultanés")
+    parser.add_argument("--pdf-workers", type=int, default=None, help="Processus de rendu PDF (défaut: PDF_RENDER_WORKERS)")
+    parser.add_argument("--no-pdf", action="store_true", help="Ne produire que le HTML et le JSON")
+    args = parser.parse_args()
+    
+    if not args.source.exists():
+        print(f"❌ Source introuvable: {args.source}")
+        sys.exit(1)
+        
+    # Lu à l'import du service de rendu : à fixer avant
+    if args.pdf_workers:
+        os.environ["PDF_RENDER_WORKERS"] = str(args.pdf_workers)
+        
+    output_dir = args.output or (
+        Path(__file__).parent.parent / "exports" / f"lot_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    
+    offers = load_offers(args.source)
+    if not offers:
+        print(f"❌ Aucune offre trouvée dans {args.source}")
+        sys.exit(1)
+    print(f"📊 {len(offers)} offres à traiter ({args.concurrency} appels LLM simultanés)")
+    
+    report = run_batch(offers, output_dir, args.concurrency, with_pdf=not args.no_pdf)
+    
+    tokens = report["tokens"]
+    print(f"\n✅ {report['reussies']}/{report['offres']} CV générés, {report['pdf_generes']} PDF")
+    print(f"⏱️ Durée totale : {report['duree_totale_secondes']:.1f} s")
+    print(f"🔢 Tokens : {tokens['input_tokens']} en entrée "
+          f"(+{tokens['cache_read_input_tokens']} lus en cache), {tokens['output_tokens']} en sortie")
+    print(f"📁 Résultats : {output_dir}")
+    
+    # Arrêter les processus de rendu
+    if not args.no_pdf:
+        from utils.pdf_renderer import get_pdf_render_service
+        get_pdf_render_service().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Micro-benchmark du rendu du CV : moteur compilé vs ancien moteur str.replace / re.sub
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.cv_generator import (
+    TEMPLATE_PATH,
+    VALERIE_DATA_BASE,
+    get_density_values,
+    get_photo_base64,
+    render_template
+)
+
+
+def render_template_legacy(data, density=None):
+    """Ancienne implémentation de render_template, conservée pour comparaison."""
+    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        html = f.read()
+        
+    density_values = get_density_values(density=density, data=data)
+    data["photo_url"] = get_photo_base64(size=density_values["photo_size"])
+    
+    for key, value in density_values.items():
+        html = html.replace(f"{{{{{key}}}}}", str(value))
+        
+    for key, value in data.items():
+        if isinstance(value, str):
+            html = html.replace(f"{{{{{key}}}}}", value)
+            
+    if "qualites" in data:
+        qualites_html = ""
+        for q in data["qualites"]:
+            qualites_html += f'<span class="qualite">{q}</span>\n'
+        html = re.sub(r'\{\{#qualites\}\}.*?\{\{/qualites\}\}', qualites_html, html, flags=re.DOTALL)
+        
+    if "competences" in data:
+        comp_html = ""
+        for c in data["competences"]:
+            comp_html += f'<div class="competence-item">{c}</div>\n'
+        html = re.sub(r'\{\{#competences\}\}.*?\{\{/competences\}\}', comp_html, html, flags=re.DOTALL)
+        
+    if data.get("section_communication") and "competences_com" in data:
+        comp_com_html = ""
+        for c in data["competences_com"]:
+            comp_com_html += f'<div class="competence-item">{c}</div>\n'
+        html = re.sub(r'\{\{#competences_com\}\}.*?\{\{/competences_com\}\}', comp_com_html, html, flags=re.DOTALL)
+        html = html.replace('{{#section_communication}}', '')
+        html = html.replace('{{/section_communication}}', '')
+    else:
+        html = re.sub(r'\{\{#section_communication\}\}.*?\{\{/section_communication\}\}', '', html, flags=re.DOTALL)
+        
+    if "experiences" in data:
+        exp_html = ""
+        for exp in data["experiences"]:
+            exp_html += f'''
+            <div class="experience-item">
+                <div>
+                    <div class="exp-entreprise">{exp["entreprise"]}</div>
+                    <div class="exp-poste">{exp["poste"]}</div>
+                </div>
+                <div class="exp-dates">{exp["dates"]}</div>
+            </div>
+            '''
+        html = re.sub(r'\{\{#experiences\}\}.*?\{\{/experiences\}\}', exp_html, html, flags=re.DOTALL)
+        
+    if "formations" in data:
+        form_html = ""
+        for f in data["formations"]:
+            form_html += f'''
+            <div class="formation-item">
+                <div class="formation-dates">{f["dates"]}</div>
+                <div class="formation-titre">{f["titre"]}</div>
+                <div class="formation-lieu">{f["etablissement"]}</div>
+            </div>
+            '''
+        html = re.sub(r'\{\{#formations\}\}.*?\{\{/formations\}\}', form_html, html, flags=re.DOTALL)
+        
+    if "stages" in data:
+        stages_html = ""
+        for s in data["stages"]:
+            stages_html += f'''
+            <div class="stage-item">
+                <div class="stage-dates">{s["dates"]}</div>
+                <div class="stage-lieu">{s["lieu"]}</div>
+                <div class="stage-mission">{s["mission"]}</div>
+            </div>
+            '''
+        html = re.sub(r'\{\{#stages\}\}.*?\{\{/stages\}\}', stages_html, html, flags=re.DOTALL)
+        
+    if "benevolat" in data:
+        ben_html = ""
+        for b in data["benevolat"]:
+            ben_html += f'''
+            <div class="benevolat-item">
+                <div class="benevolat-event">{b["evenement"]}</div>
+                <div>{b["role"]}</div>
+            </div>
+            '''
+        html = re.sub(r'\{\{#benevolat\}\}.*?\{\{/benevolat\}\}', ben_html, html, flags=re.DOTALL)
+        
+    if "interets" in data:
+        int_html = ""
+        for i in data["interets"]:
+            detail = f" – {i['detail']}" if i.get("detail") else ""
+            int_html += f'''
+            <div class="interet-item">
+                <span class="interet-highlight">{i["titre"]}</span>{detail}
+            </div>
+            '''
+        html = re.sub(r'\{\{#interets\}\}.*?\{\{/interets\}\}', int_html, html, flags=re.DOTALL)
+        
+    return html
+
+
+def bench(fn, runs: int) -> float:
+    """Durée moyenne d'un rendu en millisecondes."""
+    data = VALERIE_DATA_BASE.copy()
+    start = time.perf_counter()
+    for i in range(runs):
+        fn(data, density=i % 101)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main(runs: int = 500):
+    # Vérifier que les deux moteurs produisent exactement le même HTML
+    for density in (None, 0, 30, 60, 100):
+        for section_com in (True, False):
+            data = {**VALERIE_DATA_BASE, "section_communication": section_com}
+            assert render_template(dict(data), density) == render_template_legacy(dict(data), density), \
+                f"Rendus différents (densité={density}, section_communication={section_com})"
+    print("✅ Rendus identiques")
+    
+    legacy = bench(render_template_legacy, runs)
+    compiled = bench(render_template, runs)
+    print(f"Ancien moteur  : {legacy:.3f} ms/rendu")
+    print(f"Moteur compilé : {compiled:.3f} ms/rendu")
+    print(f"Accélération   : x{legacy / compiled:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,10 @@
+-- Statistiques des candidatures calculées par la base (page Historique)
+-- Une ligne par statut : le client ne télécharge plus toutes les candidatures pour les compter.
+
+create or replace view public.candidatures_stats
+with (security_invoker = true) as
+select statut, count(*)::integer as nombre
+from public.candidatures
+group by statut;
+
+grant select on public.candidatures_stats to anon, authenticated;
@@ -0,0 +1,21 @@
+-- Index de la pagination par clé (created_at, id) des listes de l'application
+-- (Historique, CV sauvegardés, historique des posts LinkedIn).
+
+create index if not exists candidatures_created_at_id_idx
+    on public.candidatures (created_at desc, id desc);
+
+create index if not exists candidatures_statut_created_at_id_idx
+    on public.candidatures (statut, created_at desc, id desc);
+
+create index if not exists cv_personnalises_created_at_id_idx
+    on public.cv_personnalises (created_at desc, id desc);
+
+create index if not exists linkedin_posts_created_at_id_idx
+    on public.linkedin_posts (created_at desc, id desc);
+
+-- Chargement groupé des données liées d'une page de candidatures
+create index if not exists candidatures_events_candidature_id_idx
+    on public.candidatures_events (candidature_id, date_event desc);
+
+create index if not exists cv_personnalises_candidature_id_idx
+    on public.cv_personnalises (candidature_id, created_at desc);
@@ -0,0 +1,12 @@
+-- Synopsis des anciens échanges du coach, un par session de chat.
+-- last_message_at : created_at du dernier message de chat_messages couvert par le synopsis
+-- (un index de position ne survit pas à un rechargement partiel de l'historique).
+
+create table if not exists public.chat_synopses (
+    session_id text primary key,
+    synopsis text not null default '',
+    last_message_at timestamptz not null,
+    updated_at timestamptz not null default now()
+);
+
+grant select, insert, update, delete on public.chat_synopses to anon, authenticated;
@@ -0,0 +1,8 @@
+"""
+Configuration pytest : rend le package importable depuis la racine du projet
+"""
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,70 @@
+"""
+Tests de la mesure de mise en page de utils/density_solver
+"""
+import pytest
+
+from utils.cv_generator import VALERIE_DATA_BASE, render_template
+from utils.density_solver import (
+    COLUMN_CLASSES,
+    SENTINEL_PREFIX,
+    _with_sentinels,
+    overflow_from_layout
+)
+
+
+def _weasyprint_usable() -> bool:
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        # WeasyPrint absent ou bibliothèques système (pango) manquantes
+        return False
+    return True
+
+
+requires_weasyprint = pytest.mark.skipif(not _weasyprint_usable(), reason="WeasyPrint indisponible")
+
+
+def _layout(pages=1, page_height=1000.0, **columns):
+    anchors = {}
+    for name, (start, end) in columns.items():
+        anchors[f"{SENTINEL_PREFIX}-start-{name}"] = (0.0, start, 0.0, start)
+        anchors[f"{SENTINEL_PREFIX}-end-{name}"] = (0.0, end, 0.0, end)
+    return {"pages": pages, "page_height": page_height, "anchors": anchors}
+
+
+def test_sentinels_wrap_each_column():
+    html = _with_sentinels(render_template(dict(VALERIE_DATA_BASE), density=50))
+    for name in COLUMN_CLASSES:
+        start = html.index(f'id="{SENTINEL_PREFIX}-start-{name}"')
+        end = html.index(f'id="{SENTINEL_PREFIX}-end-{name}"')
+        assert html.index(f'class="{name}"') < start < end
+
+
+def test_overflow_from_layout():
+    # Padding de 20 px : la zone de contenu finit à 980
+    fitting = _layout(**{"sidebar": (20.0, 900.0), "main-content": (20.0, 975.0)})
+    assert overflow_from_layout(fitting) == pytest.approx(-5.0)
+    
+    overflowing = _layout(**{"sidebar": (20.0, 900.0), "main-content": (20.0, 1010.0)})
+    assert overflow_from_layout(overflowing) == pytest.approx(30.0)
+    
+    assert overflow_from_layout(_layout(pages=2)) == float("inf")
+
+
+@requires_weasyprint
+def test_measure_overflow_detects_long_cv():
+    from utils.density_solver import measure_overflow
+    
+    data = dict(VALERIE_DATA_BASE)
+    assert measure_overflow(render_template(dict(data), density=0)) <= 0.5
+    
+    data["experiences"] = VALERIE_DATA_BASE["experiences"] * 10
+    assert measure_overflow(render_template(dict(data), density=0)) > 0
+
+
+@requires_weasyprint
+def test_solve_density_returns_a_density():
+    from utils.density_solver import solve_density
+    
+    density = solve_density(dict(VALERIE_DATA_BASE))
+    assert density is not None and 0 <= density <= 100
@@ -0,0 +1,85 @@
+"""
+Tests du cache des lectures limitées de utils/pdf_parser
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import pdf_parser
+from utils.pdf_cache import PDFTextCache
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    """Remplace l'analyse PDF par des pages factices et compte les analyses."""
+    state = {"pages": ["a" * 100, "b" * 100, "c" * 100], "parses": 0}
+    cache = PDFTextCache()
+    
+    def iter_pages(source, start=0, end=None):
+        state["parses"] += 1
+        yield from state["pages"][start:end]
+        
+    monkeypatch.setattr(pdf_parser, "_iter_pages", iter_pages)
+    monkeypatch.setattr(pdf_parser, "_page_count", lambda source: len(state["pages"]))
+    monkeypatch.setattr(pdf_parser, "get_pdf_cache", lambda: cache)
+    return state
+
+
+def test_limited_read_of_whole_document_caches_full_text(fake_pdf):
+    text = pdf_parser._extract_text_cached(b"pdf", max_chars=10_000)
+    assert text == pdf_parser._join_pages(fake_pdf["pages"])
+    
+    # Le texte complet sert ensuite les lectures limitées ou non
+    assert pdf_parser._extract_text_cached(b"pdf", max_chars=50) == text[:50]
+    assert pdf_parser._extract_text_cached(b"pdf") == text
+    assert fake_pdf["parses"] == 1
+
+
+def test_truncated_read_is_cached_under_its_limit(fake_pdf):
+    first = pdf_parser._extract_text_cached(b"pdf", max_chars=150)
+    second = pdf_parser._extract_text_cached(b"pdf", max_chars=150)
+    assert first == second == pdf_parser._join_pages(fake_pdf["pages"])[:150]
+    assert fake_pdf["parses"] == 1
+    
+    # Une autre limite ne réutilise pas ce préfixe
+    assert len(pdf_parser._extract_text_cached(b"pdf", max_chars=250)) == 250
+    assert fake_pdf["parses"] == 2
+
+
+def test_page_limit_is_cached_separately(fake_pdf):
+    text = pdf_parser._extract_text_cached(b"pdf", max_pages=1)
+    assert text == "a" * 100
+    assert pdf_parser._extract_text_cached(b"pdf", max_pages=1) == text
+    assert fake_pdf["parses"] == 1
+
+
+class CountingPool(ThreadPoolExecutor):
+    """Pool de threads qui compte les plages de pages soumises."""
+    
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+        
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_large_char_limit_uses_the_pool(fake_pdf, monkeypatch):
+    fake_pdf["pages"] = [f"page {i} " * 50 for i in range(pdf_parser.PARALLEL_MIN_PAGES * 2)]
+    pool = CountingPool()
+    monkeypatch.setattr(pdf_parser, "_get_process_pool", lambda: pool)
+    monkeypatch.setattr(pdf_parser, "PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(pdf_parser, "PARALLEL_WORKERS", 2)
+    
+    max_chars = pdf_parser.PARALLEL_MIN_LIMIT_CHARS
+    text = pdf_parser._extract_text_cached(b"pdf" * 100, max_chars=max_chars)
+    pool.shutdown()
+    
+    assert pool.submitted == 2
+    assert text == pdf_parser._join_pages(fake_pdf["pages"])[:max_chars]
+    
+    # Le texte complet est en cache : une petite limite n'analyse plus rien
+    parses = fake_pdf["parses"]
+    assert pdf_parser._extract_text_cached(b"pdf" * 100, max_chars=100) == text[:100]
+    assert fake_pdf["parses"] == parses
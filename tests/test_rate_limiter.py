@@ -0,0 +1,92 @@
+"""
+Tests du limiteur de débit et des reprises (utils/rate_limiter.py) contre un faux serveur HTTP
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+anthropic = pytest.importorskip("anthropic")
+
+from utils.llm_client import LLMClient
+from utils.rate_limiter import RateLimiter
+
+MESSAGE = {
+    "id": "msg_test",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-sonnet-4-20250514",
+    "content": [{"type": "text", "text": "Bonjour"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 12, "output_tokens": 3}
+}
+
+
+@pytest.fixture
+def fake_server():
+    """Faux serveur Anthropic : répond 429 aux `rate_limited` premières requêtes, puis 200."""
+    state = {"requests": 0, "rate_limited": 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            state["requests"] += 1
+            if state["requests"] <= state["rate_limited"]:
+                status, body = 429, {"type": "error", "error": {"type": "rate_limit_error", "message": "quota"}}
+            else:
+                status, body = 200, MESSAGE
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(payload)))
+            if status == 429:
+                self.send_header("retry-after", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+            
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+
+
+def make_client(url: str, limiter: RateLimiter) -> LLMClient:
+    # max_retries du SDK laissé à sa valeur par défaut : LLMClient doit le neutraliser
+    client = anthropic.Anthropic(api_key="test", base_url=url)
+    return LLMClient(client=client, limiter=limiter)
+
+
+def test_429_is_retried_by_the_limiter(fake_server):
+    fake_server["rate_limited"] = 2
+    limiter = RateLimiter(max_retries=3, base_delay=0.01)
+    
+    assert make_client(fake_server["url"], limiter).generate("Salut") == "Bonjour"
+    assert fake_server["requests"] == 3
+    metrics = limiter.metrics()
+    assert metrics["retries"] == 2
+    assert metrics["rate_limited"] == 2
+
+
+def test_sdk_retries_are_disabled(fake_server):
+    fake_server["rate_limited"] = 10
+    limiter = RateLimiter(max_retries=1, base_delay=0.01)
+    
+    with pytest.raises(anthropic.RateLimitError):
+        make_client(fake_server["url"], limiter).generate("Salut")
+    # Une tentative + une reprise du limiteur, aucune reprise du SDK
+    assert fake_server["requests"] == 2
+
+
+def test_limits_are_off_by_default():
+    limiter = RateLimiter()
+    for _ in range(100):
+        assert limiter.acquire(input_tokens=50000) == 0.0
+    limiter.record_usage(0, 100000)
+    assert limiter.acquire() == 0.0
@@ -0,0 +1,77 @@
+"""
+Tests du stockage SQLite (base en mémoire)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.sqlite_storage import SQLiteStorage
+
+
+@pytest.fixture
+def storage():
+    storage = SQLiteStorage(":memory:")
+    assert storage.enabled
+    return storage
+
+
+def test_candidatures_pagination_and_stats(storage):
+    ids = [storage.save_candidature(f"Poste {i}", "Entreprise", offre_texte=f"Offre {i}")["id"] for i in range(25)]
+    storage.update_candidature_statut(ids[0], "entretien")
+    
+    # Parcours complet par curseur : chaque ligne une seule fois
+    seen, cursor = [], None
+    while True:
+        rows, cursor = storage.get_candidatures_page(limit=7, cursor=cursor)
+        seen.extend(rows)
+        if cursor is None:
+            break
+    assert len(seen) == 25
+    assert {row["id"] for row in seen} == set(ids)
+    
+    rows, cursor = storage.get_candidatures_page(limit=7, statut="entretien")
+    assert [row["id"] for row in rows] == [ids[0]] and cursor is None
+    
+    stats = storage.get_candidatures_stats()
+    assert stats["total"] == 25
+    assert stats["en_cours"] == 24
+    assert stats["entretiens"] == 1
+    
+    assert storage.get_candidature_details(ids[0])["offre_texte"] == "Offre 0"
+    assert storage.get_candidature_details("inconnue") is None
+
+
+def test_events_and_reminders(storage):
+    cand_id = storage.save_candidature("Poste", "Entreprise")["id"]
+    rappel = (datetime.now() + timedelta(days=2)).isoformat()
+    storage.add_candidature_event(cand_id, "relance", rappel_date=rappel)
+    
+    assert [e["type_event"] for e in storage.get_candidature_events(cand_id)] == ["relance"]
+    assert storage.get_events_for_candidatures([cand_id])[cand_id][0]["rappel_date"] == rappel
+    
+    reminders = storage.get_upcoming_reminders(days=7)
+    assert len(reminders) == 1
+    assert reminders[0]["candidatures"] == {"titre_poste": "Poste", "entreprise": "Entreprise"}
+
+
+def test_delete_candidature_cascades(storage):
+    cand_id = storage.save_candidature("Poste", "Entreprise")["id"]
+    storage.add_candidature_event(cand_id, "relance")
+    cv = storage.save_cv_personnalise(
+        "Poste", "Entreprise", "offre", {"accroche": "..."}, "<html>", [], candidature_id=cand_id
+    )
+    
+    assert storage.delete_candidature(cand_id)
+    
+    # Événements supprimés, CV gardé mais détaché
+    assert storage.get_candidature_events(cand_id) == []
+    assert storage.get_cv_personnalise(cv["id"])["candidature_id"] is None
+
+
+def test_mark_post_published_stores_utc_timestamp(storage):
+    post = storage.save_linkedin_post("Sujet", "Contenu")
+    assert storage.mark_post_published(post["id"])
+    
+    published = storage.get_linkedin_posts()[0]
+    assert published["publie"] is True
+    assert datetime.fromisoformat(published["date_publication"]).tzinfo == timezone.utc
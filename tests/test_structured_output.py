@@ -0,0 +1,42 @@
+"""
+Tests de la validation des sorties structurées (utils/structured_output.py)
+"""
+from prompts.cv_schemas import CV_MODIFICATION_TOOL
+from utils.structured_output import conform_to_schema
+
+SCHEMA = CV_MODIFICATION_TOOL["input_schema"]
+
+
+def test_valid_fields_are_kept():
+    data = {
+        "accroche": "Nouvelle accroche",
+        "experiences": [{"entreprise": "A", "poste": "B", "dates": "2020"}],
+        "modification_appliquee": "ok",
+        "sections_modifiees": ["accroche", "experiences"]
+    }
+    assert conform_to_schema(data, SCHEMA) == data
+
+
+def test_malformed_array_item_drops_the_whole_field():
+    data = {
+        "accroche": "Nouvelle accroche",
+        "experiences": [
+            {"entreprise": "A", "poste": "B", "dates": "2020"},
+            {"entreprise": "C", "poste": "D"}
+        ]
+    }
+    result = conform_to_schema(data, SCHEMA)
+    
+    # La liste n'est pas tronquée de l'expérience incomplète : le champ est
+    # absent, l'appelant garde donc les expériences actuelles
+    assert "experiences" not in result
+    assert result["accroche"] == "Nouvelle accroche"
+
+
+def test_wrong_types_and_unknown_fields_are_dropped():
+    data = {"accroche": 42, "qualites": ["a", 3], "inconnu": "x"}
+    assert conform_to_schema(data, SCHEMA) == {}
+
+
+def test_non_object_returns_none():
+    assert conform_to_schema(["pas", "un", "objet"], SCHEMA) is None
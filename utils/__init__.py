@@ -3,6 +3,15 @@ Utilities module for the CV-maker application.
 """
 
 from .llm_client import LLMClient
-from .pdf_parser import extract_text_from_pdf, extract_text_from_pdf_path
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .async_llm_client import AsyncLLMClient
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .doc_retrieval import DocumentIndex
+from .pdf_cache import PDFTextCache, get_pdf_cache
+from .artefact_cache import ArtefactCache, get_artefact_cache
+from .pdf_renderer import PDFRenderService, get_pdf_render_service
+from .storage import Storage, get_storage
+from .sqlite_storage import SQLiteStorage
+from .pdf_parser import extract_text_from_pdf, extract_text_from_pdf_path, extract_pdf_pages, iter_pdf_pages
 
-__all__ = ['LLMClient', 'extract_text_from_pdf', 'extract_text_from_pdf_path']
+__all__ = ['LLMClient', 'AsyncLLMClient', 'LLMResponseCache', 'get_llm_cache', 'RateLimiter', 'get_rate_limiter', 'DocumentIndex', 'PDFTextCache', 'get_pdf_cache', 'ArtefactCache', 'get_artefact_cache', 'PDFRenderService', 'get_pdf_render_service', 'Storage', 'get_storage', 'SQLiteStorage', 'extract_text_from_pdf', 'extract_text_from_pdf_path', 'extract_pdf_pages', 'iter_pdf_pages']
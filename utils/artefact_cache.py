@@ -0,0 +1,168 @@
+"""
+Cache des documents générés (PDF du CV), adressé par le contenu
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "exports" / "cache"
+
+
+class ArtefactCache:
+    """
+    Cache à deux niveaux des documents rendus.
+    
+    La clé est un hash canonique des entrées du rendu (pour le PDF : le HTML
+    complet du CV) : exporter à nouveau un CV inchangé (CV sauvegardé rouvert,
+    double téléchargement du PDF) retourne directement les octets déjà
+    produits. Le HTML lui-même n'est pas mis en cache : le rendu du template
+    coûte moins cher qu'une lecture du cache. Niveau mémoire LRU borné en
+    taille, niveau disque sous exports/cache (éviction LRU par date de
+    modification).
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_mb: float = 32,
+        max_disk_entries: int = 200
+    ):
+        """
+        Initialise le cache.
+        
+        Args:
+            cache_dir: Répertoire du niveau disque (défaut: exports/cache)
+            max_memory_mb: Taille maximale du niveau mémoire
+            max_disk_entries: Nombre de fichiers conservés sur disque
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Calcule la clé (SHA-256) des entrées d'un rendu.
+        
+        Les dicts sont sérialisés avec des clés triées : deux dicts égaux
+        donnent la même clé quel que soit l'ordre d'insertion.
+        """
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str, kind: str) -> Path:
+        return self.cache_dir / f"{key}.{kind}"
+    
+    def _remember(self, name: str, content: bytes) -> None:
+        """Ajoute une entrée au niveau mémoire (appelé sous verrou)."""
+        if name in self._memory:
+            self._memory_size -= len(self._memory.pop(name))
+        self._memory[name] = content
+        self._memory_size += len(content)
+        while self._memory and self._memory_size > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+    
+    def get(self, key: str, kind: str) -> Optional[bytes]:
+        """
+        Retourne un document en cache ou None.
+        
+        Args:
+            key: Clé calculée par make_key
+            kind: Type de document (extension du fichier, ex: "pdf")
+        """
+        name = f"{key}.{kind}"
+        with self._lock:
+            if name in self._memory:
+                self._memory.move_to_end(name)
+                self.hits += 1
+                return self._memory[name]
+                
+            path = self._path(key, kind)
+            try:
+                content = path.read_bytes()
+                os.utime(path, None)
+            except OSError:
+                self.misses += 1
+                return None
+                
+            self._remember(name, content)
+            self.hits += 1
+            return content
+    
+    def set(self, key: str, kind: str, content: bytes) -> None:
+        """
+        Enregistre un document rendu.
+        
+        Args:
+            key: Clé calculée par make_key
+            kind: Type de document (extension du fichier, ex: "pdf")
+            content: Contenu du document
+        """
+        with self._lock:
+            self._remember(f"{key}.{kind}", content)
+            
+            path = self._path(key, kind)
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Erreur écriture cache des documents: {e}")
+                return
+            self._evict_disk()
+    
+    def _evict_disk(self) -> None:
+        """Supprime les fichiers les moins récemment utilisés au-delà de max_disk_entries."""
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.suffix == ".tmp":
+                continue
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+                
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            path.unlink(missing_ok=True)
+    
+    def clear(self) -> None:
+        """Vide les deux niveaux du cache."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            for path in self.cache_dir.iterdir():
+                path.unlink(missing_ok=True)
+    
+    def stats(self) -> Dict:
+        """Retourne les compteurs de hits/misses et l'occupation mémoire."""
+        return {"hits": self.hits, "misses": self.misses, "memory_bytes": self._memory_size}
+
+
+# Instance globale (singleton), partagée par toutes les sessions
+_artefact_cache = None
+
+
+def get_artefact_cache() -> Optional[ArtefactCache]:
+    """
+    Retourne le cache des documents partagé, ou None s'il est désactivé
+    (variable d'environnement ARTEFACT_CACHE_ENABLED=false).
+    """
+    global _artefact_cache
+    if os.getenv("ARTEFACT_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _artefact_cache is None:
+        _artefact_cache = ArtefactCache(cache_dir=os.getenv("ARTEFACT_CACHE_DIR") or None)
+    return _artefact_cache
@@ -0,0 +1,238 @@
+"""
+Client LLM asynchrone, adossé au pool de connexions partagé du processus
+"""
+import asyncio
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Dict, List, Optional, Union
+
+from .llm_cache import LLMResponseCache
+from .llm_client import LLMClient, new_usage_counters
+from .llm_pool import get_async_pool
+from .rate_limiter import RateLimiter, get_rate_limiter, without_sdk_retries
+from .tokenizer import count_payload_tokens
+
+# Fin de flux pour le pont entre la boucle du pool et celle de l'appelant
+_STREAM_END = object()
+
+
+class AsyncLLMClient:
+    """
+    Client asynchrone pour l'API Anthropic Claude.
+    
+    Toutes les instances partagent le même client AsyncAnthropic et donc les
+    mêmes connexions TCP/TLS (voir utils.llm_pool). Les méthodes peuvent être
+    attendues depuis n'importe quelle boucle asyncio (session Streamlit,
+    script batch...).
+    """
+    
+    def __init__(
+        self,
+        model: str = "claude-sonnet-4-20250514",
+        cache: Optional[LLMResponseCache] = None,
+        client=None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Initialise le client LLM asynchrone.
+        
+        Args:
+            model: Modèle Anthropic à utiliser
+            cache: Cache de réponses optionnel (aucun cache si None)
+            client: Client AsyncAnthropic déjà construit (ex: stub local pour les tests),
+                    utilisé directement sur la boucle de l'appelant
+            limiter: Limiteur de débit (défaut: celui partagé par tout le processus)
+        """
+        if client is not None:
+            self._pool = None
+            self.client = without_sdk_retries(client)
+        else:
+            self._pool = get_async_pool()
+            self.client = self._pool.client
+        self.model = model
+        self.cache = cache
+        self.limiter = limiter or get_rate_limiter()
+        self.usage = new_usage_counters()
+        
+    # Même construction de requête et même décompte d'usage que le client synchrone
+    build_request = LLMClient.build_request
+    _record_usage = LLMClient._record_usage
+    
+    async def _run(self, coro):
+        """Exécute une coroutine sur la boucle du pool et attend son résultat."""
+        if self._pool is None:
+            return await coro
+        return await asyncio.wrap_future(self._pool.submit(coro))
+    
+    async def _send(self, request: Dict):
+        """Envoie une requête sous contrôle du limiteur (débit + reprises)."""
+        estimated = count_payload_tokens([request["system"], request["messages"]])
+        response = await self.limiter.acall(
+            lambda: self.client.messages.create(**request),
+            estimated
+        )
+        self._record_usage(response, estimated)
+        return response
+    
+    async def _stream_text(self, request: Dict) -> AsyncGenerator[str, None]:
+        """Ouvre un flux sous contrôle du limiteur et en produit le texte."""
+        estimated = count_payload_tokens([request["system"], request["messages"]])
+        async with AsyncExitStack() as stack:
+            stream = await self.limiter.acall(
+                lambda: stack.enter_async_context(self.client.messages.stream(**request)),
+                estimated
+            )
+            async for text in stream.text_stream:
+                yield text
+            self._record_usage(await stream.get_final_message(), estimated)
+    
+    async def _create(self, request: Dict, use_cache: bool) -> str:
+        """Appelle l'API en passant par le cache de réponses s'il est actif."""
+        key = None
+        if self.cache is not None and use_cache:
+            key = LLMResponseCache.make_key(
+                request["model"],
+                request["system"],
+                request["messages"],
+                request["max_tokens"],
+                request["temperature"]
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+                
+        response = await self._run(self._send(request))
+        text = response.content[0].text
+        
+        if key is not None:
+            self.cache.set(key, text)
+            
+        return text
+    
+    async def _stream(self, request: Dict) -> AsyncGenerator[str, None]:
+        """Relaie le flux de texte produit sur la boucle du pool."""
+        if self._pool is None:
+            async for text in self._stream_text(request):
+                yield text
+            return
+            
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        
+        async def produce():
+            try:
+                async for text in self._stream_text(request):
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+                
+        future = self._pool.submit(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Arrêter la requête si l'appelant abandonne le flux
+            future.cancel()
+    
+    async def generate(
+        self,
+        prompt: Union[str, List[Dict]],
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Génère une réponse complète.
+        
+        Args:
+            prompt: Le prompt utilisateur (texte ou blocs)
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
+            
+        Returns:
+            La réponse générée
+        """
+        messages = [{"role": "user", "content": prompt}]
+        
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        return await self._create(request, use_cache)
+    
+    async def generate_stream(
+        self,
+        prompt: Union[str, List[Dict]],
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ) -> AsyncGenerator[str, None]:
+        """
+        Génère une réponse en streaming.
+        
+        Args:
+            prompt: Le prompt utilisateur (texte ou blocs)
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            
+        Yields:
+            Morceaux de texte au fur et à mesure
+        """
+        messages = [{"role": "user", "content": prompt}]
+        
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        async for text in self._stream(request):
+            yield text
+    
+    async def chat(
+        self,
+        messages: list,
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Conversation multi-tours.
+        
+        Args:
+            messages: Liste de messages [{"role": "user/assistant", "content": "..."}]
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
+            
+        Returns:
+            La réponse générée
+        """
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        return await self._create(request, use_cache)
+    
+    async def chat_stream(
+        self,
+        messages: list,
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ) -> AsyncGenerator[str, None]:
+        """
+        Conversation multi-tours en streaming.
+        
+        Args:
+            messages: Liste de messages
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            
+        Yields:
+            Morceaux de texte au fur et à mesure
+        """
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        async for text in self._stream(request):
+            yield text
@@ -0,0 +1,139 @@
+"""
+Construction du contexte du coach IA dans un budget de tokens
+"""
+import os
+from typing import Dict, List
+
+from .llm_client import build_system_blocks
+from .tokenizer import count_payload_tokens, count_tokens, truncate_to_tokens
+
+
+# Budget de tokens d'entrée par tour du coach (prompt système + CV + historique + documents)
+COACH_INPUT_BUDGET = int(os.getenv("COACH_INPUT_BUDGET", "12000"))
+
+# Part du budget restant (après système et CV) réservée aux derniers échanges
+RECENT_TURNS_SHARE = 0.5
+
+# Nombre minimum de messages récents conservés quel que soit leur poids
+MIN_RECENT_MESSAGES = 2
+
+
+def _window_start(messages: List[Dict], start: int) -> int:
+    """L'API exige que la conversation commence par un message utilisateur."""
+    while start < len(messages) - 1 and messages[start]["role"] != "user":
+        start += 1
+    return start
+
+
+def build_coach_context(
+    messages: List[Dict],
+    system_prompt: str,
+    cv_text: str,
+    documents: List[Dict] = None,
+    synopsis: str = "",
+    budget: int = None
+) -> Dict:
+    """
+    Remplit le budget de tokens par priorité : système et CV, derniers
+    échanges, extraits de documents, puis échanges plus anciens. Les
+    échanges qui ne tiennent plus sont remplacés par le synopsis.
+    
+    Args:
+        messages: Historique complet [{"role", "content"}]
+        system_prompt: Prompt système du coach
+        cv_text: CV de Valérie
+        documents: Documents du chat [{"name", "content"}]
+        synopsis: Résumé des échanges sortis de la fenêtre
+        budget: Budget de tokens d'entrée (défaut: COACH_INPUT_BUDGET)
+        
+    Returns:
+        Dict avec:
+            - system: blocs du prompt système (préfixe stable cacheable)
+            - messages: messages retenus, dans l'ordre
+            - first_kept: index du premier message retenu (les précédents
+              doivent être couverts par le synopsis)
+            - tokens: estimation du nombre de tokens d'entrée
+    """
+    budget = budget or COACH_INPUT_BUDGET
+    documents = documents or []
+    
+    cv_block = f"CV de Valérie :\n{cv_text}"
+    synopsis_block = f"Résumé des échanges précédents avec Valérie :\n{synopsis}" if synopsis else ""
+    
+    used = count_tokens(system_prompt) + count_tokens(cv_block) + count_tokens(synopsis_block)
+    remaining = max(0, budget - used)
+    
+    # 1. Derniers échanges (le dernier message est toujours conservé)
+    costs = [count_payload_tokens(m) for m in messages]
+    recent_budget = remaining * RECENT_TURNS_SHARE
+    start = len(messages)
+    spent = 0
+    while start > 0:
+        cost = costs[start - 1]
+        kept = len(messages) - start
+        if kept >= MIN_RECENT_MESSAGES and spent + cost > recent_budget:
+            break
+        spent += cost
+        start -= 1
+    remaining = max(0, remaining - spent)
+    
+    # 2. Extraits de documents, budget partagé équitablement
+    docs_context = ""
+    if documents and remaining > 0:
+        per_doc = remaining // len(documents)
+        excerpts = []
+        for doc in documents:
+            excerpt = truncate_to_tokens(doc["content"], per_doc)
+            if excerpt:
+                excerpts.append(f"\n📄 {doc['name']}:\n{excerpt}\n")
+        if excerpts:
+            docs_context = "--- DOCUMENTS FOURNIS PAR VALÉRIE ---\n" + "".join(excerpts) + "\n--- FIN DES DOCUMENTS ---\n"
+            remaining = max(0, remaining - count_tokens(docs_context))
+            
+    # 3. Échanges plus anciens, tant qu'il reste du budget
+    while start > 0 and costs[start - 1] <= remaining:
+        remaining -= costs[start - 1]
+        start -= 1
+        
+    start = _window_start(messages, start)
+    window = [{"role": m["role"], "content": m["content"]} for m in messages[start:]]
+    
+    # CV et consignes d'abord (stables, mis en cache), puis les parties variables
+    system = build_system_blocks(system_prompt, cv_block)
+    for text in (docs_context, synopsis_block):
+        if text:
+            system.append({"type": "text", "text": text})
+            
+    return {
+        "system": system,
+        "messages": window,
+        "first_kept": start,
+        "tokens": count_payload_tokens(system) + count_payload_tokens(window)
+    }
+
+
+def update_synopsis(llm, synopsis: str, messages: List[Dict], prompt_template: str) -> str:
+    """
+    Intègre au synopsis les échanges sortis de la fenêtre de contexte.
+    
+    Args:
+        llm: Client LLM
+        synopsis: Synopsis actuel (peut être vide)
+        messages: Échanges à intégrer
+        prompt_template: Template avec {synopsis} et {echanges}
+        
+    Returns:
+        Le nouveau synopsis
+    """
+    if not messages:
+        return synopsis
+        
+    echanges = "\n\n".join(
+        f"{'VALÉRIE' if m['role'] == 'user' else 'COACH'}: {m['content']}"
+        for m in messages
+    )
+    prompt = prompt_template.format(
+        synopsis=synopsis or "(aucun échange résumé pour l'instant)",
+        echanges=echanges
+    )
+    return llm.generate(prompt=prompt, max_tokens=800, temperature=0.3).strip()
@@ -5,11 +5,18 @@ Avec système intelligent de densité pour tenir sur 1 page
 """
 import os
 import io
-import re
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Tuple
 import base64
+import copy
+from concurrent.futures import Future
+from functools import lru_cache
+
+from .artefact_cache import get_artefact_cache
+from .pdf_renderer import get_pdf_render_service
+from .template_engine import load_template
 
 
 # ============================================================================
@@ -234,85 +241,91 @@ def get_density_values(density: int = None, data: Dict = None) -> Dict[str, floa
     }
 
 
-def get_photo_base64(photo_path: str = None) -> str:
-    """Convertit la photo en base64 pour l'inclure dans le HTML."""
-    if photo_path is None:
-        photo_path = Path(__file__).parent.parent / "docMaman" / "photomaman.jpeg"
-    
-    try:
-        with open(photo_path, "rb") as f:
-            data = f.read()
-        return f"data:image/jpeg;base64,{base64.b64encode(data).decode()}"
-    except:
-        return ""
+PHOTO_PATH = Path(__file__).parent.parent / "docMaman" / "photomaman.jpeg"
 
+# Pixels par px CSS de la photo (2 = net sur écran haute densité et à l'impression)
+PHOTO_PIXEL_RATIO = 2
 
-def render_template(data: Dict, density: int = None) -> str:
+# Les tailles CSS sont arrondies au pas supérieur pour limiter le nombre de variantes
+PHOTO_SIZE_STEP = 10
+
+
+@lru_cache(maxsize=16)
+def _encode_photo(photo_path: str, mtime_ns: int, pixels: int) -> str:
     """
-    Génère le HTML du CV à partir des données.
-    Utilise un mini moteur de template maison.
+    Redimensionne et recompresse la photo, puis l'encode en data URI.
+    
+    Mémoïsé par (chemin, date de modification, taille) : la photo n'est
+    retraitée que si le fichier change ou pour une nouvelle taille.
     
     Args:
-        data: Données du CV
-        density: 0-100 pour ajustement manuel, None pour auto
+        photo_path: Chemin de la photo
+        mtime_ns: Date de modification du fichier (clé d'invalidation)
+        pixels: Côté de l'image carrée produite, en pixels
+        
+    Returns:
+        Data URI JPEG de la photo
     """
-    template_path = Path(__file__).parent.parent / "templates" / "cv_template.html"
+    with open(photo_path, "rb") as f:
+        original = f.read()
     
-    with open(template_path, "r", encoding="utf-8") as f:
-        html = f.read()
+    try:
+        from PIL import Image, ImageOps
+        
+        with Image.open(io.BytesIO(original)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            # Recadrage carré centré, comme object-fit: cover dans le cercle
+            image = ImageOps.fit(image, (pixels, pixels), method=Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+        data = buffer.getvalue()
+        if len(data) >= len(original):
+            data = original
+    except ImportError:
+        # Pillow absent : photo d'origine
+        data = original
     
-    # Ajouter la photo en base64
-    data["photo_url"] = get_photo_base64()
+    return f"data:image/jpeg;base64,{base64.b64encode(data).decode()}"
+
+
+def get_photo_base64(photo_path: str = None, size: int = None) -> str:
+    """
+    Convertit la photo en base64 pour l'inclure dans le HTML.
     
-    # Calculer et injecter les valeurs de densité
-    density_values = get_density_values(density=density, data=data)
-    for key, value in density_values.items():
-        html = html.replace(f"{{{{{key}}}}}", str(value))
-    
-    # Remplacer les variables simples {{variable}}
-    for key, value in data.items():
-        if isinstance(value, str):
-            html = html.replace(f"{{{{{key}}}}}", value)
-    
-    # Traiter les listes (sections répétées)
-    # Format: {{#liste}}...{{/liste}}
-    
-    # Qualités (liste simple)
-    if "qualites" in data:
-        qualites_html = ""
-        for q in data["qualites"]:
-            qualites_html += f'<span class="qualite">{q}</span>\n'
-        html = re.sub(r'\{\{#qualites\}\}.*?\{\{/qualites\}\}', qualites_html, html, flags=re.DOTALL)
-    
-    # Compétences (liste simple)
-    if "competences" in data:
-        comp_html = ""
-        for c in data["competences"]:
-            comp_html += f'<div class="competence-item">{c}</div>\n'
-        html = re.sub(r'\{\{#competences\}\}.*?\{\{/competences\}\}', comp_html, html, flags=re.DOTALL)
-    
-    # Compétences communication (section optionnelle)
-    if data.get("section_communication") and "competences_com" in data:
-        # Générer le HTML des compétences com
-        comp_com_html = ""
-        for c in data["competences_com"]:
-            comp_com_html += f'<div class="competence-item">{c}</div>\n'
-        
-        # Remplacer les compétences dans la section
-        html = re.sub(r'\{\{#competences_com\}\}.*?\{\{/competences_com\}\}', comp_com_html, html, flags=re.DOTALL)
+    Args:
+        photo_path: Chemin de la photo (défaut: photo de Valérie)
+        size: Taille d'affichage en px CSS (défaut: la plus grande des presets de densité)
         
-        # Supprimer les balises de section (garder le contenu)
-        html = html.replace('{{#section_communication}}', '')
-        html = html.replace('{{/section_communication}}', '')
-    else:
-        # Supprimer toute la section communication si pas activée
-        html = re.sub(r'\{\{#section_communication\}\}.*?\{\{/section_communication\}\}', '', html, flags=re.DOTALL)
-    
-    # Expériences
-    if "experiences" in data:
-        exp_html = ""
-        for exp in data["experiences"]:
-            exp_html += f'''
+    Returns:
+        Data URI de la photo, redimensionnée à la taille affichée ("" si introuvable)
+    """
+    if photo_path is None:
+        photo_path = PHOTO_PATH
+    if size is None:
+        size = max(preset[8] for preset in DENSITY_PRESETS.values())
+    
+    size = -(-int(size) // PHOTO_SIZE_STEP) * PHOTO_SIZE_STEP
+    try:
+        mtime_ns = os.stat(photo_path).st_mtime_ns
+        return _encode_photo(str(photo_path), mtime_ns, size * PHOTO_PIXEL_RATIO)
+    except Exception as e:
+        print(f"Erreur chargement photo: {e}")
+        return ""
+
+
+TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "cv_template.html"
+
+
+def _render_qualites(qualites: List[str]) -> str:
+    return "".join(f'<span class="qualite">{q}</span>\n' for q in qualites)
+
+
+def _render_competences(competences: List[str]) -> str:
+    return "".join(f'<div class="competence-item">{c}</div>\n' for c in competences)
+
+
+def _render_experiences(experiences: List[Dict]) -> str:
+    return "".join(f'''
             <div class="experience-item">
                 <div>
                     <div class="exp-entreprise">{exp["entreprise"]}</div>
@@ -320,62 +333,135 @@ def render_template(data: Dict, density: int = None) -> str:
                 </div>
                 <div class="exp-dates">{exp["dates"]}</div>
             </div>
-            '''
-        html = re.sub(r'\{\{#experiences\}\}.*?\{\{/experiences\}\}', exp_html, html, flags=re.DOTALL)
-    
-    # Formations
-    if "formations" in data:
-        form_html = ""
-        for f in data["formations"]:
-            form_html += f'''
+            ''' for exp in experiences)
+
+
+def _render_formations(formations: List[Dict]) -> str:
+    return "".join(f'''
             <div class="formation-item">
                 <div class="formation-dates">{f["dates"]}</div>
                 <div class="formation-titre">{f["titre"]}</div>
                 <div class="formation-lieu">{f["etablissement"]}</div>
             </div>
-            '''
-        html = re.sub(r'\{\{#formations\}\}.*?\{\{/formations\}\}', form_html, html, flags=re.DOTALL)
-    
-    # Stages
-    if "stages" in data:
-        stages_html = ""
-        for s in data["stages"]:
-            stages_html += f'''
+            ''' for f in formations)
+
+
+def _render_stages(stages: List[Dict]) -> str:
+    return "".join(f'''
             <div class="stage-item">
                 <div class="stage-dates">{s["dates"]}</div>
                 <div class="stage-lieu">{s["lieu"]}</div>
                 <div class="stage-mission">{s["mission"]}</div>
             </div>
-            '''
-        html = re.sub(r'\{\{#stages\}\}.*?\{\{/stages\}\}', stages_html, html, flags=re.DOTALL)
-    
-    # Bénévolat
-    if "benevolat" in data:
-        ben_html = ""
-        for b in data["benevolat"]:
-            ben_html += f'''
+            ''' for s in stages)
+
+
+def _render_benevolat(benevolat: List[Dict]) -> str:
+    return "".join(f'''
             <div class="benevolat-item">
                 <div class="benevolat-event">{b["evenement"]}</div>
                 <div>{b["role"]}</div>
             </div>
-            '''
-        html = re.sub(r'\{\{#benevolat\}\}.*?\{\{/benevolat\}\}', ben_html, html, flags=re.DOTALL)
-    
-    # Intérêts
-    if "interets" in data:
-        int_html = ""
-        for i in data["interets"]:
-            detail = f" – {i['detail']}" if i.get("detail") else ""
-            int_html += f'''
+            ''' for b in benevolat)
+
+
+def _render_interets(interets: List[Dict]) -> str:
+    html = ""
+    for i in interets:
+        detail = f" – {i['detail']}" if i.get("detail") else ""
+        html += f'''
             <div class="interet-item">
                 <span class="interet-highlight">{i["titre"]}</span>{detail}
             </div>
             '''
-        html = re.sub(r'\{\{#interets\}\}.*?\{\{/interets\}\}', int_html, html, flags=re.DOTALL)
-    
     return html
 
 
+# Sections répétées du template ({{#liste}}...{{/liste}}) et leur rendu HTML
+SECTION_RENDERERS = {
+    "qualites": _render_qualites,
+    "competences": _render_competences,
+    "experiences": _render_experiences,
+    "formations": _render_formations,
+    "stages": _render_stages,
+    "benevolat": _render_benevolat,
+    "interets": _render_interets,
+}
+
+
+# Dernier fragment HTML rendu pour chaque section, avec le contenu dont il est issu
+_fragments = {}
+_fragments_lock = threading.Lock()
+
+
+def _render_fragment(name: str, renderer, items: List) -> str:
+    """
+    Retourne le HTML d'une section, rendu seulement si son contenu a changé.
+    
+    Une modification du CV (retour du coach, édition manuelle) ne touche en
+    général qu'une ou deux sections : les autres sont reprises telles quelles.
+    La comparaison du contenu (==) coûte moins cher que le rendu ou qu'un hash.
+    
+    Args:
+        name: Nom de la section dans le template
+        renderer: Fonction de rendu de la section
+        items: Contenu de la section dans les données du CV
+    """
+    with _fragments_lock:
+        cached = _fragments.get(name)
+    if cached is not None and cached[0] == items:
+        return cached[1]
+        
+    fragment = renderer(items)
+    # Copie du contenu : les listes du CV peuvent être modifiées sur place ensuite
+    with _fragments_lock:
+        _fragments[name] = (copy.deepcopy(items), fragment)
+    return fragment
+
+
+def _render_sections(data: Dict) -> Dict:
+    """Calcule le contenu de chaque section du template à partir des données."""
+    sections = {
+        name: _render_fragment(name, renderer, data[name])
+        for name, renderer in SECTION_RENDERERS.items()
+        if name in data
+    }
+    
+    # Section communication optionnelle : contenu gardé sans les balises, ou supprimée
+    if data.get("section_communication") and "competences_com" in data:
+        sections["section_communication"] = True
+        sections["competences_com"] = _render_fragment(
+            "competences_com", _render_competences, data["competences_com"]
+        )
+    else:
+        sections["section_communication"] = False
+    
+    return sections
+
+
+def render_template(data: Dict, density: int = None) -> str:
+    """
+    Génère le HTML du CV à partir des données.
+    Utilise un mini moteur de template maison, compilé une fois
+    (voir utils/template_engine.py) et recompilé si le fichier change.
+    
+    Args:
+        data: Données du CV
+        density: 0-100 pour ajustement manuel, None pour auto
+    """
+    template = load_template(TEMPLATE_PATH)
+    density_values = get_density_values(density=density, data=data)
+    
+    # Ajouter la photo en base64, à la taille où elle est affichée
+    data["photo_url"] = get_photo_base64(size=density_values["photo_size"])
+    
+    # Variables simples {{variable}} ; les valeurs de densité sont prioritaires
+    values = {key: value for key, value in data.items() if isinstance(value, str)}
+    values.update({key: str(value) for key, value in density_values.items()})
+    
+    return template.render(values, _render_sections(data))
+
+
 def generate_cv_html(customizations: Dict = None, density: int = None) -> str:
     """
     Génère le HTML du CV avec personnalisations optionnelles.
@@ -446,9 +532,50 @@ def generate_cv_html(customizations: Dict = None, density: int = None) -> str:
     return render_template(data, density=density)
 
 
+def submit_cv_pdf(html: str) -> Future:
+    """
+    Lance le rendu PDF d'un CV, ou le retrouve dans le cache des documents.
+    
+    Le PDF est indexé par le hash du HTML, lui-même fonction des données, de
+    la densité et de la version du template : un CV sauvegardé rouvert ou
+    téléchargé deux fois n'est rendu qu'une fois.
+    
+    Args:
+        html: HTML complet du CV
+        
+    Returns:
+        Future dont le résultat est le contenu du PDF (bytes)
+    """
+    result = Future()
+    cache = get_artefact_cache()
+    key = cache.make_key("pdf", html) if cache is not None else None
+    
+    cached = cache.get(key, "pdf") if key else None
+    if cached is not None:
+        result.set_result(cached)
+        return result
+    
+    def on_done(job: Future) -> None:
+        try:
+            pdf = job.result()["pdf"]
+        except BaseException as e:
+            result.set_exception(e)
+            return
+        if key:
+            cache.set(key, "pdf", pdf)
+        result.set_result(pdf)
+    
+    # Rendu dans un processus WeasyPrint déjà chaud (voir utils/pdf_renderer.py)
+    get_pdf_render_service().submit(html).add_done_callback(on_done)
+    return result
+
+
 def generate_cv_pdf(customizations: Dict = None, density: int = None) -> io.BytesIO:
     """
-    Génère un PDF du CV.
+    Génère un PDF du CV et attend le rendu.
+    
+    Bloquant : à réserver aux scripts. L'application soumet le rendu avec
+    submit_cv_pdf et récupère le PDF quand la Future est terminée.
     
     Args:
         customizations: Personnalisations à appliquer
@@ -460,12 +587,7 @@ def generate_cv_pdf(customizations: Dict = None, density: int = None) -> io.Byte
     html = generate_cv_html(customizations, density=density)
     
     try:
-        from weasyprint import HTML, CSS
-        
-        buffer = io.BytesIO()
-        HTML(string=html).write_pdf(buffer)
-        buffer.seek(0)
-        return buffer
+        return io.BytesIO(submit_cv_pdf(html).result())
         
     except ImportError:
         # Fallback : retourner le HTML si weasyprint n'est pas installé
@@ -480,13 +602,38 @@ def preview_cv_html(customizations: Dict = None, density: int = None) -> str:
     return generate_cv_html(customizations, density=density)
 
 
-def get_density_recommendation(data: Dict) -> Tuple[str, int, str]:
+def get_density_recommendation(data: Dict, measure: bool = True) -> Tuple[str, int, str]:
     """
     Retourne une recommandation de densité avec explication.
     
+    Args:
+        data: Données du CV
+        measure: Mesurer la mise en page réelle avec WeasyPrint (voir
+                 utils/density_solver.py) ; sinon, ou si WeasyPrint n'est pas
+                 disponible, estimation d'après le volume de contenu
+    
     Returns:
         Tuple: (preset_name, density_value, explanation)
     """
+    if measure:
+        from .density_solver import solve_density
+        
+        solved = solve_density(data)
+        if solved is not None:
+            if solved <= 25:
+                preset = "ultra_compact"
+            elif solved <= 50:
+                preset = "compact"
+            elif solved <= 75:
+                preset = "normal"
+            else:
+                preset = "comfortable"
+            if solved == 0:
+                explanation = "🔴 Même en mode ultra-compact, le CV dépasse 1 page → raccourcis le contenu"
+            else:
+                explanation = f"📏 Densité {solved} : la plus aérée qui tient sur 1 page (mise en page mesurée)"
+            return preset, solved, explanation
+    
     preset = calculate_content_density(data)
     
     explanations = {
@@ -526,13 +673,14 @@ def adapt_cv_for_offer(
             customizations["accroche"] = llm_suggestions["accroche"]
         
         if "qualites" in llm_suggestions:
-            customizations["qualites"] = llm_suggestions["qualites"]
+            # Le template affiche 4 qualités
+            customizations["qualites"] = llm_suggestions["qualites"][:4]
         
         if "competences_prioritaires" in llm_suggestions:
-            # Réordonner les compétences selon les priorités
+            # Réordonner les compétences selon les priorités (5 prioritaires + 5 autres)
             prioritaires = llm_suggestions["competences_prioritaires"]
             autres = [c for c in VALERIE_DATA_BASE["competences"] if c not in prioritaires]
-            customizations["competences"] = prioritaires + autres
+            customizations["competences"] = prioritaires[:5] + autres[:5]
     
     return customizations
 
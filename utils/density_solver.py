@@ -0,0 +1,197 @@
+"""
+Ajustement automatique de la densité du CV pour tenir sur une page A4,
+par mesure de la mise en page réelle (WeasyPrint)
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from .cv_generator import TEMPLATE_PATH, render_template
+from .pdf_renderer import get_pdf_render_service
+
+# Colonnes du template dont le contenu ne doit pas déborder de la page
+COLUMN_CLASSES = ("sidebar", "main-content")
+
+# Débordement toléré (px CSS), pour absorber les arrondis de mise en page
+OVERFLOW_TOLERANCE = 0.5
+
+# Attente maximale d'une mise en page dans le pool de rendu (secondes)
+MEASURE_TIMEOUT = 30
+
+# Préfixe des repères vides insérés au début et à la fin de chaque colonne
+SENTINEL_PREFIX = "density-sentinel"
+
+# Nombre de résultats conservés (clé : hash du contenu du CV)
+MAX_CACHED_RESULTS = 128
+
+_solved = OrderedDict()
+_solved_lock = threading.Lock()
+
+# Disponibilité de WeasyPrint, vérifiée une seule fois (l'import échoue lentement)
+_weasyprint_available = None
+
+
+def _content_key(data: Dict) -> str:
+    """Hash canonique des données du CV et de la version du template."""
+    content = {key: value for key, value in data.items() if key != "photo_url"}
+    payload = json.dumps(
+        [content, TEMPLATE_PATH.stat().st_mtime_ns],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _with_sentinels(html: str) -> str:
+    """
+    Ajoute un repère vide (avec un id) au début et à la fin de chaque colonne.
+    
+    WeasyPrint expose la position des éléments ayant un id (Page.anchors),
+    même quand ils sont masqués par overflow: hidden.
+    """
+    for name in COLUMN_CLASSES:
+        opening = re.search(rf'<(\w+)[^>]*\bclass="(?:[^"]*\s)?{re.escape(name)}(?:\s[^"]*)?"[^>]*>', html)
+        if opening is None:
+            continue
+        closing = html.find(f"</{opening.group(1)}>", opening.end())
+        if closing == -1:
+            continue
+        html = (
+            html[:opening.end()]
+            + f'<div id="{SENTINEL_PREFIX}-start-{name}"></div>'
+            + html[opening.end():closing]
+            + f'<div id="{SENTINEL_PREFIX}-end-{name}"></div>'
+            + html[closing:]
+        )
+    return html
+
+
+def overflow_from_layout(layout: Dict) -> float:
+    """
+    Calcule le débordement d'une mise en page (voir PDFRenderService.submit_layout).
+    
+    Le conteneur du template a une hauteur fixe d'une page avec
+    overflow: hidden : un contenu trop long est coupé au lieu de créer une
+    deuxième page. On compare donc le repère de fin de chaque colonne au bas
+    de sa zone de contenu. Les colonnes partent du haut de la page et ont le
+    même padding en haut et en bas : le bas de la zone de contenu est à
+    page_height moins la position du repère de début.
+    
+    Args:
+        layout: {"pages", "page_height", "anchors"}
+        
+    Returns:
+        Débordement en px CSS (négatif ou nul = le CV tient sur la page)
+    """
+    if layout["pages"] > 1:
+        return float("inf")
+        
+    anchors = layout["anchors"]
+    overflow = float("-inf")
+    for name in COLUMN_CLASSES:
+        start = anchors.get(f"{SENTINEL_PREFIX}-start-{name}")
+        end = anchors.get(f"{SENTINEL_PREFIX}-end-{name}")
+        if start is None or end is None:
+            continue
+        limit = layout["page_height"] - start[1]
+        overflow = max(overflow, end[1] - limit)
+    return overflow
+
+
+def _submit_layout(data: Dict, density: int) -> Future:
+    """Rend le CV avec cette densité et soumet sa mise en page au pool de rendu."""
+    html = render_template(dict(data), density=density)
+    return get_pdf_render_service().submit_layout(_with_sentinels(html))
+
+
+def measure_overflow(html: str) -> float:
+    """
+    Met en page le CV (sans écrire de PDF) et mesure le débordement.
+    
+    La mise en page tourne dans un processus du pool de rendu PDF, où
+    WeasyPrint et les polices sont déjà chargés.
+    
+    Args:
+        html: HTML complet du CV
+        
+    Returns:
+        Débordement en px CSS (négatif ou nul = le CV tient sur la page)
+    """
+    layout = get_pdf_render_service().submit_layout(_with_sentinels(html)).result(timeout=MEASURE_TIMEOUT)
+    return overflow_from_layout(layout)
+
+
+def _fits(job: Future) -> bool:
+    """Attend une mise en page soumise et indique si le CV tient sur une page."""
+    return overflow_from_layout(job.result(timeout=MEASURE_TIMEOUT)) <= OVERFLOW_TOLERANCE
+
+
+def fits_on_one_page(data: Dict, density: int) -> bool:
+    """Indique si le CV rendu avec cette densité tient sur une page."""
+    return _fits(_submit_layout(data, density))
+
+
+def solve_density(data: Dict) -> Optional[int]:
+    """
+    Cherche la densité la plus aérée (0-100) pour laquelle le CV tient sur une page.
+    
+    Recherche dichotomique sur get_density_values (9 mises en page au plus,
+    faites dans le pool de rendu PDF), résultat mis en cache par hash du
+    contenu.
+    
+    Args:
+        data: Données du CV
+        
+    Returns:
+        Densité retenue (0 si même la plus compacte déborde),
+        None si WeasyPrint n'est pas disponible
+    """
+    key = _content_key(data)
+    with _solved_lock:
+        if key in _solved:
+            _solved.move_to_end(key)
+            return _solved[key]
+            
+    global _weasyprint_available
+    if _weasyprint_available is None:
+        try:
+            import weasyprint  # noqa: F401
+            _weasyprint_available = True
+        except (ImportError, OSError):
+            # WeasyPrint absent ou bibliothèques système (pango) manquantes
+            _weasyprint_available = False
+    if not _weasyprint_available:
+        return None
+        
+    try:
+        # Les deux extrêmes sont mis en page en même temps (processus distincts)
+        loosest = _submit_layout(data, 100)
+        densest = _submit_layout(data, 0)
+        if _fits(loosest):
+            best = 100
+        elif not _fits(densest):
+            best = 0
+        else:
+            # Invariant : low tient sur la page, high déborde
+            low, high = 0, 100
+            while high - low > 1:
+                middle = (low + high) // 2
+                if fits_on_one_page(data, middle):
+                    low = middle
+                else:
+                    high = middle
+            best = low
+    except Exception as e:
+        print(f"Erreur mesure de la mise en page: {e}")
+        return None
+        
+    with _solved_lock:
+        _solved[key] = best
+        while len(_solved) > MAX_CACHED_RESULTS:
+            _solved.popitem(last=False)
+    return best
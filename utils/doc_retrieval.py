@@ -0,0 +1,201 @@
+"""
+Recherche locale (BM25) dans les documents uploadés dans le chat
+"""
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+# Taille des morceaux de document (en mots) et recouvrement entre deux morceaux
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 40
+
+# Nombre de morceaux envoyés au coach à chaque tour
+DOC_TOP_K = int(os.getenv("COACH_DOC_TOP_K", "6"))
+
+# Paramètres classiques de BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Mots vides français (sans accents, après normalisation)
+_STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "cette", "dans", "de", "des", "du",
+    "elle", "en", "est", "et", "il", "je", "la", "le", "les", "leur", "lui",
+    "ma", "mais", "me", "mes", "mon", "ne", "nous", "on", "ou", "par", "pas",
+    "pour", "qu", "que", "qui", "sa", "se", "ses", "son", "sur", "ta", "te",
+    "tes", "toi", "ton", "tu", "un", "une", "vous", "y", "l", "d", "j", "c",
+    "n", "s", "m", "t"
+}
+
+
+def _normalize(word: str) -> str:
+    """Minuscules sans accents, pour que « compétences » trouve « competences »."""
+    word = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in word if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes indexables.
+    
+    Args:
+        text: Texte à découper
+        
+    Returns:
+        Liste des termes normalisés, sans mots vides
+    """
+    terms = []
+    for match in _WORD_PATTERN.finditer(text or ""):
+        term = _normalize(match.group())
+        if term not in _STOPWORDS:
+            terms.append(term)
+    return terms
+
+
+def split_into_chunks(text: str, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Découpe un document en morceaux de taille fixe qui se recouvrent.
+    
+    Args:
+        text: Texte complet du document
+        chunk_words: Nombre de mots par morceau
+        overlap: Nombre de mots repris du morceau précédent
+        
+    Returns:
+        Liste des morceaux, dans l'ordre du document
+    """
+    words = text.split()
+    if not words:
+        return []
+        
+    step = max(1, chunk_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class DocumentIndex:
+    """
+    Index BM25 des morceaux de documents d'une session de chat.
+    
+    Permet de n'envoyer au coach que les passages pertinents pour la question
+    posée, quelle que soit la longueur des documents.
+    """
+    
+    def __init__(self, documents: List[Dict] = None):
+        """
+        Initialise l'index.
+        
+        Args:
+            documents: Documents à indexer [{"name", "content"}]
+        """
+        self.chunks = []
+        self._doc_freq = Counter()
+        self._total_length = 0
+        for doc in documents or []:
+            self.add_document(doc["name"], doc["content"])
+    
+    def add_document(self, name: str, text: str) -> None:
+        """
+        Découpe et indexe un document.
+        
+        Args:
+            name: Nom du document
+            text: Texte extrait du document
+        """
+        for position, content in enumerate(split_into_chunks(text)):
+            terms = Counter(tokenize(content))
+            self.chunks.append({
+                "name": name,
+                "position": position,
+                "content": content,
+                "terms": terms,
+                "length": sum(terms.values())
+            })
+            self._doc_freq.update(terms.keys())
+            self._total_length += sum(terms.values())
+    
+    def search(self, query: str, top_k: int = DOC_TOP_K) -> List[Dict]:
+        """
+        Classe les morceaux par score BM25 pour une question.
+        
+        Args:
+            query: Question de l'utilisateur
+            top_k: Nombre maximum de morceaux retournés
+            
+        Returns:
+            Morceaux [{"name", "position", "content", "score"}], du plus au moins pertinent
+            (uniquement ceux qui partagent au moins un terme avec la question)
+        """
+        if not self.chunks:
+            return []
+            
+        query_terms = set(tokenize(query))
+        n_chunks = len(self.chunks)
+        avg_length = self._total_length / n_chunks or 1
+        
+        scored = []
+        for chunk in self.chunks:
+            score = 0.0
+            for term in query_terms:
+                freq = chunk["terms"].get(term)
+                if not freq:
+                    continue
+                df = self._doc_freq[term]
+                idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * chunk["length"] / avg_length)
+                score += idf * freq * (BM25_K1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((score, chunk))
+                
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {"name": c["name"], "position": c["position"], "content": c["content"], "score": s}
+            for s, c in scored[:top_k]
+        ]
+    
+    def retrieve_excerpts(self, query: str, top_k: int = DOC_TOP_K) -> List[Dict]:
+        """
+        Sélectionne les extraits à fournir au coach pour une question.
+        
+        Les morceaux retenus sont regroupés par document et remis dans l'ordre
+        du texte. Si aucun ne correspond (« Analyse ce document »), on envoie
+        le début de chaque document.
+        
+        Args:
+            query: Question de l'utilisateur
+            top_k: Nombre maximum de morceaux
+            
+        Returns:
+            Extraits [{"name", "content"}], directement utilisables par build_coach_context
+        """
+        results = self.search(query, top_k)
+        if not results:
+            results = [c for c in self.chunks if c["position"] == 0][:top_k]
+            
+        order = {}
+        for chunk in self.chunks:
+            order.setdefault(chunk["name"], len(order))
+        results = sorted(results, key=lambda c: (order[c["name"]], c["position"]))
+        
+        excerpts = []
+        last_position = None
+        for chunk in results:
+            if excerpts and excerpts[-1]["name"] == chunk["name"]:
+                if chunk["position"] == last_position + 1:
+                    # Morceaux consécutifs : ne pas répéter le recouvrement
+                    words = chunk["content"].split()[CHUNK_OVERLAP:]
+                    excerpts[-1]["content"] += " " + " ".join(words)
+                else:
+                    excerpts[-1]["content"] += "\n[...]\n" + chunk["content"]
+            else:
+                excerpts.append({"name": chunk["name"], "content": chunk["content"]})
+            last_position = chunk["position"]
+        return excerpts
@@ -0,0 +1,76 @@
+"""
+Moteur de la Génération Express : exécute les étapes indépendantes en parallèle
+"""
+import asyncio
+import time
+from typing import Dict, Generator, List, Optional
+
+
+def run_express_jobs(
+    llm,
+    jobs: List[Dict],
+    max_concurrency: Optional[int] = None
+) -> Generator[Dict, None, None]:
+    """
+    Lance plusieurs appels LLM indépendants en parallèle.
+
+    Les étapes Express (analyse, CV, lettre, entretien) ne dépendent que du CV
+    et de l'offre : elles peuvent donc tourner en même temps, le temps total
+    devient celui de l'appel le plus long au lieu de la somme des quatre.
+    Les appels sont des coroutines du client asynchrone (pool de connexions
+    partagé du processus) : pas de thread par appel.
+
+    Args:
+        llm: Client LLM asynchrone (AsyncLLMClient)
+        jobs: Liste de dicts {"key", "prompt", "system_prompt", "max_tokens"}
+              ("use_cache": False pour ignorer le cache de réponses)
+        max_concurrency: Nombre d'appels simultanés (défaut: tous les jobs)
+
+    Yields:
+        Un dict par job terminé, dans l'ordre de complétion :
+        {"key", "result", "error", "duration"}
+    """
+    if not jobs:
+        return
+
+    async def _run(job: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await llm.generate(
+                    prompt=job["prompt"],
+                    system_prompt=job.get("system_prompt", ""),
+                    max_tokens=job.get("max_tokens", 4096),
+                    temperature=job.get("temperature", 0.7),
+                    use_cache=job.get("use_cache", True)
+                )
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            return {
+                "key": job["key"],
+                "result": result,
+                "error": error,
+                "duration": time.perf_counter() - start
+            }
+
+    # Boucle propre à l'appel : le thread du script Streamlit n'en a pas
+    loop = asyncio.new_event_loop()
+    pending = set()
+    try:
+        semaphore = asyncio.Semaphore(max_concurrency or len(jobs))
+        pending = {loop.create_task(_run(job, semaphore)) for job in jobs}
+        while pending:
+            done, pending = loop.run_until_complete(
+                asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        # Appelant parti avant la fin (ex: rerun Streamlit) : annuler le reste
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
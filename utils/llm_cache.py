@@ -0,0 +1,163 @@
+"""
+Cache disque des réponses LLM, adressé par le contenu de la requête
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data" / "llm_cache"
+
+
+class LLMResponseCache:
+    """
+    Cache persistant des réponses LLM.
+
+    Chaque réponse est stockée dans un fichier JSON nommé par le SHA-256 de la
+    requête (modèle, système, messages, max_tokens, température). L'éviction
+    est LRU : la date de modification du fichier est rafraîchie à chaque hit et
+    les fichiers les plus anciens sont supprimés quand le cache dépasse
+    `max_entries` ou `max_size_mb`. Les entrées plus vieilles que `ttl` secondes
+    sont ignorées et supprimées.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_entries: int = 500,
+        max_size_mb: float = 50,
+        ttl: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Initialise le cache.
+
+        Args:
+            cache_dir: Répertoire de stockage (défaut: data/llm_cache)
+            max_entries: Nombre maximum de réponses conservées
+            max_size_mb: Taille disque maximale du cache
+            ttl: Durée de vie d'une entrée en secondes (None = illimitée)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system,
+        messages: list,
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[list] = None
+    ) -> str:
+        """Calcule la clé (SHA-256) d'une requête."""
+        request = {
+            "model": model,
+            "system": system,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if tools:
+            request["tools"] = tools
+
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Retourne la réponse en cache ou None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            if self.ttl is not None and time.time() - entry.get("created_at", 0) > self.ttl:
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+
+            # Rafraîchir la date d'accès pour l'éviction LRU
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return entry.get("response")
+
+    def set(self, key: str, response: str) -> None:
+        """Enregistre une réponse dans le cache."""
+        entry = {"created_at": time.time(), "response": response}
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError:
+                # Cache facultatif : une écriture impossible vaut un miss
+                tmp_path.unlink(missing_ok=True)
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées si le cache déborde."""
+        files = []
+        total_size = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        files.sort()
+        while files and (len(files) > self.max_entries or total_size > self.max_size_bytes):
+            _, size, path = files.pop(0)
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """Vide entièrement le cache."""
+        with self._lock:
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        """Retourne les compteurs de hits/misses."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Instance globale (singleton), partagée par toutes les sessions
+_llm_cache = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Retourne le cache de réponses partagé, ou None s'il est désactivé
+    (variable d'environnement LLM_CACHE_ENABLED=false).
+    """
+    global _llm_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(cache_dir=os.getenv("LLM_CACHE_DIR") or None)
+    return _llm_cache
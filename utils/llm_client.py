@@ -1,69 +1,349 @@
 """
 Client LLM pour les appels à Anthropic Claude
 """
-import os
+import json
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Generator, Optional
-import anthropic
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 
+from .llm_cache import LLMResponseCache
+from .llm_pool import get_sync_client
+from .rate_limiter import RateLimiter, get_rate_limiter, without_sdk_retries
+from .structured_output import IncrementalObjectParser, conform_to_schema
+from .tokenizer import count_payload_tokens
+
 # Charger les variables d'environnement depuis le fichier .env du projet
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
 
+# Marqueur de cache Anthropic : tout ce qui précède ce bloc est mis en cache
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Balise ouvrant la partie variable des prompts de tâches (l'offre, toujours en dernier)
+VARIABLE_SECTION_MARKER = "<offre_emploi>"
+
+
+def build_system_blocks(system_prompt: str, *contexts: str) -> List[Dict]:
+    """
+    Construit un prompt système structuré dont le préfixe stable est cacheable.
+    
+    Args:
+        system_prompt: Le prompt système de la tâche
+        *contexts: Contextes stables ajoutés à la suite (CV, documents...)
+        
+    Returns:
+        Liste de blocs texte, le dernier portant le marqueur cache_control
+    """
+    blocks = [
+        {"type": "text", "text": text}
+        for text in (system_prompt, *contexts)
+        if text
+    ]
+    if blocks:
+        blocks[-1]["cache_control"] = CACHE_CONTROL
+    return blocks
+
+
+def split_cacheable_prompt(
+    prompt: str,
+    marker: str = VARIABLE_SECTION_MARKER
+) -> Union[str, List[Dict]]:
+    """
+    Découpe un prompt en un préfixe stable (consignes + CV) mis en cache
+    et une partie variable (l'offre), placée en dernier dans les templates.
+    
+    Args:
+        prompt: Prompt déjà formaté
+        marker: Début de la partie variable
+        
+    Returns:
+        Liste de deux blocs texte, ou le prompt inchangé si le marqueur est absent
+    """
+    index = prompt.find(marker)
+    if index <= 0:
+        return prompt
+        
+    return [
+        {"type": "text", "text": prompt[:index], "cache_control": CACHE_CONTROL},
+        {"type": "text", "text": prompt[index:]}
+    ]
+
+
+def new_usage_counters() -> Dict[str, int]:
+    """Compteurs d'usage d'un client : appels API et tokens facturés."""
+    return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0}
+
 
 class LLMClient:
     """Client pour interagir avec l'API Anthropic Claude."""
     
-    def __init__(self, model: str = "claude-sonnet-4-20250514"):
+    def __init__(
+        self,
+        model: str = "claude-sonnet-4-20250514",
+        cache: Optional[LLMResponseCache] = None,
+        client=None,
+        limiter: Optional[RateLimiter] = None
+    ):
         """
         Initialise le client LLM.
         
         Args:
             model: Modèle Anthropic à utiliser
+            cache: Cache de réponses optionnel (aucun cache si None)
+            client: Client Anthropic déjà construit (ex: stub local, ou
+                    anthropic.Anthropic(base_url=...) vers un faux serveur de test)
+            limiter: Limiteur de débit (défaut: celui partagé par tout le processus)
         """
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            raise ValueError("ANTHROPIC_API_KEY non trouvée dans les variables d'environnement")
-        
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        if client is not None:
+            self.client = without_sdk_retries(client)
+        else:
+            # Client HTTP partagé par toutes les sessions (pool de connexions commun)
+            self.client = get_sync_client()
         self.model = model
+        self.cache = cache
+        self.limiter = limiter or get_rate_limiter()
+        self.usage = new_usage_counters()
     
-    def generate(
+    def build_request(
         self,
-        prompt: str,
-        system_prompt: str = "",
+        messages: list,
+        system_prompt: Union[str, List[Dict]] = "",
         max_tokens: int = 4096,
         temperature: float = 0.7
+    ) -> Dict:
+        """
+        Construit les paramètres envoyés à messages.create / messages.stream.
+        
+        Args:
+            messages: Liste de messages (contenu texte ou liste de blocs)
+            system_prompt: Prompt système texte ou blocs (voir build_system_blocks)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            
+        Returns:
+            Dict de paramètres pour l'API
+        """
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "system": system_prompt if system_prompt else "",
+            "messages": messages,
+            "temperature": temperature
+        }
+    
+    def _record_usage(self, response, estimated_input_tokens: int) -> None:
+        """Débite l'usage réel d'une réponse auprès du limiteur de débit."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        input_tokens = usage.input_tokens + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+        self.limiter.record_usage(input_tokens, usage.output_tokens, estimated_input_tokens)
+        
+        # Compteurs propres à ce client (ex: un client par offre dans le traitement par lot)
+        self.usage["calls"] += 1
+        self.usage["input_tokens"] += input_tokens
+        self.usage["output_tokens"] += usage.output_tokens
+        self.usage["cache_read_input_tokens"] += getattr(usage, "cache_read_input_tokens", 0) or 0
+    
+    def _send(self, request: Dict):
+        """Envoie une requête sous contrôle du limiteur (débit + reprises)."""
+        estimated = count_payload_tokens([request["system"], request["messages"]])
+        response = self.limiter.call(lambda: self.client.messages.create(**request), estimated)
+        self._record_usage(response, estimated)
+        return response
+    
+    @contextmanager
+    def _open_stream(self, request: Dict):
+        """Ouvre un flux sous contrôle du limiteur (reprises tant que rien n'a été reçu)."""
+        estimated = count_payload_tokens([request["system"], request["messages"]])
+        with ExitStack() as stack:
+            stream = self.limiter.call(
+                lambda: stack.enter_context(self.client.messages.stream(**request)),
+                estimated
+            )
+            yield stream
+            self._record_usage(stream.get_final_message(), estimated)
+    
+    def _create(self, request: Dict, use_cache: bool) -> str:
+        """Appelle l'API en passant par le cache de réponses s'il est actif."""
+        key = None
+        if self.cache is not None and use_cache:
+            key = LLMResponseCache.make_key(
+                request["model"],
+                request["system"],
+                request["messages"],
+                request["max_tokens"],
+                request["temperature"]
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+                
+        response = self._send(request)
+        text = response.content[0].text
+        
+        if key is not None:
+            self.cache.set(key, text)
+            
+        return text
+    
+    def generate(
+        self,
+        prompt: Union[str, List[Dict]],
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        use_cache: bool = True
     ) -> str:
         """
         Génère une réponse complète.
         
         Args:
-            prompt: Le prompt utilisateur
-            system_prompt: Le prompt système
+            prompt: Le prompt utilisateur (texte ou blocs, voir split_cacheable_prompt)
+            system_prompt: Le prompt système (texte ou blocs)
             max_tokens: Nombre maximum de tokens
             temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
             
         Returns:
             La réponse générée
         """
         messages = [{"role": "user", "content": prompt}]
         
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt if system_prompt else "",
-            messages=messages,
-            temperature=temperature
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        return self._create(request, use_cache)
+    
+    def _structured_request(
+        self,
+        prompt: Union[str, List[Dict]],
+        tool: Dict,
+        system_prompt: Union[str, List[Dict]],
+        max_tokens: int,
+        temperature: float,
+        use_cache: bool
+    ):
+        """Construit une requête à appel d'outil forcé et sa clé de cache éventuelle."""
+        messages = [{"role": "user", "content": prompt}]
+        
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        request["tools"] = [tool]
+        request["tool_choice"] = {"type": "tool", "name": tool["name"]}
+        
+        key = None
+        if self.cache is not None and use_cache:
+            key = LLMResponseCache.make_key(
+                request["model"],
+                request["system"],
+                request["messages"],
+                request["max_tokens"],
+                request["temperature"],
+                tools=request["tools"]
+            )
+        return request, key
+    
+    def generate_structured(
+        self,
+        prompt: Union[str, List[Dict]],
+        tool: Dict,
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> Dict:
+        """
+        Génère une réponse structurée via un appel d'outil forcé (tool use).
+        
+        Le modèle remplit directement l'entrée de l'outil : pas de JSON à
+        extraire du texte, et les champs non conformes au schéma sont retirés
+        au lieu de faire échouer la réponse entière.
+        
+        Args:
+            prompt: Le prompt utilisateur (texte ou blocs)
+            tool: Définition de l'outil (name, description, input_schema)
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
+            
+        Returns:
+            Dict validé contre tool["input_schema"] (vide si aucun appel d'outil)
+        """
+        request, key = self._structured_request(
+            prompt, tool, system_prompt, max_tokens, temperature, use_cache
+        )
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        response = self._send(request)
+        data = next(
+            (block.input for block in response.content if block.type == "tool_use"),
+            None
+        )
+        result = conform_to_schema(data, tool["input_schema"]) or {}
+        
+        if key is not None and result:
+            self.cache.set(key, json.dumps(result, ensure_ascii=False))
+        
+        return result
+    
+    def generate_structured_stream(
+        self,
+        prompt: Union[str, List[Dict]],
+        tool: Dict,
+        system_prompt: Union[str, List[Dict]] = "",
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> Generator[Tuple[str, Any], None, None]:
+        """
+        Variante streaming de generate_structured.
+        
+        L'entrée de l'outil arrive par fragments JSON : chaque champ de premier
+        niveau est émis dès qu'il est complet et conforme au schéma.
+        
+        Args:
+            prompt: Le prompt utilisateur (texte ou blocs)
+            tool: Définition de l'outil (name, description, input_schema)
+            system_prompt: Le prompt système (texte ou blocs)
+            max_tokens: Nombre maximum de tokens
+            temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
+            
+        Yields:
+            Tuples (champ, valeur) dans l'ordre de génération
+        """
+        schema = tool["input_schema"]
+        request, key = self._structured_request(
+            prompt, tool, system_prompt, max_tokens, temperature, use_cache
         )
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield from json.loads(cached).items()
+                return
+        
+        parser = IncrementalObjectParser()
+        result = {}
+        with self._open_stream(request) as stream:
+            for event in stream:
+                if event.type != "content_block_delta" or event.delta.type != "input_json_delta":
+                    continue
+                for field, value in parser.feed(event.delta.partial_json).items():
+                    conformed = conform_to_schema({field: value}, schema)
+                    if conformed:
+                        result.update(conformed)
+                        yield field, conformed[field]
         
-        return response.content[0].text
+        if key is not None and result:
+            self.cache.set(key, json.dumps(result, ensure_ascii=False))
     
     def generate_stream(
         self,
-        prompt: str,
-        system_prompt: str = "",
+        prompt: Union[str, List[Dict]],
+        system_prompt: Union[str, List[Dict]] = "",
         max_tokens: int = 4096,
         temperature: float = 0.7
     ) -> Generator[str, None, None]:
@@ -71,8 +351,8 @@ class LLMClient:
         Génère une réponse en streaming.
         
         Args:
-            prompt: Le prompt utilisateur
-            system_prompt: Le prompt système
+            prompt: Le prompt utilisateur (texte ou blocs)
+            system_prompt: Le prompt système (texte ou blocs)
             max_tokens: Nombre maximum de tokens
             temperature: Température de génération
             
@@ -81,49 +361,39 @@ class LLMClient:
         """
         messages = [{"role": "user", "content": prompt}]
         
-        with self.client.messages.stream(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt if system_prompt else "",
-            messages=messages,
-            temperature=temperature
-        ) as stream:
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        with self._open_stream(request) as stream:
             for text in stream.text_stream:
                 yield text
     
     def chat(
         self,
         messages: list,
-        system_prompt: str = "",
+        system_prompt: Union[str, List[Dict]] = "",
         max_tokens: int = 4096,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        use_cache: bool = True
     ) -> str:
         """
         Conversation multi-tours.
         
         Args:
             messages: Liste de messages [{"role": "user/assistant", "content": "..."}]
-            system_prompt: Le prompt système
+            system_prompt: Le prompt système (texte ou blocs)
             max_tokens: Nombre maximum de tokens
             temperature: Température de génération
+            use_cache: False pour ignorer le cache et forcer un nouvel appel
             
         Returns:
             La réponse générée
         """
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt if system_prompt else "",
-            messages=messages,
-            temperature=temperature
-        )
-        
-        return response.content[0].text
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        return self._create(request, use_cache)
     
     def chat_stream(
         self,
         messages: list,
-        system_prompt: str = "",
+        system_prompt: Union[str, List[Dict]] = "",
         max_tokens: int = 4096,
         temperature: float = 0.7
     ) -> Generator[str, None, None]:
@@ -132,20 +402,14 @@ class LLMClient:
         
         Args:
             messages: Liste de messages
-            system_prompt: Le prompt système
+            system_prompt: Le prompt système (texte ou blocs)
             max_tokens: Nombre maximum de tokens
             temperature: Température de génération
             
         Yields:
             Morceaux de texte au fur et à mesure
         """
-        with self.client.messages.stream(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt if system_prompt else "",
-            messages=messages,
-            temperature=temperature
-        ) as stream:
+        request = self.build_request(messages, system_prompt, max_tokens, temperature)
+        with self._open_stream(request) as stream:
             for text in stream.text_stream:
                 yield text
-
@@ -0,0 +1,145 @@
+"""
+Pool de connexions HTTP partagé par tous les clients LLM du processus
+"""
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import anthropic
+import httpx
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement
+env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(env_path)
+
+# Limites par défaut du pool (surchargées par variables d'environnement)
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", "600"))
+
+
+class AsyncConnectionPool:
+    """
+    Client AsyncAnthropic unique, servi par une boucle asyncio dédiée.
+    
+    Un client httpx asynchrone est lié à la boucle qui l'utilise : chaque
+    session Streamlit (un thread, une boucle) ne peut donc pas le partager
+    directement. Toutes les requêtes sont exécutées sur la boucle du pool,
+    les appelants attendent le résultat depuis leur propre boucle.
+    """
+    
+    def __init__(
+        self,
+        api_key: str,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = POOL_MAX_KEEPALIVE,
+        timeout: float = POOL_TIMEOUT
+    ):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="llm-connection-pool",
+            daemon=True
+        )
+        self._thread.start()
+        
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        # Les reprises sont gérées par utils.rate_limiter
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=self.limits, timeout=timeout)
+        )
+    
+    def submit(self, coro):
+        """Planifie une coroutine sur la boucle du pool (concurrent.futures.Future)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def close(self) -> None:
+        """Ferme les connexions et arrête la boucle du pool."""
+        self.submit(self.client.close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_lock = threading.Lock()
+_sync_client = None
+_async_pool = None
+
+
+def _get_api_key() -> str:
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY non trouvée dans les variables d'environnement")
+    return api_key
+
+
+def get_sync_client() -> anthropic.Anthropic:
+    """Retourne le client Anthropic synchrone partagé par toutes les sessions."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            limits = httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE
+            )
+            # Les reprises sont gérées par utils.rate_limiter
+            _sync_client = anthropic.Anthropic(
+                api_key=_get_api_key(),
+                max_retries=0,
+                http_client=httpx.Client(limits=limits, timeout=POOL_TIMEOUT)
+            )
+        return _sync_client
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """Retourne le pool asynchrone partagé, créé au premier appel."""
+    global _async_pool
+    with _lock:
+        if _async_pool is None:
+            _async_pool = AsyncConnectionPool(
+                api_key=_get_api_key(),
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                timeout=POOL_TIMEOUT
+            )
+        return _async_pool
+
+
+def configure_pool(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> None:
+    """
+    Modifie les limites du pool. À appeler avant de créer les clients LLM :
+    le pool asynchrone existant est fermé (sa boucle et ses connexions), les
+    clients créés ensuite utilisent un pool aux nouvelles limites. Les
+    clients synchrones déjà distribués gardent leur client HTTP.
+    
+    Args:
+        max_connections: Nombre maximum de connexions simultanées
+        max_keepalive_connections: Connexions gardées ouvertes au repos
+        timeout: Timeout des requêtes en secondes
+    """
+    global POOL_MAX_CONNECTIONS, POOL_MAX_KEEPALIVE, POOL_TIMEOUT, _sync_client, _async_pool
+    with _lock:
+        old_pool = _async_pool
+        if max_connections is not None:
+            POOL_MAX_CONNECTIONS = max_connections
+        if max_keepalive_connections is not None:
+            POOL_MAX_KEEPALIVE = max_keepalive_connections
+        if timeout is not None:
+            POOL_TIMEOUT = timeout
+            
+        _sync_client = None
+        _async_pool = None
+        
+    if old_pool is not None:
+        old_pool.close()
@@ -0,0 +1,152 @@
+"""
+Cache du texte extrait des PDF, adressé par le contenu du fichier
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class PDFTextCache:
+    """
+    Cache du texte extrait des PDF, à deux niveaux.
+    
+    La clé est le SHA-256 des octets du fichier : un même PDF resté dans un
+    `st.file_uploader` n'est donc pas ré-analysé à chaque rerun. Le niveau
+    mémoire est un LRU borné en nombre d'entrées ; le niveau disque, optionnel,
+    conserve les textes entre deux redémarrages (un fichier .txt par PDF,
+    éviction LRU par date de modification).
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 64,
+        cache_dir: Optional[str] = None,
+        max_disk_entries: int = 500
+    ):
+        """
+        Initialise le cache.
+        
+        Args:
+            max_entries: Nombre de textes conservés en mémoire
+            cache_dir: Répertoire du niveau disque (None = mémoire uniquement)
+            max_disk_entries: Nombre de textes conservés sur disque
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(pdf_bytes: bytes, variant: str = "") -> str:
+        """
+        Calcule la clé (SHA-256) d'un fichier PDF.
+        
+        Args:
+            pdf_bytes: Contenu binaire du PDF
+            variant: Mode d'extraction, pour ne pas mélanger des textes produits différemment
+        """
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return f"{digest}-{variant}" if variant else digest
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.txt"
+    
+    def _remember(self, key: str, text: str) -> None:
+        """Ajoute une entrée au niveau mémoire (appelé sous verrou)."""
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[str]:
+        """Retourne le texte en cache ou None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+                
+            if self.cache_dir:
+                path = self._path(key)
+                try:
+                    text = path.read_text(encoding="utf-8")
+                    os.utime(path, None)
+                except OSError:
+                    text = None
+                if text is not None:
+                    self._remember(key, text)
+                    self.hits += 1
+                    return text
+                    
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, text: str) -> None:
+        """Enregistre le texte extrait d'un PDF."""
+        with self._lock:
+            self._remember(key, text)
+            if not self.cache_dir:
+                return
+                
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                tmp_path.write_text(text, encoding="utf-8")
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Erreur écriture cache PDF: {e}")
+                return
+            self._evict_disk()
+    
+    def _evict_disk(self) -> None:
+        """Supprime les fichiers les moins récemment utilisés au-delà de max_disk_entries."""
+        files = []
+        for path in self.cache_dir.glob("*.txt"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+                
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            path.unlink(missing_ok=True)
+    
+    def clear(self) -> None:
+        """Vide les deux niveaux du cache."""
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir:
+                for path in self.cache_dir.glob("*.txt"):
+                    path.unlink(missing_ok=True)
+    
+    def stats(self) -> Dict:
+        """Retourne les compteurs de hits/misses et la taille du niveau mémoire."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._memory)}
+
+
+# Instance globale (singleton), partagée par toutes les sessions
+_pdf_cache = None
+
+
+def get_pdf_cache() -> Optional[PDFTextCache]:
+    """
+    Retourne le cache d'extraction partagé, ou None s'il est désactivé
+    (PDF_CACHE_ENABLED=false). Le niveau disque est activé par PDF_CACHE_DIR.
+    """
+    global _pdf_cache
+    if os.getenv("PDF_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _pdf_cache is None:
+        _pdf_cache = PDFTextCache(
+            max_entries=int(os.getenv("PDF_CACHE_MAX_ENTRIES", "64")),
+            cache_dir=os.getenv("PDF_CACHE_DIR") or None
+        )
+    return _pdf_cache
@@ -2,93 +2,470 @@
 Utilitaire pour extraire le texte des fichiers PDF
 """
 import io
-from typing import Optional
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from .pdf_cache import get_pdf_cache
 
-def extract_text_from_pdf(pdf_file) -> str:
+# En dessous de ces seuils, le coût de lancement des processus domine : extraction séquentielle
+PARALLEL_MIN_BYTES = int(os.getenv("PDF_PARALLEL_MIN_BYTES", str(200 * 1024)))
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+# Nombre de processus d'extraction (défaut: nombre de cœurs)
+PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", "0")) or os.cpu_count() or 1
+
+# Limite de caractères à partir de laquelle une lecture limitée irait loin dans
+# le document : extraction parallèle complète puis troncature, plutôt que page à page
+PARALLEL_MIN_LIMIT_CHARS = int(os.getenv("PDF_PARALLEL_MIN_LIMIT_CHARS", "50000"))
+
+
+# Moteur d'extraction : "tiered" (PyPDF2, puis pdfplumber pour les pages complexes),
+# "pdfplumber" (toutes les pages) ou "pypdf2" (toutes les pages)
+EXTRACTION_MODE = os.getenv("PDF_EXTRACTION_MODE", "tiered").lower()
+
+_SPACED_GAP = re.compile(r"\S(?: {3,}|\t)\S")
+_NUMERIC_LINE = re.compile(r"^[\d\s.,:;/%€$()+-]+$")
+
+
+def _layout_issue(text: str) -> Optional[str]:
     """
-    Extrait le texte d'un fichier PDF uploadé via Streamlit.
+    Détecte une page que la passe rapide de PyPDF2 restitue mal.
     
     Args:
-        pdf_file: Fichier uploadé via st.file_uploader
+        text: Texte extrait par PyPDF2
         
     Returns:
-        Texte extrait du PDF
+        "texte illisible", "tableau" ou "colonnes", None si le texte est exploitable
     """
-    text = ""
-    
+    stripped = text.strip()
+    if not stripped:
+        # Page scannée ou vide : pdfplumber n'en tirerait rien de plus
+        return None
+        
+    # Glyphes non décodés, caractères de remplacement, lettres espacées
+    if "(cid:" in stripped or stripped.count("\ufffd") > 3:
+        return "texte illisible"
+    visible = [c for c in stripped if not c.isspace()]
+    if sum(c.isalnum() for c in visible) < 0.6 * len(visible):
+        return "texte illisible"
+    words = stripped.split()
+    if len(words) >= 20 and sum(len(w) == 1 for w in words) > 0.4 * len(words):
+        return "texte illisible"
+        
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    if len(lines) < 4:
+        return None
+        
+    # Cellules alignées : espaces multiples ou lignes de chiffres
+    gapped = sum(1 for line in lines if _SPACED_GAP.search(line))
+    numeric = sum(1 for line in lines if _NUMERIC_LINE.match(line.strip()))
+    if gapped >= 3 and gapped > 0.2 * len(lines):
+        return "tableau"
+    if numeric > 0.3 * len(lines):
+        return "tableau"
+        
+    # Colonnes découpées ligne à ligne : beaucoup de lignes très courtes
+    short = sum(1 for line in lines if len(line.strip()) < 25)
+    if len(lines) >= 15 and short > 0.6 * len(lines):
+        return "colonnes"
+        
+    return None
+
+
+def _import_engines():
+    """Retourne les modules (pdfplumber, PdfReader) disponibles, None sinon."""
     try:
-        # Essayer avec pdfplumber d'abord (meilleur pour les tableaux)
         import pdfplumber
+    except ImportError:
+        pdfplumber = None
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        PdfReader = None
+    if pdfplumber is None and PdfReader is None:
+        raise ImportError("Ni pdfplumber ni PyPDF2 ne sont installés")
+    return pdfplumber, PdfReader
+
+
+def _iter_page_results(source, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Extrait une plage de pages d'un PDF, une page à la fois, avec le moteur utilisé.
+    
+    En mode "tiered", chaque page passe d'abord par PyPDF2 ; elle n'est
+    ré-extraite avec pdfplumber (analyse de mise en page, plusieurs fois plus
+    lente) que si _layout_issue signale un tableau, des colonnes ou un texte
+    illisible.
+    
+    Args:
+        source: Chemin ou flux binaire du PDF
+        start: Index de la première page
+        end: Index de fin exclu (None = dernière page)
         
-        pdf_bytes = io.BytesIO(pdf_file.read())
-        pdf_file.seek(0)  # Reset pour utilisation ultérieure
+    Yields:
+        {"page": numéro (à partir de 1), "text": texte, "engine": moteur, "reason": motif de l'escalade}
+    """
+    # Choisir les moteurs avant de produire la première page : une ImportError
+    # levée en cours de route ne doit pas relancer l'extraction avec l'autre
+    pdfplumber, PdfReader = _import_engines()
+    mode = EXTRACTION_MODE
+    if PdfReader is None:
+        mode = "pdfplumber"
+    elif pdfplumber is None:
+        mode = "pypdf2"
         
-        with pdfplumber.open(pdf_bytes) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-                    
-    except ImportError:
-        # Fallback sur PyPDF2
-        try:
-            from PyPDF2 import PdfReader
-            
-            pdf_bytes = io.BytesIO(pdf_file.read())
-            pdf_file.seek(0)
-            
-            reader = PdfReader(pdf_bytes)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-                    
-        except Exception as e:
-            text = f"Erreur lors de l'extraction du PDF: {str(e)}"
+    # Chaque moteur lit sa propre copie du flux
+    if hasattr(source, "read"):
+        data = source.read()
+        open_source = lambda: io.BytesIO(data)
+    else:
+        open_source = lambda: source
+        
+    if mode == "pdfplumber":
+        with pdfplumber.open(open_source()) as pdf:
+            for number, page in enumerate(pdf.pages[start:end], start + 1):
+                yield {"page": number, "text": page.extract_text() or "", "engine": "pdfplumber", "reason": None}
+                # Libérer les objets de mise en page déjà analysés
+                if hasattr(page, "close"):
+                    page.close()
+        return
+        
+    reader = PdfReader(open_source())
+    plumber_pdf = None
+    try:
+        for number, page in enumerate(reader.pages[start:end], start + 1):
+            text = page.extract_text() or ""
+            reason = _layout_issue(text) if mode == "tiered" else None
+            if reason is None:
+                yield {"page": number, "text": text, "engine": "pypdf2", "reason": None}
+                continue
+                
+            # Le document n'est ouvert avec pdfplumber qu'à la première page complexe
+            if plumber_pdf is None:
+                plumber_pdf = pdfplumber.open(open_source())
+            plumber_page = plumber_pdf.pages[number - 1]
+            yield {"page": number, "text": plumber_page.extract_text() or "", "engine": "pdfplumber", "reason": reason}
+            if hasattr(plumber_page, "close"):
+                plumber_page.close()
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+
+
+def _iter_pages(source, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Extrait le texte d'une plage de pages d'un PDF, une page à la fois.
     
-    except Exception as e:
-        text = f"Erreur lors de l'extraction du PDF: {str(e)}"
+    Args:
+        source: Chemin ou flux binaire du PDF
+        start: Index de la première page
+        end: Index de fin exclu (None = dernière page)
+        
+    Yields:
+        Texte de chaque page (chaîne vide pour une page sans texte)
+    """
+    for result in _iter_page_results(source, start, end):
+        yield result["text"]
+
+
+def _extract_pages(source, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    Extrait le texte d'une plage de pages d'un PDF.
     
-    return text.strip()
+    Args:
+        source: Chemin ou flux binaire du PDF
+        start: Index de la première page
+        end: Index de fin exclu (None = dernière page)
+        
+    Returns:
+        Texte de chaque page (chaîne vide pour une page sans texte)
+    """
+    return list(_iter_pages(source, start, end))
+
+
+def _page_count(source) -> int:
+    """Retourne le nombre de pages d'un PDF."""
+    pdfplumber, PdfReader = _import_engines()
+    if PdfReader is not None:
+        return len(PdfReader(source).pages)
+        
+    with pdfplumber.open(source) as pdf:
+        return len(pdf.pages)
+
+
+def _join_pages(pages: List[str]) -> str:
+    """Assemble le texte des pages (pages vides ignorées, séparées par une ligne vide)."""
+    return "".join(page + "\n\n" for page in pages if page).strip()
 
 
-def extract_text_from_pdf_path(pdf_path: str) -> str:
+def _join_pages_limited(
+    pages: Iterator[str],
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> Tuple[str, bool]:
     """
-    Extrait le texte d'un fichier PDF à partir de son chemin.
+    Assemble le texte des pages en arrêtant la lecture dès qu'une limite est atteinte.
+    
+    Le résultat est exactement le préfixe de _join_pages(toutes les pages).
     
     Args:
-        pdf_path: Chemin vers le fichier PDF
+        pages: Itérateur paresseux sur le texte des pages
+        max_chars: Nombre maximum de caractères (None = tout)
+        max_pages: Nombre maximum de pages à lire (None = toutes)
+        
+    Returns:
+        (texte tronqué à max_chars, True si tout le document a été lu)
+    """
+    kept = []
+    length = 0
+    read = 0
+    complete = True
+    for page in pages:
+        read += 1
+        if page:
+            kept.append(page)
+            length += len(page) + 2
+        if max_chars is not None and length >= max_chars and len(_join_pages(kept)) >= max_chars:
+            complete = False
+            break
+        if max_pages is not None and read >= max_pages:
+            # Impossible de savoir sans lire la suite s'il restait des pages
+            complete = False
+            break
+            
+    text = _join_pages(kept)
+    return (text[:max_chars] if max_chars is not None else text), complete
+
+
+def _extract_text(source) -> str:
+    """
+    Extrait le texte de toutes les pages d'un PDF.
+    
+    Args:
+        source: Chemin ou flux binaire du PDF
         
     Returns:
         Texte extrait du PDF
     """
-    text = ""
+    return _join_pages(_extract_pages(source))
+
+
+# Pool de processus partagé, créé à la première extraction parallèle
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # "spawn" : un fork du serveur Streamlit, qui a déjà plusieurs
+            # threads, peut hériter d'un verrou pris et bloquer le processus
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PARALLEL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, end: int) -> List[str]:
+    """Tâche exécutée dans un processus du pool : extrait les pages [start, end)."""
+    return _extract_pages(io.BytesIO(pdf_bytes), start, end)
+
+
+def _extract_text_parallel(pdf_bytes: bytes, workers: int = None) -> str:
+    """
+    Extrait le texte en répartissant des plages de pages sur un pool de processus.
+    
+    Le résultat est identique à l'extraction séquentielle : les pages sont
+    réassemblées dans l'ordre. Les petits fichiers sont traités directement.
+    
+    Args:
+        pdf_bytes: Contenu binaire du PDF
+        workers: Nombre de plages (défaut: PARALLEL_WORKERS)
+        
+    Returns:
+        Texte extrait du PDF
+    """
+    workers = workers or PARALLEL_WORKERS
+    if workers < 2 or len(pdf_bytes) < PARALLEL_MIN_BYTES:
+        return _extract_text(io.BytesIO(pdf_bytes))
+        
+    n_pages = _page_count(io.BytesIO(pdf_bytes))
+    if n_pages < PARALLEL_MIN_PAGES:
+        return _extract_text(io.BytesIO(pdf_bytes))
+        
+    # Plages contiguës de tailles équilibrées
+    size = -(-n_pages // workers)
+    ranges = [(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
     
     try:
-        import pdfplumber
+        pool = _get_process_pool()
+        futures = [pool.submit(_extract_page_range, pdf_bytes, start, end) for start, end in ranges]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+    except BrokenProcessPool as e:
+        print(f"Pool d'extraction PDF indisponible, extraction séquentielle: {e}")
+        return _extract_text(io.BytesIO(pdf_bytes))
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-                    
-    except ImportError:
-        try:
-            from PyPDF2 import PdfReader
+    return _join_pages(pages)
+
+
+def _extract_text_cached(
+    pdf_bytes: bytes,
+    parallel: bool = True,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extrait le texte d'un PDF en passant par le cache (clé : SHA-256 des octets).
+    
+    Avec une petite limite (max_pages, ou max_chars sous
+    PARALLEL_MIN_LIMIT_CHARS), les pages sont lues une à une et l'analyse
+    s'arrête dès que la limite est atteinte. Si la lecture limitée a tout de
+    même parcouru tout le document, le texte complet est mis en cache ; sinon
+    le préfixe lu est mis en cache sous une clé propre à la limite. Une grande
+    limite en caractères (ex: documents du coach) passe par l'extraction
+    complète, parallèle pour les gros fichiers, et le texte est tronqué.
+    
+    Args:
+        pdf_bytes: Contenu binaire du PDF
+        parallel: Répartir les pages sur le pool de processus (gros fichiers)
+        max_chars: Nombre maximum de caractères à extraire
+        max_pages: Nombre maximum de pages à lire
+        
+    Returns:
+        Texte extrait du PDF
+    """
+    lazy = max_pages is not None or (
+        max_chars is not None and (not parallel or max_chars < PARALLEL_MIN_LIMIT_CHARS)
+    )
+    cache = get_pdf_cache()
+    key = cache.make_key(pdf_bytes, EXTRACTION_MODE) if cache is not None else None
+    
+    # Le texte complet en cache sert aussi les demandes limitées en caractères
+    if key is not None and max_pages is None:
+        text = cache.get(key)
+        if text is not None:
+            return text[:max_chars] if max_chars is not None else text
             
-            reader = PdfReader(pdf_path)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-                    
-        except Exception as e:
-            text = f"Erreur lors de l'extraction du PDF: {str(e)}"
+    if not lazy:
+        if parallel:
+            text = _extract_text_parallel(pdf_bytes)
+        else:
+            text = _extract_text(io.BytesIO(pdf_bytes))
+        if key is not None:
+            cache.set(key, text)
+        return text[:max_chars] if max_chars is not None else text
+        
+    limited_key = None
+    if cache is not None:
+        limited_key = cache.make_key(pdf_bytes, f"{EXTRACTION_MODE}-chars{max_chars}-pages{max_pages}")
+        text = cache.get(limited_key)
+        if text is not None:
+            return text
+            
+    text, complete = _join_pages_limited(_iter_pages(io.BytesIO(pdf_bytes)), max_chars, max_pages)
+    if cache is not None:
+        if complete:
+            # Le texte est complet : il sert aussi les lectures sans limite
+            cache.set(key, text)
+        else:
+            cache.set(limited_key, text)
+    return text
+
+
+def _as_source(pdf):
+    """Convertit un upload Streamlit ou un contenu binaire en flux lisible par les moteurs."""
+    if hasattr(pdf, "read"):
+        pdf_bytes = pdf.read()
+        pdf.seek(0)  # Reset pour utilisation ultérieure
+        pdf = pdf_bytes
+    if isinstance(pdf, (bytes, bytearray)):
+        pdf = io.BytesIO(pdf)
+    return pdf
+
+
+def iter_pdf_pages(pdf, max_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Générateur du texte d'un PDF, page par page, analysé à la demande.
     
-    except Exception as e:
-        text = f"Erreur lors de l'extraction du PDF: {str(e)}"
+    Args:
+        pdf: Fichier uploadé via st.file_uploader, contenu binaire ou chemin
+        max_pages: Nombre maximum de pages à lire
+        
+    Yields:
+        Texte de chaque page (chaîne vide pour une page sans texte)
+    """
+    yield from _iter_pages(_as_source(pdf), 0, max_pages)
+
+
+def extract_pdf_pages(pdf, max_pages: Optional[int] = None) -> List[Dict]:
+    """
+    Extrait un PDF page par page en indiquant le moteur utilisé pour chacune.
     
-    return text.strip()
+    Args:
+        pdf: Fichier uploadé via st.file_uploader, contenu binaire ou chemin
+        max_pages: Nombre maximum de pages à lire
+        
+    Returns:
+        Liste de {"page", "text", "engine" ("pypdf2" ou "pdfplumber"), "reason"}
+    """
+    return list(_iter_page_results(_as_source(pdf), 0, max_pages))
 
+
+def extract_text_from_pdf(
+    pdf_file,
+    parallel: bool = True,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extrait le texte d'un fichier PDF uploadé via Streamlit.
+    
+    Args:
+        pdf_file: Fichier uploadé via st.file_uploader
+        parallel: Extraire les pages en parallèle pour les gros fichiers
+        max_chars: Arrêter l'extraction après ce nombre de caractères
+        max_pages: Arrêter l'extraction après ce nombre de pages
+        
+    Returns:
+        Texte extrait du PDF
+    """
+    try:
+        pdf_bytes = pdf_file.read()
+        pdf_file.seek(0)  # Reset pour utilisation ultérieure
+        return _extract_text_cached(pdf_bytes, parallel, max_chars, max_pages)
+    except Exception as e:
+        return f"Erreur lors de l'extraction du PDF: {str(e)}"
+
+
+def extract_text_from_pdf_path(
+    pdf_path: str,
+    parallel: bool = True,
+    max_chars: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extrait le texte d'un fichier PDF à partir de son chemin.
+    
+    Args:
+        pdf_path: Chemin vers le fichier PDF
+        parallel: Extraire les pages en parallèle pour les gros fichiers
+        max_chars: Arrêter l'extraction après ce nombre de caractères
+        max_pages: Arrêter l'extraction après ce nombre de pages
+        
+    Returns:
+        Texte extrait du PDF
+    """
+    try:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        return _extract_text_cached(pdf_bytes, parallel, max_chars, max_pages)
+    except Exception as e:
+        return f"Erreur lors de l'extraction du PDF: {str(e)}"
@@ -0,0 +1,206 @@
+"""
+Service de rendu PDF : pool de processus WeasyPrint gardés chauds
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+# Nombre de processus de rendu (chaque processus garde WeasyPrint et les polices chargés)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+
+# Document minimal rendu au démarrage d'un processus pour charger pango et les polices
+_WARMUP_HTML = "<html><body style=\"font-family: 'Open Sans', 'Montserrat', sans-serif\">CV</body></html>"
+
+# État propre à chaque processus de rendu
+_font_config = None
+
+
+def _init_worker() -> None:
+    """Initialise un processus de rendu : import de WeasyPrint, polices, premier rendu."""
+    global _font_config
+    try:
+        from weasyprint import HTML
+        from weasyprint.text.fonts import FontConfiguration
+        
+        _font_config = FontConfiguration()
+        HTML(string=_WARMUP_HTML).write_pdf(font_config=_font_config)
+    except Exception as e:
+        # L'erreur sera relevée par chaque tâche (ex: WeasyPrint non installé)
+        print(f"Initialisation du rendu PDF impossible: {e}")
+
+
+def _render_job(html: str) -> Dict:
+    """Tâche exécutée dans un processus du pool : HTML → PDF."""
+    from weasyprint import HTML
+    
+    started_at = time.time()
+    pdf = HTML(string=html).write_pdf(font_config=_font_config)
+    return {
+        "pdf": pdf,
+        "started_at": started_at,
+        "render_seconds": time.time() - started_at,
+        "worker": os.getpid()
+    }
+
+
+def _layout_job(html: str) -> Dict:
+    """
+    Tâche exécutée dans un processus du pool : mise en page seule, sans PDF.
+    
+    Retourne ce qu'expose l'API publique de WeasyPrint : nombre de pages,
+    hauteur de la première page et position des éléments ayant un id.
+    """
+    from weasyprint import HTML
+    
+    document = HTML(string=html).render(font_config=_font_config)
+    first_page = document.pages[0]
+    return {
+        "pages": len(document.pages),
+        "page_height": first_page.height,
+        "anchors": dict(first_page.anchors)
+    }
+
+
+class PDFRenderService:
+    """
+    Pool de processus de rendu PDF.
+    
+    Les tâches passent par la file du ProcessPoolExecutor ; chaque processus
+    garde WeasyPrint importé et sa configuration de polices d'un rendu à
+    l'autre. submit() retourne immédiatement une Future : c'est l'appelant qui
+    décide d'attendre ou non. L'application ne l'attend pas (elle consulte
+    future.done() d'un rerun à l'autre, voir wait_for_pdf dans app.py) ;
+    render() attend le PDF et est réservé aux scripts.
+    
+    Les processus sont lancés en mode "spawn" : un fork du processus
+    Streamlit, qui a déjà plusieurs threads, peut hériter de verrous pris.
+    """
+    
+    def __init__(self, workers: int = PDF_RENDER_WORKERS):
+        """
+        Initialise le service (les processus sont lancés au premier rendu).
+        
+        Args:
+            workers: Nombre de processus de rendu
+        """
+        self.workers = max(1, workers)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._metrics = {"jobs": 0, "failed": 0, "render_seconds": 0.0, "wait_seconds": 0.0}
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._pool
+    
+    def submit(self, html: str) -> Future:
+        """
+        Soumet un rendu.
+        
+        Args:
+            html: HTML complet du document
+            
+        Returns:
+            Future dont le résultat est un dict :
+                - pdf: contenu du PDF (bytes)
+                - render_seconds: durée du rendu dans le processus
+                - wait_seconds: attente dans la file avant le rendu
+                - total_seconds: durée totale depuis la soumission
+                - worker: PID du processus de rendu
+        """
+        submitted_at = time.time()
+        result = Future()
+        
+        def on_done(job: Future) -> None:
+            try:
+                output = job.result()
+            except BaseException as e:
+                with self._lock:
+                    self._metrics["failed"] += 1
+                result.set_exception(e)
+                return
+                
+            output["wait_seconds"] = max(0.0, output.pop("started_at") - submitted_at)
+            output["total_seconds"] = time.time() - submitted_at
+            with self._lock:
+                self._metrics["jobs"] += 1
+                self._metrics["render_seconds"] += output["render_seconds"]
+                self._metrics["wait_seconds"] += output["wait_seconds"]
+            result.set_result(output)
+            
+        self._submit_job(_render_job, html).add_done_callback(on_done)
+        return result
+    
+    def submit_layout(self, html: str) -> Future:
+        """
+        Soumet une mise en page sans écriture du PDF (mesure du CV).
+        
+        Args:
+            html: HTML complet du document
+            
+        Returns:
+            Future dont le résultat est un dict :
+                - pages: nombre de pages
+                - page_height: hauteur de la première page (px CSS)
+                - anchors: position des éléments ayant un id sur la première
+                  page ({id: (x, y, ...)}, px CSS)
+        """
+        return self._submit_job(_layout_job, html)
+    
+    def _submit_job(self, job, html: str) -> Future:
+        """Soumet une tâche au pool, en le recréant s'il est cassé."""
+        try:
+            return self._get_pool().submit(job, html)
+        except BrokenProcessPool:
+            # Un processus est mort (mémoire, crash de pango) : repartir d'un pool neuf
+            with self._lock:
+                self._pool = None
+            return self._get_pool().submit(job, html)
+    
+    def render(self, html: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Rend un document et attend le PDF.
+        
+        Args:
+            html: HTML complet du document
+            timeout: Attente maximale en secondes (None = illimitée)
+            
+        Returns:
+            Contenu du PDF
+        """
+        return self.submit(html).result(timeout=timeout)["pdf"]
+    
+    def metrics(self) -> Dict:
+        """Retourne les compteurs (rendus, échecs, temps de rendu et d'attente cumulés)."""
+        with self._lock:
+            return dict(self._metrics)
+    
+    def close(self) -> None:
+        """Arrête les processus de rendu."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Instance globale (singleton), partagée par toutes les sessions
+_render_service = None
+_render_service_lock = threading.Lock()
+
+
+def get_pdf_render_service() -> PDFRenderService:
+    """Retourne le service de rendu PDF partagé (PDF_RENDER_WORKERS processus)."""
+    global _render_service
+    with _render_service_lock:
+        if _render_service is None:
+            _render_service = PDFRenderService()
+        return _render_service
@@ -0,0 +1,281 @@
+"""
+Limitation de débit et reprises automatiques pour les appels LLM
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import anthropic
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement
+env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(env_path)
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504, 529)
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu (débit exprimé par minute)."""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Secondes à attendre avant de pouvoir consommer `amount` jetons."""
+        self._refill()
+        # Une demande plus grosse que le seau passe dès qu'il est plein
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+    
+    def consume(self, amount: float) -> None:
+        """Consomme des jetons (le solde peut devenir négatif : dette à rembourser)."""
+        self._refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Limiteur partagé par tous les clients LLM du processus.
+    
+    Trois seaux à jetons : requêtes/min, tokens d'entrée/min et tokens de
+    sortie/min. Les tokens d'entrée sont estimés avant l'appel, ceux de sortie
+    sont débités après coup d'après l'usage réel. Les erreurs 429/529/5xx sont
+    reprises avec un backoff exponentiel à jitter, en respectant l'en-tête
+    `retry-after` ; un 429 met en pause toutes les requêtes du processus.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        input_tokens_per_minute: Optional[float] = None,
+        output_tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+    ):
+        """
+        Initialise le limiteur.
+        
+        Args:
+            requests_per_minute: Requêtes par minute (None ou 0 = illimité)
+            input_tokens_per_minute: Tokens d'entrée par minute (None ou 0 = illimité)
+            output_tokens_per_minute: Tokens de sortie par minute (None ou 0 = illimité)
+            max_retries: Nombre maximum de nouvelles tentatives
+            base_delay: Délai de base du backoff en secondes
+            max_delay: Délai maximum entre deux tentatives
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.input_tokens = TokenBucket(input_tokens_per_minute) if input_tokens_per_minute else None
+        self.output_tokens = TokenBucket(output_tokens_per_minute) if output_tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "overloaded": 0,
+            "throttled_seconds": 0.0,
+            "backoff_seconds": 0.0
+        }
+    
+    def acquire(self, input_tokens: int = 0) -> float:
+        """
+        Attend que le débit autorise une nouvelle requête.
+        
+        Args:
+            input_tokens: Estimation des tokens d'entrée de la requête
+            
+        Returns:
+            Temps passé à attendre (secondes)
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = max(0.0, self._paused_until - time.monotonic())
+                if self.requests:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.input_tokens:
+                    wait = max(wait, self.input_tokens.wait_time(input_tokens))
+                if self.output_tokens:
+                    # Attendre que la dette de tokens de sortie soit remboursée
+                    wait = max(wait, self.output_tokens.wait_time(0))
+                    
+                if wait <= 0:
+                    if self.requests:
+                        self.requests.consume(1)
+                    if self.input_tokens:
+                        self.input_tokens.consume(input_tokens)
+                    self._metrics["requests"] += 1
+                    self._metrics["throttled_seconds"] += waited
+                    return waited
+                    
+            time.sleep(wait)
+            waited += wait
+    
+    def record_usage(self, input_tokens: int, output_tokens: int, estimated_input_tokens: int = 0) -> None:
+        """
+        Débite l'usage réel d'une requête terminée.
+        
+        Args:
+            input_tokens: Tokens d'entrée facturés (usage.input_tokens)
+            output_tokens: Tokens de sortie générés (usage.output_tokens)
+            estimated_input_tokens: Estimation déjà débitée par acquire()
+        """
+        with self._lock:
+            if self.input_tokens:
+                self.input_tokens.consume(input_tokens - estimated_input_tokens)
+            if self.output_tokens:
+                self.output_tokens.consume(output_tokens)
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Délai avant nouvelle tentative, ou None si l'erreur n'est pas reprenable."""
+        if isinstance(error, anthropic.APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS_CODES:
+                return None
+        elif not isinstance(error, anthropic.APIConnectionError):
+            return None
+            
+        # Backoff exponentiel avec jitter complet
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = None
+            try:
+                if response.headers.get("retry-after-ms"):
+                    retry_after = float(response.headers["retry-after-ms"]) / 1000
+                elif response.headers.get("retry-after"):
+                    retry_after = float(response.headers["retry-after"])
+            except ValueError:
+                pass
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_delay))
+                
+        return delay
+    
+    def _register_retry(self, error: Exception, attempt: int) -> float:
+        """Comptabilise une reprise et retourne le délai ; relève l'erreur si non reprenable."""
+        delay = self._retry_delay(error, attempt)
+        if delay is None or attempt >= self.max_retries:
+            raise error
+            
+        status = getattr(error, "status_code", None)
+        with self._lock:
+            self._metrics["retries"] += 1
+            self._metrics["backoff_seconds"] += delay
+            if status == 429:
+                self._metrics["rate_limited"] += 1
+                # Le quota du compte est atteint : pause pour tout le processus
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            elif status == 529:
+                self._metrics["overloaded"] += 1
+        return delay
+    
+    def call(self, fn: Callable, input_tokens: int = 0):
+        """
+        Exécute un appel API sous contrôle du débit, avec reprises.
+        
+        Args:
+            fn: Fonction sans argument effectuant l'appel
+            input_tokens: Estimation des tokens d'entrée
+            
+        Returns:
+            Le résultat de fn()
+        """
+        attempt = 0
+        while True:
+            self.acquire(input_tokens)
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._register_retry(e, attempt)
+                time.sleep(delay)
+                attempt += 1
+    
+    async def acall(self, coro_factory: Callable, input_tokens: int = 0):
+        """
+        Variante asynchrone de call().
+        
+        Args:
+            coro_factory: Fonction sans argument retournant la coroutine de l'appel
+            input_tokens: Estimation des tokens d'entrée
+            
+        Returns:
+            Le résultat de la coroutine
+        """
+        attempt = 0
+        while True:
+            await asyncio.to_thread(self.acquire, input_tokens)
+            try:
+                return await coro_factory()
+            except Exception as e:
+                delay = self._register_retry(e, attempt)
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    def metrics(self) -> Dict:
+        """Retourne les compteurs (requêtes, reprises, temps d'attente...)."""
+        with self._lock:
+            return dict(self._metrics)
+
+
+def without_sdk_retries(client):
+    """
+    Désactive les reprises internes du SDK Anthropic sur un client fourni.
+    
+    Les reprises sont faites par RateLimiter : sans cela chaque tentative
+    du limiteur serait elle-même reprise par le SDK. Les stubs sans
+    with_options() sont retournés tels quels.
+    """
+    with_options = getattr(client, "with_options", None)
+    return with_options(max_retries=0) if with_options is not None else client
+
+
+# Instance globale (singleton), partagée par tous les LLMClient
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Retourne le limiteur partagé, configuré par les variables LLM_RATE_LIMIT_*.
+    
+    Sans ces variables le débit n'est pas limité côté client (les limites
+    dépendent du tier du compte) : seules les reprises sur 429/529/5xx sont
+    actives.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                requests_per_minute=_env_float("LLM_RATE_LIMIT_RPM", 0),
+                input_tokens_per_minute=_env_float("LLM_RATE_LIMIT_ITPM", 0),
+                output_tokens_per_minute=_env_float("LLM_RATE_LIMIT_OTPM", 0),
+                max_retries=int(_env_float("LLM_MAX_RETRIES", 5))
+            )
+        return _rate_limiter
@@ -0,0 +1,891 @@
+"""
+Stockage local SQLite : même interface que le client Supabase, sans réseau
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .storage import (
+    CANDIDATURE_DETAIL_COLUMNS,
+    CANDIDATURE_SUMMARY_COLUMNS,
+    CANDIDATURES_STATS_SQL,
+    CV_DETAIL_COLUMNS,
+    CV_SUMMARY_COLUMNS,
+    Storage,
+    build_candidatures_stats
+)
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "cvmaker.db"
+
+# Tables et index (mêmes colonnes que les tables Supabase). Les listes sont
+# paginées par (created_at, id) : chaque liste a son index composite.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidatures (
+    id TEXT PRIMARY KEY,
+    titre_poste TEXT,
+    entreprise TEXT,
+    offre_texte TEXT,
+    cv_adapte TEXT,
+    lettre_motivation TEXT,
+    preparation_entretien TEXT,
+    analyse_compatibilite TEXT,
+    notes TEXT,
+    statut TEXT NOT NULL DEFAULT 'en_cours',
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS candidatures_created_at_id_idx ON candidatures (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS candidatures_statut_created_at_id_idx ON candidatures (statut, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS candidatures_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidature_id TEXT NOT NULL REFERENCES candidatures (id) ON DELETE CASCADE,
+    type_event TEXT NOT NULL,
+    description TEXT,
+    date_event TEXT NOT NULL,
+    rappel_date TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidatures_events_candidature_id_idx ON candidatures_events (candidature_id, date_event DESC);
+CREATE INDEX IF NOT EXISTS candidatures_events_rappel_date_idx ON candidatures_events (rappel_date);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_session_idx ON chat_messages (session_id, created_at);
+
+CREATE TABLE IF NOT EXISTS chat_synopses (
+    session_id TEXT PRIMARY KEY,
+    synopsis TEXT NOT NULL DEFAULT '',
+    last_message_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chat_documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE (session_id, filename)
+);
+
+CREATE TABLE IF NOT EXISTS linkedin_posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sujet TEXT,
+    contenu TEXT,
+    tone TEXT,
+    publie INTEGER NOT NULL DEFAULT 0,
+    date_publication TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS linkedin_posts_created_at_id_idx ON linkedin_posts (created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS email_templates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT,
+    type_template TEXT,
+    sujet TEXT,
+    contenu TEXT,
+    variables TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS email_templates_type_idx ON email_templates (type_template);
+
+CREATE TABLE IF NOT EXISTS cv_personnalises (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    titre_offre TEXT,
+    entreprise TEXT,
+    offre_texte TEXT,
+    customizations TEXT,
+    html_content TEXT,
+    chat_history TEXT,
+    candidature_id TEXT REFERENCES candidatures (id) ON DELETE SET NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS cv_personnalises_created_at_id_idx ON cv_personnalises (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS cv_personnalises_candidature_id_idx ON cv_personnalises (candidature_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS custom_contextes (
+    id TEXT PRIMARY KEY,
+    cle TEXT,
+    label TEXT,
+    categorie TEXT,
+    texte TEXT,
+    mots_cles TEXT,
+    is_default INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS custom_contextes_created_at_idx ON custom_contextes (created_at DESC);
+"""
+
+# Colonnes stockées en JSON (listes côté Supabase) et colonnes booléennes
+JSON_COLUMNS = ("variables", "mots_cles")
+BOOLEAN_COLUMNS = ("publie", "is_default")
+
+
+def _now() -> str:
+    """Horodatage ISO en UTC, au format des timestamptz Supabase (tri lexicographique = chronologique)."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _to_dict(row: sqlite3.Row) -> Dict:
+    """Convertit une ligne SQLite au format des lignes Supabase."""
+    data = dict(row)
+    for column in JSON_COLUMNS:
+        if isinstance(data.get(column), str):
+            data[column] = json.loads(data[column])
+    for column in BOOLEAN_COLUMNS:
+        if column in data and data[column] is not None:
+            data[column] = bool(data[column])
+    return data
+
+
+class SQLiteStorage(Storage):
+    """
+    Stockage dans un fichier SQLite local.
+    
+    Mode WAL (les lectures ne bloquent pas les écritures), une connexion
+    partagée protégée par un verrou (Streamlit exécute les sessions dans des
+    threads), index sur les colonnes de tri et de jointure. Sert aux
+    déploiements hors ligne et aux tests ; ":memory:" donne une base jetable.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Ouvre (et crée au besoin) la base.
+        
+        Args:
+            db_path: Chemin du fichier (défaut: variable SQLITE_PATH, sinon data/cvmaker.db)
+        """
+        self.db_path = str(db_path or os.getenv("SQLITE_PATH") or DEFAULT_DB_PATH)
+        self._lock = threading.RLock()
+        
+        try:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+            self.enabled = True
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur SQLite ({self.db_path}): {e}. Utilisation du stockage local.")
+            self._conn = None
+            self.enabled = False
+    
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        """Exécute une requête de lecture."""
+        with self._lock:
+            return [_to_dict(row) for row in self._conn.execute(sql, params).fetchall()]
+    
+    def _execute(self, sql: str, params=()) -> int:
+        """Exécute une écriture dans une transaction ; retourne le nombre de lignes touchées."""
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+    
+    def _insert(self, table: str, data: Dict) -> Optional[Dict]:
+        """Insère une ligne et la retourne telle qu'enregistrée."""
+        data = {
+            key: json.dumps(value, ensure_ascii=False) if key in JSON_COLUMNS else value
+            for key, value in data.items()
+        }
+        data.setdefault("created_at", _now())
+        columns = ", ".join(data)
+        placeholders = ", ".join("?" for _ in data)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                tuple(data.values())
+            )
+            row = self._conn.execute(
+                f"SELECT * FROM {table} WHERE rowid = ?", (cursor.lastrowid,)
+            ).fetchone()
+        return _to_dict(row) if row else None
+    
+    def _fetch_page(
+        self,
+        table: str,
+        columns: str,
+        limit: int,
+        cursor: Optional[Dict] = None,
+        filters: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Lit une page d'une table par clé (created_at, id), comme SupabaseClient._fetch_page.
+        
+        Returns:
+            Tuple (lignes, curseur de la page suivante ou None si c'est la dernière)
+        """
+        conditions = [f"{column} = ?" for column in (filters or {})]
+        params = list((filters or {}).values())
+        if cursor:
+            conditions.append("(created_at, id) < (?, ?)")
+            params += [cursor["created_at"], cursor["id"]]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        rows = self._query(
+            f"SELECT {columns} FROM {table} {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            params + [limit + 1]
+        )
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+    
+    def _get_row(self, table: str, row_id, columns: str = "*") -> Optional[Dict]:
+        rows = self._query(f"SELECT {columns} FROM {table} WHERE id = ?", (row_id,))
+        return rows[0] if rows else None
+    
+    def _group_by_candidature(self, sql: str, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Exécute une requête filtrée par "candidature_id IN (...)" et groupe les lignes."""
+        grouped = {cand_id: [] for cand_id in candidature_ids}
+        if not self.enabled or not candidature_ids:
+            return grouped
+        placeholders = ", ".join("?" for _ in candidature_ids)
+        for row in self._query(sql.format(ids=placeholders), tuple(candidature_ids)):
+            grouped.setdefault(row.get("candidature_id"), []).append(row)
+        return grouped
+        
+    # =========================================================================
+    # CANDIDATURES
+    # =========================================================================
+    
+    def save_candidature(
+        self,
+        titre_poste: str,
+        entreprise: str,
+        offre_texte: str = None,
+        cv_adapte: str = None,
+        lettre_motivation: str = None,
+        preparation_entretien: str = None,
+        analyse_compatibilite: str = None,
+        notes: str = None
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("candidatures", {
+                "id": str(uuid.uuid4()),
+                "titre_poste": titre_poste,
+                "entreprise": entreprise,
+                "offre_texte": offre_texte,
+                "cv_adapte": cv_adapte,
+                "lettre_motivation": lettre_motivation,
+                "preparation_entretien": preparation_entretien,
+                "analyse_compatibilite": analyse_compatibilite,
+                "notes": notes,
+                "statut": "en_cours"
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde candidature: {e}")
+            return None
+    
+    def get_candidatures_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[Dict] = None,
+        statut: Optional[str] = None,
+        columns: str = CANDIDATURE_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        if not self.enabled:
+            return [], None
+            
+        try:
+            return self._fetch_page(
+                "candidatures", columns, limit, cursor,
+                filters={"statut": statut} if statut else None
+            )
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération candidatures: {e}")
+            return [], None
+    
+    def get_candidature_details(self, candidature_id: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._get_row("candidatures", candidature_id, CANDIDATURE_DETAIL_COLUMNS)
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération candidature: {e}")
+            return None
+    
+    def update_candidature_statut(self, candidature_id: str, statut: str) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute(
+                "UPDATE candidatures SET statut = ?, updated_at = ? WHERE id = ?",
+                (statut, _now(), candidature_id)
+            )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur mise à jour statut: {e}")
+            return False
+    
+    def delete_candidature(self, candidature_id: str) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM candidatures WHERE id = ?", (candidature_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression candidature: {e}")
+            return False
+    
+    def get_candidatures_stats(self) -> Dict:
+        if not self.enabled:
+            return {}
+            
+        try:
+            return build_candidatures_stats(self._query(CANDIDATURES_STATS_SQL))
+            
+        except sqlite3.Error as e:
+            print(f"Erreur statistiques: {e}")
+            return {}
+            
+    # =========================================================================
+    # CANDIDATURES EVENTS (TRACKING)
+    # =========================================================================
+    
+    def add_candidature_event(
+        self,
+        candidature_id: str,
+        type_event: str,
+        description: str = None,
+        date_event: str = None,
+        rappel_date: str = None
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("candidatures_events", {
+                "candidature_id": candidature_id,
+                "type_event": type_event,
+                "description": description,
+                "date_event": date_event or _now(),
+                "rappel_date": rappel_date
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur ajout événement: {e}")
+            return None
+    
+    def get_events_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        try:
+            return self._group_by_candidature(
+                "SELECT * FROM candidatures_events WHERE candidature_id IN ({ids}) ORDER BY date_event DESC",
+                candidature_ids
+            )
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération événements: {e}")
+            return {cand_id: [] for cand_id in candidature_ids}
+    
+    def get_upcoming_reminders(self, days: int = 7) -> List[Dict]:
+        if not self.enabled:
+            return []
+            
+        try:
+            now = datetime.now()
+            rows = self._query(
+                """
+                SELECT e.*, c.titre_poste AS c_titre_poste, c.entreprise AS c_entreprise
+                FROM candidatures_events e
+                LEFT JOIN candidatures c ON c.id = e.candidature_id
+                WHERE e.rappel_date >= ? AND e.rappel_date <= ?
+                ORDER BY e.rappel_date
+                """,
+                (now.isoformat(), (now + timedelta(days=days)).isoformat())
+            )
+            # Même forme que la jointure Supabase "*, candidatures(titre_poste, entreprise)"
+            for row in rows:
+                row["candidatures"] = {
+                    "titre_poste": row.pop("c_titre_poste"),
+                    "entreprise": row.pop("c_entreprise")
+                }
+            return rows
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération rappels: {e}")
+            return []
+            
+    # =========================================================================
+    # CHAT
+    # =========================================================================
+    
+    def save_chat_message(self, role: str, content: str, session_id: str = "default") -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("chat_messages", {"role": role, "content": content, "session_id": session_id})
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde message: {e}")
+            return None
+    
+    def get_chat_messages(self, session_id: str = "default", limit: int = 100) -> List[Dict]:
+        if not self.enabled:
+            return []
+            
+        try:
+            return self._query(
+                "SELECT * FROM chat_messages WHERE session_id = ? ORDER BY created_at, id LIMIT ?",
+                (session_id, limit)
+            )
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération messages: {e}")
+            return []
+    
+    def clear_chat_messages(self, session_id: str = "default") -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            self._execute("DELETE FROM chat_synopses WHERE session_id = ?", (session_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression messages: {e}")
+            return False
+    
+    def save_chat_synopsis(self, synopsis: str, last_message_at: str, session_id: str = "default") -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute(
+                """
+                INSERT INTO chat_synopses (session_id, synopsis, last_message_at, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    synopsis = excluded.synopsis,
+                    last_message_at = excluded.last_message_at,
+                    updated_at = excluded.updated_at
+                """,
+                (session_id, synopsis, last_message_at, _now())
+            )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde synopsis: {e}")
+            return False
+    
+    def get_chat_synopsis(self, session_id: str = "default") -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            rows = self._query(
+                "SELECT synopsis, last_message_at FROM chat_synopses WHERE session_id = ?",
+                (session_id,)
+            )
+            return rows[0] if rows else None
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération synopsis: {e}")
+            return None
+    
+    def save_chat_document(self, filename: str, content: str, session_id: str = "default") -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute(
+                """
+                INSERT INTO chat_documents (filename, content, session_id, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (session_id, filename) DO UPDATE SET content = excluded.content
+                """,
+                (filename, content, session_id, _now())
+            )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde document: {e}")
+            return False
+    
+    def get_chat_documents(self, session_id: str = "default") -> List[Dict]:
+        if not self.enabled:
+            return []
+            
+        try:
+            return self._query(
+                "SELECT * FROM chat_documents WHERE session_id = ? ORDER BY created_at, id",
+                (session_id,)
+            )
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération documents: {e}")
+            return []
+    
+    def delete_chat_document(self, doc_id: int) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM chat_documents WHERE id = ?", (doc_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression document: {e}")
+            return False
+    
+    def clear_chat_documents(self, session_id: str = "default") -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM chat_documents WHERE session_id = ?", (session_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression documents: {e}")
+            return False
+            
+    # =========================================================================
+    # LINKEDIN POSTS
+    # =========================================================================
+    
+    def save_linkedin_post(
+        self,
+        sujet: str,
+        contenu: str,
+        tone: str = None,
+        publie: bool = False
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("linkedin_posts", {
+                "sujet": sujet,
+                "contenu": contenu,
+                "tone": tone,
+                "publie": int(bool(publie))
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde post LinkedIn: {e}")
+            return None
+    
+    def get_linkedin_posts_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        if not self.enabled:
+            return [], None
+            
+        try:
+            return self._fetch_page("linkedin_posts", "*", limit, cursor)
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération posts LinkedIn: {e}")
+            return [], None
+    
+    def mark_post_published(self, post_id: int) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute(
+                "UPDATE linkedin_posts SET publie = 1, date_publication = ? WHERE id = ?",
+                (_now(), post_id)
+            )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur mise à jour post: {e}")
+            return False
+            
+    # =========================================================================
+    # EMAIL TEMPLATES
+    # =========================================================================
+    
+    def get_email_templates(self) -> List[Dict]:
+        if not self.enabled:
+            return []
+            
+        try:
+            return self._query("SELECT * FROM email_templates ORDER BY type_template")
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération templates: {e}")
+            return []
+    
+    def get_email_template_by_type(self, type_template: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            rows = self._query(
+                "SELECT * FROM email_templates WHERE type_template = ? LIMIT 1",
+                (type_template,)
+            )
+            return rows[0] if rows else None
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération template: {e}")
+            return None
+    
+    def save_custom_template(
+        self,
+        nom: str,
+        sujet: str,
+        contenu: str,
+        variables: List[str] = None
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("email_templates", {
+                "nom": nom,
+                "type_template": "personnalise",
+                "sujet": sujet,
+                "contenu": contenu,
+                "variables": variables or []
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde template: {e}")
+            return None
+            
+    # =========================================================================
+    # CV PERSONNALISÉS
+    # =========================================================================
+    
+    def save_cv_personnalise(
+        self,
+        titre_offre: str,
+        entreprise: str,
+        offre_texte: str,
+        customizations: Dict,
+        html_content: str,
+        chat_history: List[Dict] = None,
+        candidature_id: int = None
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            # Mêmes conversions que SupabaseClient (colonnes texte JSON, offre tronquée)
+            return self._insert("cv_personnalises", {
+                "titre_offre": titre_offre,
+                "entreprise": entreprise,
+                "offre_texte": offre_texte[:5000] if offre_texte else None,
+                "customizations": json.dumps(customizations) if customizations else None,
+                "html_content": html_content,
+                "chat_history": json.dumps(chat_history) if chat_history else None,
+                "candidature_id": candidature_id,
+                "version": 1
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde CV personnalisé: {e}")
+            return None
+    
+    def get_cv_personnalises_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None,
+        columns: str = CV_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        if not self.enabled:
+            return [], None
+            
+        try:
+            return self._fetch_page("cv_personnalises", columns, limit, cursor)
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération CV personnalisés: {e}")
+            return [], None
+    
+    def get_cv_personnalise(self, cv_id: int) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._get_row("cv_personnalises", cv_id)
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération CV: {e}")
+            return None
+    
+    def get_cv_details(self, cv_id: int) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._get_row("cv_personnalises", cv_id, CV_DETAIL_COLUMNS)
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération CV: {e}")
+            return None
+    
+    def update_cv_personnalise(
+        self,
+        cv_id: int,
+        customizations: Dict = None,
+        html_content: str = None,
+        chat_history: List[Dict] = None
+    ) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            data = {}
+            if customizations is not None:
+                data["customizations"] = json.dumps(customizations)
+            if html_content is not None:
+                data["html_content"] = html_content
+            if chat_history is not None:
+                data["chat_history"] = json.dumps(chat_history)
+                
+            assignments = "".join(f"{column} = ?, " for column in data)
+            self._execute(
+                f"UPDATE cv_personnalises SET {assignments}version = version + 1, updated_at = ? WHERE id = ?",
+                (*data.values(), _now(), cv_id)
+            )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur mise à jour CV: {e}")
+            return False
+    
+    def delete_cv_personnalise(self, cv_id: int) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM cv_personnalises WHERE id = ?", (cv_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression CV: {e}")
+            return False
+    
+    def get_cvs_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        try:
+            return self._group_by_candidature(
+                "SELECT id, titre_offre, version, created_at, candidature_id FROM cv_personnalises "
+                "WHERE candidature_id IN ({ids}) ORDER BY created_at DESC",
+                candidature_ids
+            )
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération CV candidatures: {e}")
+            return {cand_id: [] for cand_id in candidature_ids}
+            
+    # =========================================================================
+    # CONTEXTES PERSONNALISÉS (pour Lettre de motivation)
+    # =========================================================================
+    
+    def save_custom_contexte(
+        self,
+        cle: str,
+        label: str,
+        categorie: str,
+        texte: str,
+        mots_cles: List[str] = None
+    ) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+            
+        try:
+            return self._insert("custom_contextes", {
+                "id": str(uuid.uuid4()),
+                "cle": cle,
+                "label": label,
+                "categorie": categorie,
+                "texte": texte,
+                "mots_cles": mots_cles or [],
+                "is_default": 0
+            })
+            
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde contexte: {e}")
+            return None
+    
+    def get_custom_contextes(self) -> List[Dict]:
+        if not self.enabled:
+            return []
+            
+        try:
+            return self._query("SELECT * FROM custom_contextes ORDER BY created_at DESC")
+            
+        except sqlite3.Error as e:
+            print(f"Erreur récupération contextes: {e}")
+            return []
+    
+    def delete_custom_contexte(self, contexte_id: str) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            self._execute("DELETE FROM custom_contextes WHERE id = ?", (contexte_id,))
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur suppression contexte: {e}")
+            return False
+    
+    def update_custom_contexte(
+        self,
+        contexte_id: str,
+        label: str = None,
+        texte: str = None,
+        categorie: str = None,
+        mots_cles: List[str] = None
+    ) -> bool:
+        if not self.enabled:
+            return False
+            
+        try:
+            updates = {}
+            if label is not None:
+                updates["label"] = label
+            if texte is not None:
+                updates["texte"] = texte
+            if categorie is not None:
+                updates["categorie"] = categorie
+            if mots_cles is not None:
+                updates["mots_cles"] = json.dumps(mots_cles, ensure_ascii=False)
+                
+            if updates:
+                assignments = ", ".join(f"{column} = ?" for column in updates)
+                self._execute(
+                    f"UPDATE custom_contextes SET {assignments} WHERE id = ?",
+                    (*updates.values(), contexte_id)
+                )
+            return True
+            
+        except sqlite3.Error as e:
+            print(f"Erreur mise à jour contexte: {e}")
+            return False
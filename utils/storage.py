@@ -0,0 +1,351 @@
+"""
+Couche de stockage : interface commune et choix du backend (Supabase ou SQLite local)
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+# Backend de stockage : "supabase" (défaut) ou "sqlite" (fichier local, hors ligne et tests)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+
+# Colonnes des listes (en-têtes) : les champs texte volumineux sont chargés à la demande
+CANDIDATURE_SUMMARY_COLUMNS = "id, titre_poste, entreprise, statut, created_at, updated_at"
+CANDIDATURE_DETAIL_COLUMNS = (
+    "id, offre_texte, cv_adapte, lettre_motivation, preparation_entretien, analyse_compatibilite, notes"
+)
+CV_SUMMARY_COLUMNS = "id, titre_offre, entreprise, version, created_at, candidature_id"
+CV_DETAIL_COLUMNS = "id, offre_texte, customizations, html_content, chat_history, version"
+
+# Agrégat des candidatures par statut (vue candidatures_stats côté Postgres,
+# voir supabase/migrations ; requête exécutée telle quelle par le backend SQLite)
+CANDIDATURES_STATS_SQL = "SELECT statut, COUNT(*) AS nombre FROM candidatures GROUP BY statut"
+
+# Statut en base → clé du dict de statistiques
+STATS_KEYS = {
+    "en_cours": "en_cours",
+    "envoyee": "envoyees",
+    "entretien": "entretiens",
+    "refusee": "refusees",
+    "acceptee": "acceptees"
+}
+
+
+def build_candidatures_stats(rows: List[Dict]) -> Dict:
+    """
+    Construit le dict de statistiques à partir des comptes par statut.
+    
+    Args:
+        rows: Lignes {"statut", "nombre"} (résultat de CANDIDATURES_STATS_SQL)
+        
+    Returns:
+        Dict {"total", "en_cours", "envoyees", "entretiens", "refusees", "acceptees"}
+    """
+    stats = {"total": 0, **{key: 0 for key in STATS_KEYS.values()}}
+    for row in rows:
+        nombre = int(row.get("nombre") or 0)
+        stats["total"] += nombre
+        key = STATS_KEYS.get(row.get("statut"))
+        if key:
+            stats[key] += nombre
+    return stats
+
+
+class Storage(ABC):
+    """
+    Interface des stockages de l'application.
+    
+    Les lignes sont échangées sous forme de dicts au format des tables
+    Supabase (mêmes noms de colonnes, dates ISO, listes JSON décodées) :
+    l'application ne sait pas quel backend elle utilise. Les méthodes ne
+    lèvent pas d'exception : en cas d'erreur elles affichent le problème et
+    retournent None, False ou une liste vide.
+    
+    Attributes:
+        enabled: False si le backend n'a pas pu être initialisé (l'application
+                 se rabat alors sur ses fichiers JSON locaux)
+    """
+    
+    enabled: bool = False
+    
+    # =========================================================================
+    # CANDIDATURES
+    # =========================================================================
+    
+    @abstractmethod
+    def save_candidature(
+        self,
+        titre_poste: str,
+        entreprise: str,
+        offre_texte: str = None,
+        cv_adapte: str = None,
+        lettre_motivation: str = None,
+        preparation_entretien: str = None,
+        analyse_compatibilite: str = None,
+        notes: str = None
+    ) -> Optional[Dict]:
+        """Sauvegarde une candidature (statut 'en_cours') et retourne la ligne insérée."""
+    
+    @abstractmethod
+    def get_candidatures_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[Dict] = None,
+        statut: Optional[str] = None,
+        columns: str = CANDIDATURE_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """Page de candidatures (plus récentes d'abord) et curseur de la page suivante."""
+    
+    def get_candidatures(self, limit: int = 50, columns: str = CANDIDATURE_SUMMARY_COLUMNS) -> List[Dict]:
+        """Récupère les candidatures les plus récentes (en-têtes par défaut)."""
+        return self.get_candidatures_page(limit, columns=columns)[0]
+    
+    @abstractmethod
+    def get_candidature_details(self, candidature_id: str) -> Optional[Dict]:
+        """Textes d'une candidature (offre, CV, lettre, entretien, analyse, notes)."""
+    
+    @abstractmethod
+    def update_candidature_statut(self, candidature_id: str, statut: str) -> bool:
+        """Met à jour le statut d'une candidature."""
+    
+    @abstractmethod
+    def delete_candidature(self, candidature_id: str) -> bool:
+        """Supprime une candidature."""
+    
+    @abstractmethod
+    def get_candidatures_stats(self) -> Dict:
+        """Comptes par statut : {"total", "en_cours", "envoyees", "entretiens", "refusees", "acceptees"}."""
+        
+    # =========================================================================
+    # CANDIDATURES EVENTS (TRACKING)
+    # =========================================================================
+    
+    @abstractmethod
+    def add_candidature_event(
+        self,
+        candidature_id: str,
+        type_event: str,
+        description: str = None,
+        date_event: str = None,
+        rappel_date: str = None
+    ) -> Optional[Dict]:
+        """Ajoute un événement à une candidature."""
+    
+    @abstractmethod
+    def get_events_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Événements de plusieurs candidatures, groupés par candidature_id."""
+    
+    def get_candidature_events(self, candidature_id: str) -> List[Dict]:
+        """Récupère tous les événements d'une candidature."""
+        return self.get_events_for_candidatures([candidature_id]).get(candidature_id, [])
+    
+    @abstractmethod
+    def get_upcoming_reminders(self, days: int = 7) -> List[Dict]:
+        """Événements avec rappel dans les prochains jours, avec "candidatures": {titre_poste, entreprise}."""
+        
+    # =========================================================================
+    # CHAT
+    # =========================================================================
+    
+    @abstractmethod
+    def save_chat_message(self, role: str, content: str, session_id: str = "default") -> Optional[Dict]:
+        """Sauvegarde un message de chat et retourne la ligne insérée (id, created_at)."""
+    
+    @abstractmethod
+    def get_chat_messages(self, session_id: str = "default", limit: int = 100) -> List[Dict]:
+        """Messages d'une session, du plus ancien au plus récent."""
+    
+    @abstractmethod
+    def clear_chat_messages(self, session_id: str = "default") -> bool:
+        """Efface tous les messages d'une session (et son synopsis)."""
+    
+    @abstractmethod
+    def save_chat_synopsis(self, synopsis: str, last_message_at: str, session_id: str = "default") -> bool:
+        """Enregistre le synopsis des anciens échanges et le created_at du dernier message résumé."""
+    
+    @abstractmethod
+    def get_chat_synopsis(self, session_id: str = "default") -> Optional[Dict]:
+        """Synopsis d'une session : {"synopsis", "last_message_at"} ou None."""
+    
+    @abstractmethod
+    def save_chat_document(self, filename: str, content: str, session_id: str = "default") -> bool:
+        """Sauvegarde (ou remplace) un document uploadé dans le chat."""
+    
+    @abstractmethod
+    def get_chat_documents(self, session_id: str = "default") -> List[Dict]:
+        """Documents d'une session de chat."""
+    
+    @abstractmethod
+    def delete_chat_document(self, doc_id: int) -> bool:
+        """Supprime un document du chat."""
+    
+    @abstractmethod
+    def clear_chat_documents(self, session_id: str = "default") -> bool:
+        """Efface tous les documents d'une session."""
+        
+    # =========================================================================
+    # LINKEDIN POSTS
+    # =========================================================================
+    
+    @abstractmethod
+    def save_linkedin_post(
+        self,
+        sujet: str,
+        contenu: str,
+        tone: str = None,
+        publie: bool = False
+    ) -> Optional[Dict]:
+        """Sauvegarde un post LinkedIn généré."""
+    
+    @abstractmethod
+    def get_linkedin_posts_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """Page de posts LinkedIn (plus récents d'abord) et curseur de la page suivante."""
+    
+    def get_linkedin_posts(self, limit: int = 20) -> List[Dict]:
+        """Récupère les posts LinkedIn sauvegardés."""
+        return self.get_linkedin_posts_page(limit)[0]
+    
+    @abstractmethod
+    def mark_post_published(self, post_id: int) -> bool:
+        """Marque un post comme publié."""
+        
+    # =========================================================================
+    # EMAIL TEMPLATES
+    # =========================================================================
+    
+    @abstractmethod
+    def get_email_templates(self) -> List[Dict]:
+        """Récupère tous les templates d'emails."""
+    
+    @abstractmethod
+    def get_email_template_by_type(self, type_template: str) -> Optional[Dict]:
+        """Récupère un template par son type."""
+    
+    @abstractmethod
+    def save_custom_template(
+        self,
+        nom: str,
+        sujet: str,
+        contenu: str,
+        variables: List[str] = None
+    ) -> Optional[Dict]:
+        """Sauvegarde un template personnalisé."""
+        
+    # =========================================================================
+    # CV PERSONNALISÉS
+    # =========================================================================
+    
+    @abstractmethod
+    def save_cv_personnalise(
+        self,
+        titre_offre: str,
+        entreprise: str,
+        offre_texte: str,
+        customizations: Dict,
+        html_content: str,
+        chat_history: List[Dict] = None,
+        candidature_id: int = None
+    ) -> Optional[Dict]:
+        """Sauvegarde un CV personnalisé (version 1)."""
+    
+    @abstractmethod
+    def get_cv_personnalises_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None,
+        columns: str = CV_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """Page de CV personnalisés (plus récents d'abord) et curseur de la page suivante."""
+    
+    def get_cv_personnalises(self, limit: int = 20, columns: str = CV_SUMMARY_COLUMNS) -> List[Dict]:
+        """Récupère les CV personnalisés récents (en-têtes par défaut)."""
+        return self.get_cv_personnalises_page(limit, columns=columns)[0]
+    
+    @abstractmethod
+    def get_cv_personnalise(self, cv_id: int) -> Optional[Dict]:
+        """Récupère un CV personnalisé complet par son ID."""
+    
+    @abstractmethod
+    def get_cv_details(self, cv_id: int) -> Optional[Dict]:
+        """Contenu d'un CV personnalisé (HTML, personnalisations, historique, offre)."""
+    
+    @abstractmethod
+    def update_cv_personnalise(
+        self,
+        cv_id: int,
+        customizations: Dict = None,
+        html_content: str = None,
+        chat_history: List[Dict] = None
+    ) -> bool:
+        """Met à jour un CV personnalisé et incrémente sa version."""
+    
+    @abstractmethod
+    def delete_cv_personnalise(self, cv_id: int) -> bool:
+        """Supprime un CV personnalisé."""
+    
+    @abstractmethod
+    def get_cvs_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        """CV liés à plusieurs candidatures, groupés par candidature_id."""
+    
+    def get_cvs_for_candidature(self, candidature_id: str) -> List[Dict]:
+        """Récupère les CV personnalisés liés à une candidature."""
+        return self.get_cvs_for_candidatures([candidature_id]).get(candidature_id, [])
+        
+    # =========================================================================
+    # CONTEXTES PERSONNALISÉS (pour Lettre de motivation)
+    # =========================================================================
+    
+    @abstractmethod
+    def save_custom_contexte(
+        self,
+        cle: str,
+        label: str,
+        categorie: str,
+        texte: str,
+        mots_cles: List[str] = None
+    ) -> Optional[Dict]:
+        """Sauvegarde un nouveau contexte personnalisé."""
+    
+    @abstractmethod
+    def get_custom_contextes(self) -> List[Dict]:
+        """Récupère tous les contextes personnalisés (plus récents d'abord)."""
+    
+    @abstractmethod
+    def delete_custom_contexte(self, contexte_id: str) -> bool:
+        """Supprime un contexte personnalisé."""
+    
+    @abstractmethod
+    def update_custom_contexte(
+        self,
+        contexte_id: str,
+        label: str = None,
+        texte: str = None,
+        categorie: str = None,
+        mots_cles: List[str] = None
+    ) -> bool:
+        """Met à jour un contexte personnalisé."""
+
+
+# Instance globale (singleton)
+_storage = None
+
+
+def get_storage() -> Storage:
+    """
+    Retourne le stockage configuré (variable d'environnement STORAGE_BACKEND).
+    
+    - supabase (défaut) : base Supabase (SUPABASE_URL, SUPABASE_KEY)
+    - sqlite : fichier SQLite local (SQLITE_PATH, défaut data/cvmaker.db)
+    """
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            from .sqlite_storage import SQLiteStorage
+            _storage = SQLiteStorage()
+        else:
+            from .supabase_client import get_supabase_client
+            _storage = get_supabase_client()
+    return _storage
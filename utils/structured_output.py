@@ -0,0 +1,162 @@
+"""
+Sorties structurées (tool use) : validation légère d'un schéma JSON
+"""
+import json
+from typing import Any, Dict, Optional
+
+
+_MISSING = object()
+
+
+def _conform(value: Any, schema: Dict) -> Any:
+    """Retourne la valeur conforme au schéma, ou _MISSING si elle ne l'est pas."""
+    expected = schema.get("type")
+    
+    if expected == "string":
+        return value if isinstance(value, str) else _MISSING
+        
+    if expected == "boolean":
+        return value if isinstance(value, bool) else _MISSING
+        
+    if expected in ("integer", "number"):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return _MISSING
+        return value
+        
+    if expected == "array":
+        if not isinstance(value, list):
+            return _MISSING
+        item_schema = schema.get("items", {})
+        items = [_conform(item, item_schema) for item in value]
+        # Un seul élément invalide rend la liste entière invalide : la retirer
+        # ferait perdre l'élément (ex: une expérience sans dates)
+        if any(item is _MISSING for item in items):
+            return _MISSING
+        max_items = schema.get("maxItems")
+        return items[:max_items] if max_items is not None else items
+        
+    if expected == "object":
+        if not isinstance(value, dict):
+            return _MISSING
+        properties = schema.get("properties", {})
+        result = {}
+        for key, item in value.items():
+            if key not in properties:
+                continue
+            conformed = _conform(item, properties[key])
+            if conformed is not _MISSING:
+                result[key] = conformed
+        if any(key not in result for key in schema.get("required", [])):
+            return _MISSING
+        return result
+        
+    return value
+
+
+def conform_to_schema(data: Any, schema: Dict) -> Optional[Dict]:
+    """
+    Valide une réponse structurée en éliminant les champs non conformes.
+    
+    Un champ invalide (mauvais type, liste dont un élément est incomplet) est
+    retiré au lieu de faire échouer toute la réponse : l'appelant garde alors
+    la valeur actuelle de ce champ, sans relancer la génération.
+    
+    Args:
+        data: Objet retourné par le modèle
+        schema: JSON Schema de type "object"
+        
+    Returns:
+        Dict ne contenant que les champs valides (None si data n'est pas un objet)
+    """
+    if not isinstance(data, dict):
+        return None
+        
+    properties = schema.get("properties", {})
+    result = {}
+    for key, value in data.items():
+        if key not in properties:
+            continue
+        conformed = _conform(value, properties[key])
+        if conformed is not _MISSING:
+            result[key] = conformed
+    return result
+
+
+class IncrementalObjectParser:
+    """
+    Parse un objet JSON reçu par morceaux (flux de tokens).
+    
+    Chaque champ de premier niveau est décodé dès que sa valeur est complète,
+    sans attendre la fin de l'objet : on peut ainsi afficher l'accroche avant
+    que les expériences ne soient générées.
+    """
+    
+    def __init__(self):
+        self.fields = {}
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+    
+    def feed(self, chunk: str) -> Dict:
+        """
+        Ajoute un morceau de JSON.
+        
+        Args:
+            chunk: Fragment de texte JSON
+            
+        Returns:
+            Dict des champs de premier niveau complétés par ce morceau
+        """
+        self._buffer += chunk
+        completed = {}
+        
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start is not None:
+                        self._key = json.loads(self._buffer[self._key_start:self._pos + 1])
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = self._pos
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._complete_field(completed)
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._value_start = self._pos + 1
+            elif char == "," and self._depth == 1:
+                self._complete_field(completed)
+            
+            self._pos += 1
+        
+        return completed
+    
+    def _complete_field(self, completed: Dict) -> None:
+        """Décode la valeur du champ courant si elle est valide."""
+        if self._key is not None and self._value_start is not None:
+            raw = self._buffer[self._value_start:self._pos].strip()
+            try:
+                value = json.loads(raw)
+                self.fields[self._key] = value
+                completed[self._key] = value
+            except ValueError:
+                pass
+        
+        self._key_start = None
+        self._key = None
+        self._value_start = None
@@ -2,11 +2,22 @@
 Client Supabase pour la persistance des données
 """
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .storage import (
+    CANDIDATURE_DETAIL_COLUMNS,
+    CANDIDATURE_SUMMARY_COLUMNS,
+    CV_DETAIL_COLUMNS,
+    CV_SUMMARY_COLUMNS,
+    Storage,
+    build_candidatures_stats
+)
+
 # Charger les variables d'environnement
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
@@ -15,9 +26,12 @@ load_dotenv(env_path)
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://rsknfjcaazondtymiyrv.supabase.co")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
+# Nombre de lignes détaillées gardées en mémoire (HTML des CV compris)
+DETAILS_CACHE_SIZE = 64
+
 
-class SupabaseClient:
-    """Client pour interagir avec Supabase."""
+class SupabaseClient(Storage):
+    """Client pour interagir avec Supabase (backend de stockage par défaut)."""
     
     def __init__(self):
         """Initialise le client Supabase."""
@@ -37,6 +51,103 @@ class SupabaseClient:
             print(f"⚠️ Erreur Supabase: {e}. Utilisation du stockage local.")
             self.client = None
             self.enabled = False
+            
+        # Champs lourds déjà chargés, par (table, id)
+        self._details = OrderedDict()
+        self._details_lock = threading.Lock()
+    
+    def _get_details(self, table: str, row_id, columns: str) -> Optional[Dict]:
+        """
+        Charge les colonnes volumineuses d'une ligne, une seule fois par ligne.
+        
+        Args:
+            table: Nom de la table
+            row_id: ID de la ligne
+            columns: Colonnes à charger
+            
+        Returns:
+            Dict des colonnes demandées, ou None si la ligne n'existe pas
+        """
+        if not self.enabled:
+            return None
+        
+        key = (table, str(row_id))
+        with self._details_lock:
+            if key in self._details:
+                self._details.move_to_end(key)
+                return self._details[key]
+        
+        try:
+            result = self.client.table(table) \
+                .select(columns) \
+                .eq("id", row_id) \
+                .limit(1) \
+                .execute()
+        except Exception as e:
+            print(f"Erreur chargement détail ({table}): {e}")
+            return None
+        
+        row = result.data[0] if result.data else None
+        if row is not None:
+            with self._details_lock:
+                self._details[key] = row
+                while len(self._details) > DETAILS_CACHE_SIZE:
+                    self._details.popitem(last=False)
+        return row
+    
+    def _fetch_page(
+        self,
+        table: str,
+        columns: str,
+        limit: int,
+        cursor: Optional[Dict] = None,
+        filters: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Lit une page d'une table, de la ligne la plus récente à la plus ancienne.
+        
+        Pagination par clé (created_at, id) : la page suivante commence juste
+        après la dernière ligne lue, au lieu d'un OFFSET qui relit toutes les
+        lignes précédentes. Chaque page coûte le même prix, quelle que soit
+        sa position dans l'historique (index dans supabase/migrations).
+        
+        Args:
+            table: Nom de la table
+            columns: Colonnes à récupérer (doivent inclure id et created_at)
+            limit: Nombre de lignes par page
+            cursor: Curseur retourné par la page précédente (None = première page)
+            filters: Égalités supplémentaires {colonne: valeur}
+            
+        Returns:
+            Tuple (lignes, curseur de la page suivante ou None si c'est la dernière)
+        """
+        query = self.client.table(table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if cursor:
+            created_at, row_id = cursor["created_at"], cursor["id"]
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+            )
+        
+        # Une ligne de plus que demandé : indique s'il reste une page après celle-ci
+        result = query \
+            .order("created_at", desc=True) \
+            .order("id", desc=True) \
+            .limit(limit + 1) \
+            .execute()
+        rows = result.data or []
+        
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+    
+    def _forget_details(self, table: str, row_id) -> None:
+        """Retire une ligne du cache des détails (après modification ou suppression)."""
+        with self._details_lock:
+            self._details.pop((table, str(row_id)), None)
     
     # =========================================================================
     # CANDIDATURES
@@ -82,30 +193,44 @@ class SupabaseClient:
             print(f"Erreur sauvegarde candidature: {e}")
             return None
     
-    def get_candidatures(self, limit: int = 50) -> List[Dict]:
+    def get_candidatures_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[Dict] = None,
+        statut: Optional[str] = None,
+        columns: str = CANDIDATURE_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
         """
-        Récupère les candidatures depuis Supabase.
+        Récupère une page de candidatures (les plus récentes d'abord).
         
         Args:
-            limit: Nombre max de candidatures à récupérer
+            limit: Nombre de candidatures par page
+            cursor: Curseur de la page précédente (None = première page)
+            statut: Ne garder que ce statut (None = tous)
+            columns: Colonnes à récupérer
             
         Returns:
-            Liste des candidatures
+            Tuple (candidatures, curseur de la page suivante ou None)
         """
         if not self.enabled:
-            return []
+            return [], None
         
         try:
-            result = self.client.table("candidatures") \
-                .select("*") \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            return result.data or []
+            return self._fetch_page(
+                "candidatures", columns, limit, cursor,
+                filters={"statut": statut} if statut else None
+            )
             
         except Exception as e:
             print(f"Erreur récupération candidatures: {e}")
-            return []
+            return [], None
+    
+    def get_candidature_details(self, candidature_id: str) -> Optional[Dict]:
+        """
+        Récupère les textes d'une candidature (offre, CV, lettre, préparation
+        d'entretien, analyse, notes), chargés une fois puis gardés en mémoire.
+        """
+        return self._get_details("candidatures", candidature_id, CANDIDATURE_DETAIL_COLUMNS)
     
     def update_candidature_statut(self, candidature_id: str, statut: str) -> bool:
         """
@@ -142,6 +267,7 @@ class SupabaseClient:
                 .delete() \
                 .eq("id", candidature_id) \
                 .execute()
+            self._forget_details("candidatures", candidature_id)
             return True
             
         except Exception as e:
@@ -152,7 +278,7 @@ class SupabaseClient:
     # CHAT
     # =========================================================================
     
-    def save_chat_message(self, role: str, content: str, session_id: str = "default") -> bool:
+    def save_chat_message(self, role: str, content: str, session_id: str = "default") -> Optional[Dict]:
         """
         Sauvegarde un message de chat.
         
@@ -162,22 +288,22 @@ class SupabaseClient:
             session_id: ID de session (par défaut 'default')
             
         Returns:
-            True si succès
+            Le message enregistré (avec id et created_at) ou None
         """
         if not self.enabled:
-            return False
+            return None
         
         try:
-            self.client.table("chat_messages").insert({
+            result = self.client.table("chat_messages").insert({
                 "role": role,
                 "content": content,
                 "session_id": session_id
             }).execute()
-            return True
+            return result.data[0] if result.data else None
             
         except Exception as e:
             print(f"Erreur sauvegarde message: {e}")
-            return False
+            return None
     
     def get_chat_messages(self, session_id: str = "default", limit: int = 100) -> List[Dict]:
         """
@@ -216,12 +342,67 @@ class SupabaseClient:
                 .delete() \
                 .eq("session_id", session_id) \
                 .execute()
+            # Le synopsis résume des messages qui n'existent plus
+            self.client.table("chat_synopses") \
+                .delete() \
+                .eq("session_id", session_id) \
+                .execute()
             return True
             
         except Exception as e:
             print(f"Erreur suppression messages: {e}")
             return False
     
+    def save_chat_synopsis(self, synopsis: str, last_message_at: str, session_id: str = "default") -> bool:
+        """
+        Enregistre le synopsis des anciens échanges d'une session.
+        
+        Args:
+            synopsis: Résumé des échanges sortis de la fenêtre du coach
+            last_message_at: created_at du dernier message résumé
+            session_id: ID de session
+            
+        Returns:
+            True si succès
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            self.client.table("chat_synopses").upsert({
+                "session_id": session_id,
+                "synopsis": synopsis,
+                "last_message_at": last_message_at,
+                "updated_at": datetime.now().isoformat()
+            }, on_conflict="session_id").execute()
+            return True
+            
+        except Exception as e:
+            print(f"Erreur sauvegarde synopsis: {e}")
+            return False
+    
+    def get_chat_synopsis(self, session_id: str = "default") -> Optional[Dict]:
+        """
+        Récupère le synopsis d'une session.
+        
+        Returns:
+            Dict {"synopsis", "last_message_at"} ou None
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            result = self.client.table("chat_synopses") \
+                .select("synopsis, last_message_at") \
+                .eq("session_id", session_id) \
+                .limit(1) \
+                .execute()
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            print(f"Erreur récupération synopsis: {e}")
+            return None
+    
     # =========================================================================
     # DOCUMENTS CHAT
     # =========================================================================
@@ -338,22 +519,26 @@ class SupabaseClient:
             print(f"Erreur sauvegarde post LinkedIn: {e}")
             return None
     
-    def get_linkedin_posts(self, limit: int = 20) -> List[Dict]:
-        """Récupère les posts LinkedIn sauvegardés."""
+    def get_linkedin_posts_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Récupère une page de posts LinkedIn (les plus récents d'abord).
+        
+        Returns:
+            Tuple (posts, curseur de la page suivante ou None)
+        """
         if not self.enabled:
-            return []
+            return [], None
         
         try:
-            result = self.client.table("linkedin_posts") \
-                .select("*") \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            return result.data or []
+            return self._fetch_page("linkedin_posts", "*", limit, cursor)
             
         except Exception as e:
             print(f"Erreur récupération posts LinkedIn: {e}")
-            return []
+            return [], None
     
     def mark_post_published(self, post_id: int) -> bool:
         """Marque un post comme publié."""
@@ -415,22 +600,34 @@ class SupabaseClient:
             print(f"Erreur ajout événement: {e}")
             return None
     
-    def get_candidature_events(self, candidature_id: str) -> List[Dict]:
-        """Récupère tous les événements d'une candidature."""
-        if not self.enabled:
-            return []
+    def get_events_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Récupère les événements de plusieurs candidatures en une seule requête.
+        
+        Args:
+            candidature_ids: IDs des candidatures affichées
+            
+        Returns:
+            Dict {candidature_id: événements du plus récent au plus ancien}
+            (liste vide pour une candidature sans événement)
+        """
+        grouped = {cand_id: [] for cand_id in candidature_ids}
+        if not self.enabled or not candidature_ids:
+            return grouped
         
         try:
             result = self.client.table("candidatures_events") \
                 .select("*") \
-                .eq("candidature_id", candidature_id) \
+                .in_("candidature_id", list(candidature_ids)) \
                 .order("date_event", desc=True) \
                 .execute()
-            return result.data or []
+            for event in result.data or []:
+                grouped.setdefault(event.get("candidature_id"), []).append(event)
+            return grouped
             
         except Exception as e:
             print(f"Erreur récupération événements: {e}")
-            return []
+            return grouped
     
     def get_upcoming_reminders(self, days: int = 7) -> List[Dict]:
         """
@@ -577,22 +774,27 @@ class SupabaseClient:
             print(f"Erreur sauvegarde CV personnalisé: {e}")
             return None
     
-    def get_cv_personnalises(self, limit: int = 20) -> List[Dict]:
-        """Récupère les CV personnalisés récents."""
+    def get_cv_personnalises_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[Dict] = None,
+        columns: str = CV_SUMMARY_COLUMNS
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Récupère une page de CV personnalisés (les plus récents d'abord).
+        
+        Returns:
+            Tuple (CV, curseur de la page suivante ou None)
+        """
         if not self.enabled:
-            return []
+            return [], None
         
         try:
-            result = self.client.table("cv_personnalises") \
-                .select("*") \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            return result.data or []
+            return self._fetch_page("cv_personnalises", columns, limit, cursor)
             
         except Exception as e:
             print(f"Erreur récupération CV personnalisés: {e}")
-            return []
+            return [], None
     
     def get_cv_personnalise(self, cv_id: int) -> Optional[Dict]:
         """Récupère un CV personnalisé par son ID."""
@@ -611,6 +813,13 @@ class SupabaseClient:
             print(f"Erreur récupération CV: {e}")
             return None
     
+    def get_cv_details(self, cv_id: int) -> Optional[Dict]:
+        """
+        Récupère le contenu d'un CV personnalisé (HTML, personnalisations,
+        historique du chat, texte de l'offre), chargé une fois puis gardé en mémoire.
+        """
+        return self._get_details("cv_personnalises", cv_id, CV_DETAIL_COLUMNS)
+    
     def update_cv_personnalise(
         self,
         cv_id: int,
@@ -642,6 +851,7 @@ class SupabaseClient:
                 .update(data) \
                 .eq("id", cv_id) \
                 .execute()
+            self._forget_details("cv_personnalises", cv_id)
             return True
             
         except Exception as e:
@@ -658,28 +868,41 @@ class SupabaseClient:
                 .delete() \
                 .eq("id", cv_id) \
                 .execute()
+            self._forget_details("cv_personnalises", cv_id)
             return True
             
         except Exception as e:
             print(f"Erreur suppression CV: {e}")
             return False
     
-    def get_cvs_for_candidature(self, candidature_id: str) -> List[Dict]:
-        """Récupère les CV personnalisés liés à une candidature."""
-        if not self.enabled:
-            return []
+    def get_cvs_for_candidatures(self, candidature_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Récupère les CV personnalisés liés à plusieurs candidatures en une seule requête.
+        
+        Args:
+            candidature_ids: IDs des candidatures affichées
+            
+        Returns:
+            Dict {candidature_id: CV liés du plus récent au plus ancien}
+            (liste vide pour une candidature sans CV)
+        """
+        grouped = {cand_id: [] for cand_id in candidature_ids}
+        if not self.enabled or not candidature_ids:
+            return grouped
         
         try:
             result = self.client.table("cv_personnalises") \
-                .select("id, titre_offre, version, created_at") \
-                .eq("candidature_id", candidature_id) \
+                .select("id, titre_offre, version, created_at, candidature_id") \
+                .in_("candidature_id", list(candidature_ids)) \
                 .order("created_at", desc=True) \
                 .execute()
-            return result.data or []
+            for cv in result.data or []:
+                grouped.setdefault(cv.get("candidature_id"), []).append(cv)
+            return grouped
             
         except Exception as e:
-            print(f"Erreur récupération CV candidature: {e}")
-            return []
+            print(f"Erreur récupération CV candidatures: {e}")
+            return grouped
     
     # =========================================================================
     # CONTEXTES PERSONNALISÉS (pour Lettre de motivation)
@@ -787,28 +1010,38 @@ class SupabaseClient:
     # =========================================================================
     
     def get_candidatures_stats(self) -> Dict:
-        """Récupère les statistiques des candidatures."""
+        """
+        Récupère les statistiques des candidatures.
+        
+        Les comptes par statut sont calculés par la base (vue candidatures_stats) :
+        une seule petite requête, quelle que soit la taille de l'historique.
+        """
         if not self.enabled:
             return {}
         
         try:
-            # Récupérer toutes les candidatures
+            result = self.client.table("candidatures_stats") \
+                .select("statut, nombre") \
+                .execute()
+            return build_candidatures_stats(result.data or [])
+            
+        except Exception as e:
+            # Vue absente (migration non appliquée) : comptage côté client
+            print(f"Vue candidatures_stats indisponible ({e}), comptage local")
+        
+        try:
             result = self.client.table("candidatures") \
                 .select("statut") \
                 .execute()
             
-            candidatures = result.data or []
-            
-            stats = {
-                "total": len(candidatures),
-                "en_cours": sum(1 for c in candidatures if c.get("statut") == "en_cours"),
-                "envoyees": sum(1 for c in candidatures if c.get("statut") == "envoyee"),
-                "entretiens": sum(1 for c in candidatures if c.get("statut") == "entretien"),
-                "refusees": sum(1 for c in candidatures if c.get("statut") == "refusee"),
-                "acceptees": sum(1 for c in candidatures if c.get("statut") == "acceptee")
-            }
+            counts = {}
+            for candidature in result.data or []:
+                statut = candidature.get("statut")
+                counts[statut] = counts.get(statut, 0) + 1
             
-            return stats
+            return build_candidatures_stats(
+                [{"statut": statut, "nombre": nombre} for statut, nombre in counts.items()]
+            )
             
         except Exception as e:
             print(f"Erreur statistiques: {e}")
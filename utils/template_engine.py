@@ -0,0 +1,140 @@
+"""
+Mini moteur de template compilé (syntaxe {{variable}} et {{#section}}...{{/section}})
+"""
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+
+_TAG_PATTERN = re.compile(r"\{\{([#/]?)([^{}]*)\}\}")
+
+
+class CompiledTemplate:
+    """
+    Template analysé une seule fois en une liste de nœuds.
+    
+    Trois types de nœuds : texte littéral, variable {{nom}} et section
+    {{#nom}}...{{/nom}} (avec ses nœuds enfants). Le rendu parcourt les nœuds
+    une fois et assemble les morceaux avec un seul join, au lieu de parcourir
+    tout le document pour chaque variable.
+    """
+    
+    def __init__(self, source: str):
+        """
+        Compile le template.
+        
+        Args:
+            source: Texte du template
+        """
+        self.nodes = self._parse(source)
+    
+    @staticmethod
+    def _parse(source: str) -> List:
+        """Découpe le template en nœuds ("text", str), ("var", nom), ("section", nom, enfants)."""
+        root = []
+        # Pile des sections ouvertes : (nom, balise d'ouverture, nœuds parents)
+        stack = []
+        nodes = root
+        pos = 0
+        
+        for match in _TAG_PATTERN.finditer(source):
+            if match.start() > pos:
+                nodes.append(("text", source[pos:match.start()]))
+            pos = match.end()
+            kind, name = match.group(1), match.group(2)
+            
+            if kind == "#":
+                stack.append((name, match.group(0), nodes))
+                nodes = []
+            elif kind == "/" and stack and stack[-1][0] == name:
+                _, _, parent = stack.pop()
+                parent.append(("section", name, nodes))
+                nodes = parent
+            elif kind == "/":
+                # Fermeture orpheline : conservée telle quelle
+                nodes.append(("text", match.group(0)))
+            else:
+                nodes.append(("var", name))
+                
+        if pos < len(source):
+            nodes.append(("text", source[pos:]))
+            
+        # Sections jamais fermées : balise d'ouverture conservée telle quelle
+        while stack:
+            _, tag, parent = stack.pop()
+            parent.append(("text", tag))
+            parent.extend(nodes)
+            nodes = parent
+            
+        return root
+    
+    def render(self, values: Dict[str, str], sections: Dict[str, Union[str, bool]] = None) -> str:
+        """
+        Produit le document.
+        
+        Args:
+            values: Valeurs des variables {{nom}} (une variable inconnue reste telle quelle)
+            sections: Traitement de chaque section {{#nom}}...{{/nom}} :
+                - str : remplace tout le bloc
+                - True : garde le contenu, sans les balises
+                - False : supprime le bloc
+                Une section absente est laissée telle quelle (balises comprises).
+                
+        Returns:
+            Le document rendu
+        """
+        parts = []
+        self._render_nodes(self.nodes, values, sections or {}, parts)
+        return "".join(parts)
+    
+    def _render_nodes(self, nodes: List, values: Dict, sections: Dict, parts: List[str]) -> None:
+        for node in nodes:
+            kind = node[0]
+            if kind == "text":
+                parts.append(node[1])
+            elif kind == "var":
+                value = values.get(node[1])
+                parts.append(value if value is not None else f"{{{{{node[1]}}}}}")
+            else:
+                _, name, children = node
+                block = sections.get(name)
+                if isinstance(block, str):
+                    parts.append(block)
+                elif block is True:
+                    self._render_nodes(children, values, sections, parts)
+                elif block is None:
+                    parts.append(f"{{{{#{name}}}}}")
+                    self._render_nodes(children, values, sections, parts)
+                    parts.append(f"{{{{/{name}}}}}")
+
+
+# Templates compilés, invalidés quand le fichier change (date de modification)
+_compiled_templates = {}
+_compiled_templates_lock = threading.Lock()
+
+
+def load_template(path: Union[str, Path]) -> CompiledTemplate:
+    """
+    Retourne le template compilé d'un fichier, recompilé seulement s'il a changé.
+    
+    Args:
+        path: Chemin du fichier template
+        
+    Returns:
+        Le template compilé
+    """
+    path = Path(path)
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    
+    with _compiled_templates_lock:
+        cached = _compiled_templates.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+            
+    with open(path, "r", encoding="utf-8") as f:
+        template = CompiledTemplate(f.read())
+        
+    with _compiled_templates_lock:
+        _compiled_templates[path] = (signature, template)
+    return template